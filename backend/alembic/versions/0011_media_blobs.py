@@ -0,0 +1,53 @@
+"""add content-addressed media_blobs and media_assets.blob_id
+
+Revision ID: 0011_media_blobs
+Revises: 0010_merge_roles
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0011_media_blobs"
+down_revision = "0010_merge_roles"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "media_blobs",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True, server_default=sa.text("gen_random_uuid()")),
+        sa.Column("sha256", sa.String(length=64), nullable=False),
+        sa.Column("content_type", sa.String(length=100), nullable=True),
+        sa.Column("bytes", sa.BigInteger(), nullable=False),
+        sa.Column("local_path", sa.Text(), nullable=False),
+        sa.Column("public_url", sa.Text(), nullable=False),
+        sa.Column("ref_count", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_unique_constraint("uq_media_blobs_sha256", "media_blobs", ["sha256"])
+
+    # Existing assets keep their per-salon files; only new downloads are content-addressed.
+    op.add_column("media_assets", sa.Column("blob_id", postgresql.UUID(as_uuid=True), nullable=True))
+    op.create_foreign_key(
+        "fk_media_assets_blob_id",
+        "media_assets",
+        "media_blobs",
+        ["blob_id"],
+        ["id"],
+        ondelete="SET NULL",
+    )
+    op.create_index("ix_media_assets_blob_id", "media_assets", ["blob_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_media_assets_blob_id", table_name="media_assets")
+    op.drop_constraint("fk_media_assets_blob_id", "media_assets", type_="foreignkey")
+    op.drop_column("media_assets", "blob_id")
+    op.drop_constraint("uq_media_blobs_sha256", "media_blobs", type_="unique")
+    op.drop_table("media_blobs")
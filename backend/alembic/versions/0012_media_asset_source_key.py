@@ -0,0 +1,27 @@
+"""add media_assets.source_key for download coalescing
+
+Revision ID: 0012_media_source_key
+Revises: 0011_media_blobs
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0012_media_source_key"
+down_revision = "0011_media_blobs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("media_assets", sa.Column("source_key", sa.String(length=64), nullable=True))
+    op.create_index("ix_media_assets_source_key", "media_assets", ["source_key"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_media_assets_source_key", table_name="media_assets")
+    op.drop_column("media_assets", "source_key")
@@ -0,0 +1,38 @@
+"""add media_assets claim columns for batch downloads
+
+Revision ID: 0013_media_batch_claims
+Revises: 0012_media_source_key
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0013_media_batch_claims"
+down_revision = "0012_media_source_key"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("media_assets", sa.Column("claimed_at", sa.DateTime(timezone=True), nullable=True))
+    op.add_column(
+        "media_assets",
+        sa.Column("download_attempts", sa.Integer(), nullable=False, server_default=sa.text("0")),
+    )
+    # Partial index for the batch claim query.
+    op.create_index(
+        "ix_media_assets_pending_created_at",
+        "media_assets",
+        ["created_at"],
+        postgresql_where=sa.text("status IN ('pending', 'downloading')"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_media_assets_pending_created_at", table_name="media_assets")
+    op.drop_column("media_assets", "download_attempts")
+    op.drop_column("media_assets", "claimed_at")
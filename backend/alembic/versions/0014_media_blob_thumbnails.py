@@ -0,0 +1,27 @@
+"""add media_blobs thumbnail columns
+
+Revision ID: 0014_media_blob_thumbnails
+Revises: 0013_media_batch_claims
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0014_media_blob_thumbnails"
+down_revision = "0013_media_batch_claims"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("media_blobs", sa.Column("thumbnail_path", sa.Text(), nullable=True))
+    op.add_column("media_blobs", sa.Column("thumbnail_url", sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("media_blobs", "thumbnail_url")
+    op.drop_column("media_blobs", "thumbnail_path")
@@ -0,0 +1,37 @@
+"""add media_blobs perceptual hash with band indexes
+
+Revision ID: 0015_media_blob_phash
+Revises: 0014_media_blob_thumbnails
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0015_media_blob_phash"
+down_revision = "0014_media_blob_thumbnails"
+branch_labels = None
+depends_on = None
+
+# Near-duplicate lookup matches any of the four 16-bit bands of the hash.
+_BAND_SHIFTS = (48, 32, 16, 0)
+
+
+def upgrade() -> None:
+    op.add_column("media_blobs", sa.Column("phash", sa.BigInteger(), nullable=True))
+    for i, shift in enumerate(_BAND_SHIFTS):
+        op.create_index(
+            f"ix_media_blobs_phash_band{i}",
+            "media_blobs",
+            [sa.text(f"((phash >> {shift}) & 65535)")],
+            postgresql_where=sa.text("phash IS NOT NULL"),
+        )
+
+
+def downgrade() -> None:
+    for i in range(len(_BAND_SHIFTS)):
+        op.drop_index(f"ix_media_blobs_phash_band{i}", table_name="media_blobs")
+    op.drop_column("media_blobs", "phash")
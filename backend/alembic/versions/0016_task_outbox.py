@@ -0,0 +1,43 @@
+"""add task_outbox for transactional task publishing
+
+Revision ID: 0016_task_outbox
+Revises: 0015_media_blob_phash
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0016_task_outbox"
+down_revision = "0015_media_blob_phash"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "task_outbox",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True, server_default=sa.text("gen_random_uuid()")),
+        sa.Column("task_name", sa.String(length=200), nullable=False),
+        sa.Column("args", postgresql.JSONB(), nullable=False, server_default=sa.text("'[]'::jsonb")),
+        sa.Column("sent_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    # The relay only scans unsent rows.
+    op.create_index(
+        "ix_task_outbox_unsent",
+        "task_outbox",
+        ["created_at"],
+        postgresql_where=sa.text("sent_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_task_outbox_unsent", table_name="task_outbox")
+    op.drop_table("task_outbox")
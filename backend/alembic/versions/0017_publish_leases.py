@@ -0,0 +1,47 @@
+"""add publish leases to gbp_posts and gbp_media_uploads
+
+Revision ID: 0017_publish_leases
+Revises: 0016_task_outbox
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0017_publish_leases"
+down_revision = "0016_task_outbox"
+branch_labels = None
+depends_on = None
+
+
+_TABLES = (("gbp_posts", "posting"), ("gbp_media_uploads", "uploading"))
+
+
+def upgrade() -> None:
+    for table, claimed in _TABLES:
+        op.add_column(table, sa.Column("lease_owner", sa.String(length=200), nullable=True))
+        op.add_column(table, sa.Column("lease_expires_at", sa.DateTime(timezone=True), nullable=True))
+        op.add_column(table, sa.Column("reap_count", sa.Integer(), nullable=False, server_default=sa.text("0")))
+        # The reaper only scans claimed rows.
+        op.create_index(
+            f"ix_{table}_lease_expires_at",
+            table,
+            ["lease_expires_at"],
+            postgresql_where=sa.text(f"status = '{claimed}'"),
+        )
+        # Rows claimed before this migration have no lease; give them one so the
+        # reaper picks them up if their worker is already gone.
+        op.execute(
+            f"UPDATE {table} SET lease_expires_at = now() + interval '10 minutes' WHERE status = '{claimed}'"
+        )
+
+
+def downgrade() -> None:
+    for table, _claimed in _TABLES:
+        op.drop_index(f"ix_{table}_lease_expires_at", table_name=table)
+        op.drop_column(table, "reap_count")
+        op.drop_column(table, "lease_expires_at")
+        op.drop_column(table, "lease_owner")
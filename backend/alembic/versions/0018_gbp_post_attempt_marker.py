@@ -0,0 +1,27 @@
+"""add idempotency marker columns to gbp_posts
+
+Revision ID: 0018_gbp_post_attempt_marker
+Revises: 0017_publish_leases
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0018_gbp_post_attempt_marker"
+down_revision = "0017_publish_leases"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("gbp_posts", sa.Column("publish_attempt_key", sa.String(length=64), nullable=True))
+    op.add_column("gbp_posts", sa.Column("publish_attempted_at", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("gbp_posts", "publish_attempted_at")
+    op.drop_column("gbp_posts", "publish_attempt_key")
@@ -0,0 +1,64 @@
+"""add scheduled_at to gbp_posts and gbp_media_uploads
+
+Revision ID: 0019_publish_schedule
+Revises: 0018_gbp_post_attempt_marker
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0019_publish_schedule"
+down_revision = "0018_gbp_post_attempt_marker"
+branch_labels = None
+depends_on = None
+
+
+_TABLES = ("gbp_posts", "gbp_media_uploads")
+
+# Check constraints from 0002, without and with the new 'scheduled' status.
+_STATUS_CHECKS = {
+    "gbp_posts": (
+        "ck_gbp_posts_status",
+        "status IN ('pending', 'queued', 'posting', 'posted', 'failed', 'skipped')",
+        "status IN ('pending', 'scheduled', 'queued', 'posting', 'posted', 'failed', 'skipped')",
+    ),
+    "gbp_media_uploads": (
+        "ck_gbp_media_uploads_status",
+        "status IN ('pending', 'queued', 'uploading', 'uploaded', 'failed', 'skipped')",
+        "status IN ('pending', 'scheduled', 'queued', 'uploading', 'uploaded', 'failed', 'skipped')",
+    ),
+}
+
+
+def upgrade() -> None:
+    for table in _TABLES:
+        # Replace check constraint: add 'scheduled'
+        name, _old, new = _STATUS_CHECKS[table]
+        op.drop_constraint(name, table, type_="check")
+        op.create_check_constraint(name, table, new)
+        op.add_column(table, sa.Column("scheduled_at", sa.DateTime(timezone=True), nullable=True))
+        # The dispatcher only scans rows waiting for their slot.
+        op.create_index(
+            f"ix_{table}_scheduled_due",
+            table,
+            ["scheduled_at"],
+            postgresql_where=sa.text("status = 'scheduled'"),
+        )
+        # Slot assignment looks at each location's recent and upcoming slots.
+        op.create_index(f"ix_{table}_location_scheduled_at", table, ["gbp_location_id", "scheduled_at"])
+
+
+def downgrade() -> None:
+    for table in _TABLES:
+        # Rows waiting for their slot publish right away on the old schema.
+        op.execute(f"UPDATE {table} SET status = 'queued' WHERE status = 'scheduled'")
+        name, old, _new = _STATUS_CHECKS[table]
+        op.drop_constraint(name, table, type_="check")
+        op.create_check_constraint(name, table, old)
+        op.drop_index(f"ix_{table}_location_scheduled_at", table_name=table)
+        op.drop_index(f"ix_{table}_scheduled_due", table_name=table)
+        op.drop_column(table, "scheduled_at")
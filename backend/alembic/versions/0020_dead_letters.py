@@ -0,0 +1,49 @@
+"""add dead_letters for permanently failed Celery tasks
+
+Revision ID: 0020_dead_letters
+Revises: 0019_publish_schedule
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0020_dead_letters"
+down_revision = "0019_publish_schedule"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "dead_letters",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True, server_default=sa.text("gen_random_uuid()")),
+        sa.Column("task_name", sa.String(length=200), nullable=False),
+        sa.Column("task_id", sa.String(length=200), nullable=True),
+        sa.Column("args", postgresql.JSONB(), nullable=False, server_default=sa.text("'[]'::jsonb")),
+        sa.Column("kwargs", postgresql.JSONB(), nullable=False, server_default=sa.text("'{}'::jsonb")),
+        sa.Column("exception_type", sa.String(length=200), nullable=False),
+        sa.Column("error_message", sa.Text(), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default=sa.text("1")),
+        sa.Column("replayed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("replay_count", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index("ix_dead_letters_task_name_created_at", "dead_letters", ["task_name", "created_at"])
+    # The admin list defaults to letters not replayed yet.
+    op.create_index(
+        "ix_dead_letters_unreplayed",
+        "dead_letters",
+        ["created_at"],
+        postgresql_where=sa.text("replayed_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_dead_letters_unreplayed", table_name="dead_letters")
+    op.drop_index("ix_dead_letters_task_name_created_at", table_name="dead_letters")
+    op.drop_table("dead_letters")
@@ -0,0 +1,61 @@
+"""add job_resource_usage for per-task resource accounting
+
+Revision ID: 0021_job_resource_usage
+Revises: 0020_dead_letters
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0021_job_resource_usage"
+down_revision = "0020_dead_letters"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "job_resource_usage",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True, server_default=sa.text("gen_random_uuid()")),
+        sa.Column(
+            "job_log_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("job_logs.id", ondelete="CASCADE"),
+            nullable=True,
+        ),
+        sa.Column(
+            "salon_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("salons.id", ondelete="CASCADE"),
+            nullable=True,
+        ),
+        sa.Column("task_name", sa.String(length=200), nullable=False),
+        sa.Column("task_id", sa.String(length=200), nullable=True),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("wall_ms", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("cpu_ms", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("peak_rss_delta_kb", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("http_requests", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("http_bytes", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("db_queries", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("db_time_ms", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index("ix_job_resource_usage_job_log_id", "job_resource_usage", ["job_log_id"])
+    op.create_index("ix_job_resource_usage_salon_id", "job_resource_usage", ["salon_id"])
+    # Aggregates are per task over a time window.
+    op.create_index(
+        "ix_job_resource_usage_task_name_created_at", "job_resource_usage", ["task_name", "created_at"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_job_resource_usage_task_name_created_at", table_name="job_resource_usage")
+    op.drop_index("ix_job_resource_usage_salon_id", table_name="job_resource_usage")
+    op.drop_index("ix_job_resource_usage_job_log_id", table_name="job_resource_usage")
+    op.drop_table("job_resource_usage")
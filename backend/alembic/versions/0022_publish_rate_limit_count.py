@@ -0,0 +1,30 @@
+"""add rate_limit_count to gbp_posts and gbp_media_uploads
+
+Revision ID: 0022_publish_rate_limit_count
+Revises: 0021_job_resource_usage
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0022_publish_rate_limit_count"
+down_revision = "0021_job_resource_usage"
+branch_labels = None
+depends_on = None
+
+
+_TABLES = ("gbp_posts", "gbp_media_uploads")
+
+
+def upgrade() -> None:
+    for table in _TABLES:
+        op.add_column(table, sa.Column("rate_limit_count", sa.Integer(), nullable=False, server_default=sa.text("0")))
+
+
+def downgrade() -> None:
+    for table in _TABLES:
+        op.drop_column(table, "rate_limit_count")
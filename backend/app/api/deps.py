@@ -12,6 +12,7 @@ from app.core.config import get_settings
 from app.core.supabase_jwt import SupabaseAuthError, verify_jwt
 from app.models.user import AppUser
 from app.models.user_salon import UserSalon
+from app.services.gbp_client import GbpApiClient, get_client
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +30,10 @@ def db_session() -> Session:
         db.close()
 
 
+def gbp_api_client() -> GbpApiClient:
+    return get_client()
+
+
 @dataclass(frozen=True)
 class CurrentUser:
     id: uuid.UUID
@@ -2,25 +2,34 @@ from __future__ import annotations
 
 import logging
 import uuid
+from dataclasses import asdict
+from datetime import datetime, timedelta, timezone
+from typing import Literal
 
 import sqlalchemy as sa
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.api.deps import CurrentUser, db_session, require_roles
 from app.models.alert import Alert
+from app.models.dead_letter import DeadLetter
 from app.models.gbp_connection import GbpConnection
 from app.models.gbp_location import GbpLocation
 from app.models.job_log import JobLog
+from app.models.job_resource_usage import JobResourceUsage
 from app.models.salon import Salon
 from app.models.user import AppUser
 from app.models.user_salon import UserSalon
 from app.core.config import get_settings
 from app.schemas.admin import AdminSalonCreate, AdminUserInviteRequest, AdminUserSalonsUpdateRequest, AppUserResponse
+from app.schemas.dead_letters import DeadLetterReplayRequest, DeadLetterReplayResponse, DeadLetterResponse
 from app.services import supabase_admin
-from app.schemas.job_logs import JobLogResponse
-from app.schemas.monitor import SalonMonitorItem
+from app.services.backpressure import pipeline_pressure
+from app.services.dead_letters import dead_letter_query, replay_dead_letters
+from app.services.outbox import kick_relay
+from app.schemas.job_logs import JobLogResponse, JobResourceAggregate, JobResourceTotals
+from app.schemas.monitor import PipelineStageStatus, SalonMonitorItem
 from app.schemas.salon import SalonResponse
 
 logger = logging.getLogger(__name__)
@@ -255,7 +264,98 @@ def list_job_logs(
     _: CurrentUser = Depends(require_roles("super_admin")),
 ) -> list[JobLogResponse]:
     logs = db.query(JobLog).order_by(JobLog.started_at.desc()).limit(min(max(limit, 1), 500)).all()
-    return [JobLogResponse.model_validate(x) for x in logs]
+    totals: dict[uuid.UUID, JobResourceTotals] = {}
+    if logs:
+        rows = db.execute(
+            sa.select(JobResourceUsage.job_log_id, *_resource_totals())
+            .where(JobResourceUsage.job_log_id.in_([x.id for x in logs]))
+            .group_by(JobResourceUsage.job_log_id)
+        ).all()
+        totals = {r.job_log_id: JobResourceTotals.model_validate(r, from_attributes=True) for r in rows}
+    out: list[JobLogResponse] = []
+    for x in logs:
+        item = JobLogResponse.model_validate(x)
+        item.resources = totals.get(x.id)
+        out.append(item)
+    return out
+
+
+def _resource_totals() -> list[sa.ColumnElement]:
+    u = JobResourceUsage
+    return [
+        sa.func.count().label("runs"),
+        sa.func.coalesce(sa.func.sum(u.wall_ms), 0).label("wall_ms"),
+        sa.func.coalesce(sa.func.sum(u.cpu_ms), 0).label("cpu_ms"),
+        sa.func.coalesce(sa.func.max(u.peak_rss_delta_kb), 0).label("peak_rss_delta_kb"),
+        sa.func.coalesce(sa.func.sum(u.http_requests), 0).label("http_requests"),
+        sa.func.coalesce(sa.func.sum(u.http_bytes), 0).label("http_bytes"),
+        sa.func.coalesce(sa.func.sum(u.db_queries), 0).label("db_queries"),
+        sa.func.coalesce(sa.func.sum(u.db_time_ms), 0).label("db_time_ms"),
+    ]
+
+
+@router.get("/job_logs/resources", response_model=list[JobResourceAggregate])
+def job_resource_aggregates(
+    group_by: Literal["task", "salon"] = "task",
+    hours: int = 24,
+    db: Session = Depends(db_session),
+    _: CurrentUser = Depends(require_roles("super_admin")),
+) -> list[JobResourceAggregate]:
+    """Resource use per task or per salon over the last ``hours``, heaviest CPU first."""
+    key = JobResourceUsage.task_name if group_by == "task" else JobResourceUsage.salon_id
+    since = datetime.now(tz=timezone.utc) - timedelta(hours=min(max(hours, 1), 24 * 31))
+    totals = _resource_totals()
+    rows = db.execute(
+        sa.select(key.label("key"), *totals)
+        .where(JobResourceUsage.created_at >= since)
+        .group_by(key)
+        .order_by(sa.desc("cpu_ms"))
+    ).all()
+    return [
+        JobResourceAggregate(
+            **{c.key: getattr(r, c.key) for c in totals},
+            key=str(r.key) if r.key is not None else "",
+            wall_ms_avg=round(r.wall_ms / r.runs) if r.runs else 0,
+        )
+        for r in rows
+    ]
+
+
+@router.get("/dead_letters", response_model=list[DeadLetterResponse])
+def list_dead_letters(
+    task_name: str | None = None,
+    exception_type: str | None = None,
+    since: datetime | None = None,
+    replayed: bool | None = False,
+    limit: int = 200,
+    db: Session = Depends(db_session),
+    _: CurrentUser = Depends(require_roles("super_admin")),
+) -> list[DeadLetterResponse]:
+    q = dead_letter_query(task_name=task_name, exception_type=exception_type, since=since, replayed=replayed)
+    letters = db.execute(q.limit(min(max(limit, 1), 500))).scalars().all()
+    return [DeadLetterResponse.model_validate(x) for x in letters]
+
+
+@router.post("/dead_letters/replay", response_model=DeadLetterReplayResponse)
+def replay_dead_letters_endpoint(
+    payload: DeadLetterReplayRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(db_session),
+    _: CurrentUser = Depends(require_roles("super_admin")),
+) -> DeadLetterReplayResponse:
+    if payload.ids:
+        q = sa.select(DeadLetter).where(DeadLetter.id.in_(payload.ids)).order_by(DeadLetter.created_at)
+    else:
+        q = dead_letter_query(
+            task_name=payload.task_name, exception_type=payload.exception_type, since=payload.since
+        ).limit(get_settings().dead_letter_replay_max)
+    letters = db.execute(q.with_for_update(skip_locked=True)).scalars().all()
+    result = replay_dead_letters(db, letters)
+    if result.rescheduled:
+        background_tasks.add_task(kick_relay)
+    return DeadLetterReplayResponse(
+        matched=len(letters), sent=result.sent, rescheduled=result.rescheduled, skipped=result.skipped
+    )
 
 
 @router.get("/monitor", response_model=list[SalonMonitorItem])
@@ -309,3 +409,12 @@ def monitor(
             )
         )
     return out
+
+
+@router.get("/monitor/pipeline", response_model=list[PipelineStageStatus])
+def monitor_pipeline(
+    db: Session = Depends(db_session),
+    _: CurrentUser = Depends(require_roles("super_admin")),
+) -> list[PipelineStageStatus]:
+    snapshot = pipeline_pressure(db, refresh=True)
+    return [PipelineStageStatus(**asdict(stage)) for stage in snapshot.values()]
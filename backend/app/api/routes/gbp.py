@@ -7,7 +7,14 @@ from sqlalchemy import func
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from app.api.deps import CurrentUser, db_session, get_current_user, require_roles, require_salon
+from app.api.deps import (
+    CurrentUser,
+    db_session,
+    gbp_api_client,
+    get_current_user,
+    require_roles,
+    require_salon,
+)
 from app.models.gbp_connection import GbpConnection
 from app.models.gbp_location import GbpLocation
 from app.models.salon import Salon
@@ -22,7 +29,7 @@ from app.schemas.gbp import (
     GbpLocationResponse,
     GbpLocationSelectRequest,
 )
-from app.services import gbp_client
+from app.services.gbp_client import GbpApiClient
 from app.services.gbp_tokens import get_access_token
 
 
@@ -151,6 +158,7 @@ def list_available_locations(
     user: CurrentUser = Depends(require_roles("super_admin")),
     connection_id: uuid.UUID | None = Query(default=None),
     x_salon_id: str | None = Header(default=None, alias="X-Salon-Id"),
+    gbp: GbpApiClient = Depends(gbp_api_client),
 ) -> list[GbpAvailableLocation]:
     """List available GBP locations.
 
@@ -167,14 +175,14 @@ def list_available_locations(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="GBP is not connected")
     access_token = get_access_token(db, conn)
     try:
-        accounts = gbp_client.list_accounts(access_token=access_token)
+        accounts = gbp.list_accounts(access_token=access_token)
     except Exception:
         accounts = []
 
     out: list[GbpAvailableLocation] = []
     for account_id in accounts:
         try:
-            locs = gbp_client.list_locations(access_token=access_token, account_id=account_id)
+            locs = gbp.list_locations(access_token=access_token, account_id=account_id)
         except Exception:
             continue
         for loc in locs:
@@ -2,13 +2,19 @@ from __future__ import annotations
 
 import uuid
 
-from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
 from app.api.deps import CurrentUser, db_session, get_current_user, require_salon
 from app.models.gbp_media_upload import GbpMediaUpload
+from app.models.media_asset import MediaAsset
+from app.models.media_blob import MediaBlob
+from app.schemas.bulk import BulkActionResponse, BulkUploadActionRequest
 from app.schemas.media_uploads import MediaUploadDetail, MediaUploadListItem, MediaUploadUpdateRequest
-from app.worker.tasks import upload_gbp_media
+from app.services.bulk_actions import bulk_transition
+from app.services.media_backends import resolve_public_url
+from app.services.outbox import kick_relay
+from app.services.publish_schedule import schedule_publish
 
 
 router = APIRouter()
@@ -34,7 +40,50 @@ def list_uploads(
         q = q.filter(GbpMediaUpload.status.notin_(excluded))
 
     ups = q.order_by(GbpMediaUpload.created_at.desc()).offset(offset).limit(limit).all()
-    return [MediaUploadListItem.model_validate(u) for u in ups]
+    thumbs: dict[uuid.UUID, str | None] = {}
+    asset_ids = {u.media_asset_id for u in ups}
+    if asset_ids:
+        rows = (
+            db.query(MediaAsset.id, MediaBlob.thumbnail_path, MediaBlob.thumbnail_url)
+            .join(MediaBlob, MediaBlob.id == MediaAsset.blob_id)
+            .filter(MediaAsset.id.in_(asset_ids), MediaAsset.status == "available")
+            .all()
+        )
+        thumbs = {asset_id: resolve_public_url(path, url) for asset_id, path, url in rows}
+    items = []
+    for u in ups:
+        item = MediaUploadListItem.model_validate(u)
+        item.thumbnail_url = thumbs.get(u.media_asset_id)
+        items.append(item)
+    return items
+
+
+@router.post("/bulk", response_model=BulkActionResponse)
+def bulk_action(
+    background_tasks: BackgroundTasks,
+    payload: BulkUploadActionRequest,
+    db: Session = Depends(db_session),
+    user: CurrentUser = Depends(get_current_user),
+    x_salon_id: str | None = Header(default=None, alias="X-Salon-Id"),
+) -> BulkActionResponse:
+    salon_id = require_salon(user, x_salon_id)
+    result = bulk_transition(
+        db,
+        GbpMediaUpload,
+        salon_id=salon_id,
+        action=payload.action,
+        ids=payload.ids,
+        status_filter=payload.status,
+        done_status="uploaded",
+        errors={
+            "not_found": "Upload not found",
+            "approve": "Upload is not pending",
+            "retry": "Upload is not failed",
+            "skip": "Upload already completed",
+        },
+    )
+    background_tasks.add_task(kick_relay)
+    return result
 
 
 @router.get("/{upload_id}", response_model=MediaUploadDetail)
@@ -79,6 +128,7 @@ def update_upload(
 
 @router.post("/{upload_id}/approve", response_model=MediaUploadDetail)
 def approve_upload(
+    background_tasks: BackgroundTasks,
     upload_id: uuid.UUID,
     db: Session = Depends(db_session),
     user: CurrentUser = Depends(get_current_user),
@@ -92,17 +142,17 @@ def approve_upload(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found")
     if up.status != "pending":
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Upload is not pending")
-    up.status = "queued"
     up.error_message = None
-    db.add(up)
+    schedule_publish(db, [up])
     db.commit()
     db.refresh(up)
-    upload_gbp_media.delay(str(up.id))
+    background_tasks.add_task(kick_relay)
     return MediaUploadDetail.model_validate(up)
 
 
 @router.post("/{upload_id}/retry", response_model=MediaUploadDetail)
 def retry_upload(
+    background_tasks: BackgroundTasks,
     upload_id: uuid.UUID,
     db: Session = Depends(db_session),
     user: CurrentUser = Depends(get_current_user),
@@ -116,12 +166,13 @@ def retry_upload(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found")
     if up.status != "failed":
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Upload is not failed")
-    up.status = "queued"
     up.error_message = None
-    db.add(up)
+    up.reap_count = 0
+    up.rate_limit_count = 0
+    schedule_publish(db, [up])
     db.commit()
     db.refresh(up)
-    upload_gbp_media.delay(str(up.id))
+    background_tasks.add_task(kick_relay)
     return MediaUploadDetail.model_validate(up)
 
 
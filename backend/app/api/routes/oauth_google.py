@@ -12,6 +12,7 @@ from app.core.config import get_settings
 from app.core.crypto import encrypt_str
 from app.core.oauth_state import OAuthStateError, create_state, load_state
 from app.models.gbp_connection import GbpConnection
+from app.services.gbp_tokens import invalidate_access_token
 from app.services.google_oauth import build_authorize_url, exchange_code_for_token, fetch_user_email
 
 
@@ -102,5 +103,6 @@ def google_oauth_callback(
     db.add(conn)
     db.commit()
     db.refresh(conn)
+    invalidate_access_token(conn.id)
 
     return RedirectResponse(url=f"{redirect_base}/admin/gbp-mapping?oauth=success")
@@ -3,37 +3,39 @@ from __future__ import annotations
 import uuid
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
 from app.api.deps import CurrentUser, db_session, get_current_user, require_salon
 from app.models.gbp_post import GbpPost
+from app.schemas.bulk import BulkActionResponse, BulkPostActionRequest
 from app.schemas.posts import PostDetail, PostListItem, PostUpdateRequest
-from app.worker.tasks import post_gbp_post
+from app.services.bulk_actions import bulk_transition
+from app.services.outbox import kick_relay
+from app.services.publish_schedule import schedule_publish
 
 
 router = APIRouter()
 
 
-def _validate_offer_fields(post: GbpPost) -> None:
-    """Raise 422 if an OFFER post is missing or has invalid event fields."""
+def _offer_fields_error(post: GbpPost) -> str | None:
+    """Why an OFFER post cannot be queued, or None."""
     if post.post_type != "OFFER":
-        return
+        return None
     if not (post.event_title and post.event_start_date and post.event_end_date):
-        raise HTTPException(
-            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            detail="OFFER posts require event_title, event_start_date, and event_end_date",
-        )
+        return "OFFER posts require event_title, event_start_date, and event_end_date"
     if len(post.event_title) > 58:
-        raise HTTPException(
-            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            detail="event_title must be 58 characters or fewer",
-        )
+        return "event_title must be 58 characters or fewer"
     if post.event_start_date > post.event_end_date:
-        raise HTTPException(
-            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            detail="event_end_date must be on or after event_start_date",
-        )
+        return "event_end_date must be on or after event_start_date"
+    return None
+
+
+def _validate_offer_fields(post: GbpPost) -> None:
+    """Raise 422 if an OFFER post is missing or has invalid event fields."""
+    error = _offer_fields_error(post)
+    if error:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=error)
 
 
 @router.get("", response_model=list[PostListItem])
@@ -60,6 +62,35 @@ def list_posts(
     return [PostListItem.model_validate(p) for p in posts]
 
 
+@router.post("/bulk", response_model=BulkActionResponse)
+def bulk_action(
+    background_tasks: BackgroundTasks,
+    payload: BulkPostActionRequest,
+    db: Session = Depends(db_session),
+    user: CurrentUser = Depends(get_current_user),
+    x_salon_id: str | None = Header(default=None, alias="X-Salon-Id"),
+) -> BulkActionResponse:
+    salon_id = require_salon(user, x_salon_id)
+    result = bulk_transition(
+        db,
+        GbpPost,
+        salon_id=salon_id,
+        action=payload.action,
+        ids=payload.ids,
+        status_filter=payload.status,
+        done_status="posted",
+        errors={
+            "not_found": "Post not found",
+            "approve": "Post is not pending",
+            "retry": "Post is not failed",
+            "skip": "Post already posted",
+        },
+        validate=_offer_fields_error,
+    )
+    background_tasks.add_task(kick_relay)
+    return result
+
+
 @router.get("/{post_id}", response_model=PostDetail)
 def get_post(
     post_id: uuid.UUID,
@@ -108,6 +139,7 @@ def update_post(
 
 @router.post("/{post_id}/approve", response_model=PostDetail)
 def approve_post(
+    background_tasks: BackgroundTasks,
     post_id: uuid.UUID,
     db: Session = Depends(db_session),
     user: CurrentUser = Depends(get_current_user),
@@ -122,18 +154,18 @@ def approve_post(
     if post.status != "pending":
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Post is not pending")
     _validate_offer_fields(post)
-    post.status = "queued"
     post.error_message = None
-    db.add(post)
+    schedule_publish(db, [post])
     db.commit()
     db.refresh(post)
 
-    post_gbp_post.delay(str(post.id))
+    background_tasks.add_task(kick_relay)
     return PostDetail.model_validate(post)
 
 
 @router.post("/{post_id}/retry", response_model=PostDetail)
 def retry_post(
+    background_tasks: BackgroundTasks,
     post_id: uuid.UUID,
     db: Session = Depends(db_session),
     user: CurrentUser = Depends(get_current_user),
@@ -148,13 +180,14 @@ def retry_post(
     if post.status != "failed":
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Post is not failed")
     _validate_offer_fields(post)
-    post.status = "queued"
     post.error_message = None
-    db.add(post)
+    post.reap_count = 0
+    post.rate_limit_count = 0
+    schedule_publish(db, [post])
     db.commit()
     db.refresh(post)
 
-    post_gbp_post.delay(str(post.id))
+    background_tasks.add_task(kick_relay)
     return PostDetail.model_validate(post)
 
 
@@ -21,6 +21,10 @@ class Settings(BaseSettings):
 
     database_url: str = "postgresql+psycopg://salon_gbp:salon_gbp@db:5432/salon_gbp"
     redis_url: str = "redis://redis:6379/0"
+    # Celery result backend: empty = REDIS_URL, "database" = DATABASE_URL (keeps Redis
+    # memory for the broker), or an explicit Celery backend URL.
+    celery_result_backend: str = ""
+    celery_result_expires_sec: int = 3600
 
     # Supabase Auth (Auth only)
     supabase_url: str = ""
@@ -51,9 +55,107 @@ class Settings(BaseSettings):
     media_root: str = "/data/media"
     media_public_path: str = "/media"
     media_retention_days: int = 30
+    # Upper bound for a single downloaded media file; larger responses are aborted mid-stream.
+    media_max_bytes: int = 20 * 1024 * 1024
+    # A completed download of the same (normalized) source URL is reused for this long.
+    media_url_reuse_hours: int = 24
+    # Batch downloader: assets claimed per run, parallel downloads, and per-host cap.
+    media_download_batch_size: int = 50
+    media_download_concurrency: int = 8
+    media_download_per_host: int = 4
+    # GBP-ready variant written to the blob store: longest side, JPEG quality, and preview size.
+    media_image_max_dimension: int = 2048
+    media_jpeg_quality: int = 85
+    media_thumbnail_size: int = 320
+    # Retention cleanup batch size, and the orphan-file sweep (age before a file counts, dry-run quarantine).
+    media_cleanup_batch_size: int = 500
+    media_orphan_grace_hours: int = 24
+    media_orphan_dry_run: bool = True
+    # Near-duplicate media per location (perceptual hash): off / flag / skip, and max Hamming distance (<= 3).
+    media_near_duplicate_action: str = "flag"
+    media_near_duplicate_distance: int = 3
+    # How media reaches GBP: "bytes" streams the stored file (media:startUpload), "source_url"
+    # lets Google fetch our public URL, "auto" streams when the stored file is available.
+    gbp_media_upload_mode: str = "auto"
+    # Pooled GBP API client (one per process): HTTP/2, timeouts and connection limits.
+    gbp_http2: bool = True
+    gbp_http_timeout_sec: float = 30.0
+    gbp_http_connect_timeout_sec: float = 5.0
+    gbp_http_upload_timeout_sec: float = 120.0  # write timeout for streamed media bytes
+    gbp_http_max_connections: int = 20
+    gbp_http_max_keepalive: int = 10
+    gbp_http_keepalive_expiry_sec: float = 60.0
+    # Access token cache: beat refreshes tokens this close to expiry; workers that lose the
+    # refresh lock wait this long for the winner's token.
+    gbp_token_refresh_ahead_min: int = 15
+    gbp_token_lock_wait_sec: float = 10.0
+    # Proactive GBP rate limits (token buckets in Redis): requests per minute and burst per
+    # scope; a rate <= 0 disables that scope. Waits up to max_inline are slept in the
+    # worker, longer ones re-queue the task.
+    gbp_rate_limit_enabled: bool = True
+    gbp_rate_project_per_min: int = 300
+    gbp_rate_project_burst: int = 20
+    gbp_rate_account_per_min: int = 120
+    gbp_rate_account_burst: int = 10
+    gbp_rate_location_per_min: int = 10
+    gbp_rate_location_burst: int = 3
+    gbp_rate_max_inline_wait_sec: float = 2.0
+    # Publishing leases: a claimed post/upload whose lease runs out (worker killed) is
+    # re-queued by the reaper, and failed after this many reaps.
+    gbp_publish_lease_sec: int = 600
+    gbp_publish_max_reaps: int = 3
+    # Publish scheduling per GBP location: approved items get a time slot at most
+    # *_per_hour / *_per_day apart (0 = unlimited), outside the local quiet hours
+    # [quiet_start, quiet_end) (equal hours = no quiet time). Due items are dispatched
+    # from beat in batches of gbp_schedule_dispatch_batch.
+    gbp_schedule_timezone: str = "Asia/Tokyo"
+    gbp_schedule_quiet_start_hour: int = 22
+    gbp_schedule_quiet_end_hour: int = 8
+    gbp_schedule_posts_per_hour: int = 2
+    gbp_schedule_posts_per_day: int = 10
+    gbp_schedule_media_per_hour: int = 30
+    gbp_schedule_media_per_day: int = 200
+    gbp_schedule_dispatch_batch: int = 200
+    # How long a location's recent localPosts list is cached while reconciling retried posts.
+    gbp_reconcile_cache_sec: int = 30
+    # Blob storage backend: "local" (media_root shared volume) or "s3" (any S3-compatible store).
+    media_storage_backend: str = "local"
+    media_s3_bucket: str = ""
+    media_s3_endpoint_url: str = ""  # e.g. http://minio:9000 in development; empty for AWS
+    media_s3_region: str = "ap-northeast-1"
+    media_s3_access_key_id: str = ""
+    media_s3_secret_access_key: str = ""
+    # Public/CDN base URL for the bucket; when empty, pre-signed GET URLs are handed out.
+    media_s3_public_base_url: str = ""
+    media_s3_presign_expires_sec: int = 7 * 24 * 60 * 60
+    media_s3_multipart_threshold_mb: int = 8
+
+    # Task outbox: rows published per relay batch, and how long sent rows are kept.
+    outbox_relay_batch_size: int = 200
+    outbox_retention_hours: int = 24
+
+    # Dead letters: replay pacing (tasks sent per second) and rows replayed per request.
+    dead_letter_replay_per_sec: float = 2.0
+    dead_letter_replay_max: int = 500
+
+    # Per-task resource accounting (app.worker.profiling) and how long its rows are kept.
+    task_profiling_enabled: bool = True
+    job_resource_retention_days: int = 14
+
+    # Backpressure between ingestion and publishing: per-stage limits on backlog (rows
+    # waiting), lag (age of the oldest waiting row) and broker queue depth. Past a limit,
+    # scrapes and downloads slow down; past twice the limit they defer to the next run.
+    backpressure_media_max_backlog: int = 500
+    backpressure_publish_max_backlog: int = 200
+    backpressure_max_lag_sec: int = 3600
+    backpressure_queue_max_depth: int = 1000
+    backpressure_slow_delay_sec: float = 30.0
+    backpressure_cache_sec: int = 15
 
     # Scraping
     scraper_user_agent: str = "SalonGBPSystem/0.1"
+    # Minimum gap between requests to one site, shared by all scrapes in a worker process.
+    scraper_min_interval_sec: float = 2.0
 
     # Database connection pool
     db_pool_size: int = 5
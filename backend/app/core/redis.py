@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from functools import lru_cache
+
+import redis
+
+from app.core.config import get_settings
+
+
+@lru_cache
+def get_redis() -> redis.Redis:
+    """Process-wide Redis client (the connection pool is re-created after fork)."""
+    return redis.Redis.from_url(get_settings().redis_url, socket_timeout=5, socket_connect_timeout=5)
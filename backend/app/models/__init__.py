@@ -1,29 +1,37 @@
 from app.models.alert import Alert
+from app.models.dead_letter import DeadLetter
 from app.models.gbp_connection import GbpConnection
 from app.models.gbp_location import GbpLocation
 from app.models.gbp_media_upload import GbpMediaUpload
 from app.models.gbp_post import GbpPost
 from app.models.instagram_account import InstagramAccount
 from app.models.job_log import JobLog
+from app.models.job_resource_usage import JobResourceUsage
 from app.models.media_asset import MediaAsset
+from app.models.media_blob import MediaBlob
 from app.models.salon import Salon
 from app.models.scrape_seed import ScrapeSeeded
 from app.models.source_content import SourceContent
+from app.models.task_outbox import TaskOutbox
 from app.models.user import AppUser
 from app.models.user_salon import UserSalon
 
 __all__ = [
     "Alert",
     "AppUser",
+    "DeadLetter",
     "GbpConnection",
     "GbpLocation",
     "GbpMediaUpload",
     "GbpPost",
     "InstagramAccount",
     "JobLog",
+    "JobResourceUsage",
     "MediaAsset",
+    "MediaBlob",
     "Salon",
     "ScrapeSeeded",
     "SourceContent",
+    "TaskOutbox",
     "UserSalon",
 ]
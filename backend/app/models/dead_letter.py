@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import DateTime, Index, Integer, String, Text, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+from app.models.mixins import CreatedAtMixin, UUIDPrimaryKeyMixin
+
+
+class DeadLetter(Base, UUIDPrimaryKeyMixin, CreatedAtMixin):
+    """Celery task that failed for good, kept so it can be inspected and replayed.
+
+    See app.services.dead_letters.
+    """
+
+    __tablename__ = "dead_letters"
+    __table_args__ = (
+        Index("ix_dead_letters_task_name_created_at", "task_name", "created_at"),
+        Index("ix_dead_letters_unreplayed", "created_at", postgresql_where=text("replayed_at IS NULL")),
+    )
+
+    task_name: Mapped[str] = mapped_column(String(200), nullable=False)
+    task_id: Mapped[str | None] = mapped_column(String(200), nullable=True)
+    args: Mapped[list[Any]] = mapped_column(JSONB, nullable=False, server_default=text("'[]'::jsonb"))
+    kwargs: Mapped[dict[str, Any]] = mapped_column(JSONB, nullable=False, server_default=text("'{}'::jsonb"))
+
+    exception_type: Mapped[str] = mapped_column(String(200), nullable=False)
+    error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("1"))
+
+    replayed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    replay_count: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
@@ -8,10 +8,10 @@ from sqlalchemy.dialects.postgresql import UUID as PGUUID
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.base import Base
-from app.models.mixins import CreatedAtMixin, SalonScopedMixin, UUIDPrimaryKeyMixin
+from app.models.mixins import CreatedAtMixin, PublishLeaseMixin, PublishScheduleMixin, SalonScopedMixin, UUIDPrimaryKeyMixin
 
 
-class GbpMediaUpload(Base, UUIDPrimaryKeyMixin, CreatedAtMixin, SalonScopedMixin):
+class GbpMediaUpload(Base, UUIDPrimaryKeyMixin, CreatedAtMixin, SalonScopedMixin, PublishLeaseMixin, PublishScheduleMixin):
     __tablename__ = "gbp_media_uploads"
 
     source_content_id: Mapped[uuid.UUID] = mapped_column(
@@ -47,7 +47,7 @@ class GbpMediaUpload(Base, UUIDPrimaryKeyMixin, CreatedAtMixin, SalonScopedMixin
         nullable=False,
         server_default="pending",
         index=True,
-    )  # pending / queued / uploading / uploaded / failed / skipped
+    )  # pending / scheduled / queued / uploading / uploaded / failed / skipped
 
     error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
 
@@ -8,10 +8,10 @@ from sqlalchemy.dialects.postgresql import UUID as PGUUID
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.base import Base
-from app.models.mixins import CreatedAtMixin, SalonScopedMixin, UUIDPrimaryKeyMixin
+from app.models.mixins import CreatedAtMixin, PublishLeaseMixin, PublishScheduleMixin, SalonScopedMixin, UUIDPrimaryKeyMixin
 
 
-class GbpPost(Base, UUIDPrimaryKeyMixin, CreatedAtMixin, SalonScopedMixin):
+class GbpPost(Base, UUIDPrimaryKeyMixin, CreatedAtMixin, SalonScopedMixin, PublishLeaseMixin, PublishScheduleMixin):
     __tablename__ = "gbp_posts"
 
     source_content_id: Mapped[uuid.UUID] = mapped_column(
@@ -56,10 +56,15 @@ class GbpPost(Base, UUIDPrimaryKeyMixin, CreatedAtMixin, SalonScopedMixin):
         nullable=False,
         server_default="pending",
         index=True,
-    )  # pending / queued / posting / posted / failed / skipped
+    )  # pending / scheduled / queued / posting / posted / failed / skipped
 
     error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
 
+    # Idempotency marker for the last create attempt: content fingerprint and send time.
+    # A retry after an ambiguous failure looks for a remote post with this fingerprint first.
+    publish_attempt_key: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    publish_attempted_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
     posted_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
     edited_by: Mapped[uuid.UUID | None] = mapped_column(
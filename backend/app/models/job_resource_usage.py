@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import uuid
+
+from sqlalchemy import BigInteger, ForeignKey, Index, Integer, String
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+from app.models.mixins import CreatedAtMixin, OptionalSalonScopedMixin, UUIDPrimaryKeyMixin
+
+
+class JobResourceUsage(Base, UUIDPrimaryKeyMixin, CreatedAtMixin, OptionalSalonScopedMixin):
+    """Resources one task execution used for one salon (NULL: not attributed to a salon).
+
+    Written by app.worker.profiling; linked to the JobLog of tasks that keep one.
+    """
+
+    __tablename__ = "job_resource_usage"
+    __table_args__ = (Index("ix_job_resource_usage_task_name_created_at", "task_name", "created_at"),)
+
+    job_log_id: Mapped[uuid.UUID | None] = mapped_column(
+        PGUUID(as_uuid=True),
+        ForeignKey("job_logs.id", ondelete="CASCADE"),
+        nullable=True,
+        index=True,
+    )
+    task_name: Mapped[str] = mapped_column(String(200), nullable=False)
+    task_id: Mapped[str | None] = mapped_column(String(200), nullable=True)
+    status: Mapped[str] = mapped_column(String(20), nullable=False)  # SUCCESS / FAILURE / RETRY
+
+    wall_ms: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    cpu_ms: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    peak_rss_delta_kb: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    http_requests: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    http_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="0")
+    db_queries: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    db_time_ms: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
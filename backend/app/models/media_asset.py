@@ -1,6 +1,10 @@
 from __future__ import annotations
 
-from sqlalchemy import BigInteger, String, Text
+import uuid
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.base import Base
@@ -11,13 +15,27 @@ class MediaAsset(Base, UUIDPrimaryKeyMixin, CreatedAtMixin, SalonScopedMixin):
     __tablename__ = "media_assets"
 
     source_url: Mapped[str] = mapped_column(Text, nullable=False)
+    # sha256 of the normalized source URL; used to coalesce repeat downloads.
+    source_key: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
     content_type: Mapped[str | None] = mapped_column(String(100), nullable=True)
     sha256: Mapped[str | None] = mapped_column(String(64), nullable=True)
 
+    blob_id: Mapped[uuid.UUID | None] = mapped_column(
+        PGUUID(as_uuid=True),
+        ForeignKey("media_blobs.id", ondelete="SET NULL"),
+        nullable=True,
+        index=True,
+    )
+
     local_path: Mapped[str] = mapped_column(Text, nullable=False)
     public_url: Mapped[str] = mapped_column(Text, nullable=False)
 
     bytes: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
-    status: Mapped[str] = mapped_column(String(20), nullable=False, server_default="pending")
+    status: Mapped[str] = mapped_column(
+        String(20), nullable=False, server_default="pending"
+    )  # pending / downloading / available / failed / deleted
     error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
 
+    # Batch download bookkeeping (claim time of the current attempt, attempts so far).
+    claimed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    download_attempts: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from sqlalchemy import BigInteger, Integer, String, Text, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+from app.models.mixins import CreatedAtMixin, UUIDPrimaryKeyMixin
+
+
+class MediaBlob(Base, UUIDPrimaryKeyMixin, CreatedAtMixin):
+    """Content-addressed file shared by every MediaAsset with the same SHA-256."""
+
+    __tablename__ = "media_blobs"
+    __table_args__ = (
+        UniqueConstraint("sha256", name="uq_media_blobs_sha256"),
+    )
+
+    sha256: Mapped[str] = mapped_column(String(64), nullable=False)
+    content_type: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    bytes: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+    local_path: Mapped[str] = mapped_column(Text, nullable=False)
+    public_url: Mapped[str] = mapped_column(Text, nullable=False)
+
+    # Small JPEG preview for the dashboard; NULL for blobs stored before transcoding.
+    thumbnail_path: Mapped[str | None] = mapped_column(Text, nullable=True)
+    thumbnail_url: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    # 64-bit dHash of the original image (signed); see app.services.near_duplicates.
+    phash: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+
+    # Number of live (non-deleted) MediaAsset rows pointing at this blob.
+    ref_count: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
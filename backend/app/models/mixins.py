@@ -3,7 +3,7 @@ from __future__ import annotations
 import uuid
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, Text, func, text
+from sqlalchemy import DateTime, ForeignKey, Integer, String, Text, func, text
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -54,3 +54,19 @@ class OptionalSalonScopedMixin:
 class ErrorMessageMixin:
     error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
 
+
+class PublishLeaseMixin:
+    """Lease taken by the worker publishing the row; the reaper re-queues expired leases."""
+
+    lease_owner: Mapped[str | None] = mapped_column(String(200), nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Times the reaper took the row back from a lost worker.
+    reap_count: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
+
+
+class PublishScheduleMixin:
+    """Publish slot assigned on approval; ``scheduled`` rows are dispatched once it is due."""
+
+    scheduled_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Times a GBP 429 pushed the row back to a later slot.
+    rate_limit_count: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
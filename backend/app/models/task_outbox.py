@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import DateTime, Index, Integer, String, Text, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+from app.models.mixins import CreatedAtMixin, UUIDPrimaryKeyMixin
+
+
+class TaskOutbox(Base, UUIDPrimaryKeyMixin, CreatedAtMixin):
+    """Celery task to publish, written in the same transaction as the state change that needs it.
+
+    See app.services.outbox for the relay.
+    """
+
+    __tablename__ = "task_outbox"
+    __table_args__ = (
+        Index("ix_task_outbox_unsent", "created_at", postgresql_where=text("sent_at IS NULL")),
+    )
+
+    task_name: Mapped[str] = mapped_column(String(200), nullable=False)
+    args: Mapped[list[Any]] = mapped_column(JSONB, nullable=False, server_default=text("'[]'::jsonb"))
+
+    sent_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import uuid
+from typing import Literal
+
+from pydantic import BaseModel, Field, model_validator
+
+from app.schemas.enums import PostStatus, UploadStatus
+
+BulkAction = Literal["approve", "retry", "skip"]
+
+BULK_MAX_ITEMS = 500
+
+
+class BulkActionRequest(BaseModel):
+    """Apply ``action`` to the listed ``ids``, or to every item in ``status`` (up to ``BULK_MAX_ITEMS``)."""
+
+    action: BulkAction
+    ids: list[uuid.UUID] = Field(default_factory=list, max_length=BULK_MAX_ITEMS)
+    status: str | None = None
+
+    @model_validator(mode="after")
+    def _ids_or_filter(self) -> BulkActionRequest:
+        if bool(self.ids) == (self.status is not None):
+            raise ValueError("Provide either ids or status")
+        return self
+
+
+class BulkPostActionRequest(BulkActionRequest):
+    status: PostStatus | None = None
+
+
+class BulkUploadActionRequest(BulkActionRequest):
+    status: UploadStatus | None = None
+
+
+class BulkActionItemResult(BaseModel):
+    id: uuid.UUID
+    ok: bool
+    status: PostStatus | UploadStatus | None = None
+    error: str | None = None
+
+
+class BulkActionResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: list[BulkActionItemResult]
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+from typing import Any
+
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+DEAD_LETTER_REPLAY_MAX_IDS = 500
+
+
+class DeadLetterResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: uuid.UUID
+    task_name: str
+    task_id: str | None = None
+    args: list[Any]
+    kwargs: dict[str, Any]
+    exception_type: str
+    error_message: str | None = None
+    attempts: int
+    replayed_at: datetime | None = None
+    replay_count: int
+    created_at: datetime
+
+
+class DeadLetterReplayRequest(BaseModel):
+    """Replay the listed ``ids``, or every unreplayed letter matching the filters."""
+
+    ids: list[uuid.UUID] = Field(default_factory=list, max_length=DEAD_LETTER_REPLAY_MAX_IDS)
+    task_name: str | None = None
+    exception_type: str | None = None
+    since: datetime | None = None
+
+    @model_validator(mode="after")
+    def _ids_or_filter(self) -> DeadLetterReplayRequest:
+        has_filter = any(v is not None for v in (self.task_name, self.exception_type, self.since))
+        if bool(self.ids) == has_filter:
+            raise ValueError("Provide either ids or a filter")
+        return self
+
+
+class DeadLetterReplayResponse(BaseModel):
+    matched: int
+    sent: int
+    rescheduled: int
+    skipped: int
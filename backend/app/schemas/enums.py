@@ -2,8 +2,8 @@ from __future__ import annotations
 
 from typing import Literal
 
-PostStatus = Literal["pending", "queued", "posting", "posted", "failed", "skipped"]
-UploadStatus = Literal["pending", "queued", "uploading", "uploaded", "failed", "skipped"]
+PostStatus = Literal["pending", "scheduled", "queued", "posting", "posted", "failed", "skipped"]
+UploadStatus = Literal["pending", "scheduled", "queued", "uploading", "uploaded", "failed", "skipped"]
 AlertStatus = Literal["open", "acked"]
 AlertSeverity = Literal["info", "warning", "critical"]
 ConnectionStatus = Literal["active", "expired", "revoked"]
@@ -18,4 +18,22 @@ class JobLogResponse(BaseModel):
     error_message: str | None = None
     started_at: datetime
     completed_at: datetime | None = None
+    resources: JobResourceTotals | None = None
 
+
+class JobResourceTotals(BaseModel):
+    """Resources used by task executions, summed (peak RSS growth: the largest one)."""
+
+    runs: int
+    wall_ms: int
+    cpu_ms: int
+    peak_rss_delta_kb: int
+    http_requests: int
+    http_bytes: int
+    db_queries: int
+    db_time_ms: int
+
+
+class JobResourceAggregate(JobResourceTotals):
+    key: str  # task name, or salon id ("" when not attributed to a salon)
+    wall_ms_avg: int
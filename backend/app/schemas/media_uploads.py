@@ -20,8 +20,11 @@ class MediaUploadListItem(BaseModel):
     category: str
     status: UploadStatus
     source_image_url: str
+    # Locally generated preview once the media has been downloaded.
+    thumbnail_url: str | None = None
     error_message: str | None = None
     created_at: datetime
+    scheduled_at: datetime | None = None
     uploaded_at: datetime | None = None
 
 
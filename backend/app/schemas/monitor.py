@@ -15,3 +15,10 @@ class SalonMonitorItem(BaseModel):
     gbp_connection_status: str  # none / active / expired / revoked
     active_locations: int
 
+
+class PipelineStageStatus(BaseModel):
+    stage: str  # media / publish
+    state: str  # ok / slow / stop
+    backlog: int
+    lag_sec: int
+    queue_depth: int | None = None  # None when the broker could not be read
@@ -22,6 +22,7 @@ class PostListItem(BaseModel):
     image_asset_id: uuid.UUID | None = None
     error_message: str | None = None
     created_at: datetime
+    scheduled_at: datetime | None = None
     posted_at: datetime | None = None
 
 
@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import re
-import time
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from urllib.parse import urljoin, urlsplit, urlunsplit
@@ -60,7 +59,6 @@ def fetch_blog_links(*, blog_url: str, max_pages: int = 2) -> list[str]:
             page_url = blog_url
         else:
             page_url = blog_url.rstrip("/") + f"/PN{page_num}.html"
-            time.sleep(2)
 
         try:
             html = get(page_url, timeout=20).text
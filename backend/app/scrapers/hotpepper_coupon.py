@@ -4,7 +4,6 @@ import hashlib
 import json
 import logging
 import re
-import time
 from dataclasses import dataclass
 from urllib.parse import urljoin
 
@@ -73,7 +72,6 @@ def fetch_coupons(*, coupon_url: str, max_pages: int = 20) -> list[CouponItem]:
             soup = first_soup
         else:
             page_url = coupon_url.rstrip("/") + f"/PN{page_num}.html"
-            time.sleep(2)
             try:
                 html = get(page_url, timeout=20).text
             except httpx.HTTPError:
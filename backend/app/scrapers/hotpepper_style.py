@@ -2,7 +2,6 @@ from __future__ import annotations
 
 import logging
 import re
-import time
 from dataclasses import dataclass
 from urllib.parse import urljoin, urlsplit, urlunsplit
 
@@ -107,7 +106,6 @@ def fetch_style_images(*, style_url: str, max_pages: int = 160) -> list[StyleIma
     )
 
     for page_num in range(2, pages_to_fetch + 1):
-        time.sleep(2)
         page_url = style_url.rstrip("/") + f"/PN{page_num}.html"
         try:
             html = get(page_url, timeout=20).text
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import logging
 import random
+import threading
 import time
 from dataclasses import dataclass
 from urllib.parse import urlsplit
@@ -20,9 +21,20 @@ class _RobotsCacheEntry:
     fetched_at: float
 
 
+# Shared by every task thread in the process (thread-pool workers). Each origin's
+# robots.txt is fetched under that origin's lock, so it is fetched once rather than
+# once per concurrent scrape, and a slow site does not hold up the others.
+# _robots_lock only guards the two dicts.
 _robots_cache: dict[str, _RobotsCacheEntry] = {}
+_robots_origin_locks: dict[str, threading.Lock] = {}
+_robots_lock = threading.Lock()
 _ROBOTS_TTL_SEC = 24 * 60 * 60
 
+# Earliest monotonic time the next request to each origin may start. Pacing is per
+# process rather than per task, so concurrent scrapes of one site stay polite.
+_next_request_at: dict[str, float] = {}
+_pace_lock = threading.Lock()
+
 _DEFAULT_MAX_RETRIES = 3
 _DEFAULT_BACKOFF_BASE = 5  # seconds
 
@@ -59,17 +71,43 @@ def _load_robots(origin: str) -> RobotFileParser:
     return rp
 
 
+def _fresh_robots(origin: str) -> _RobotsCacheEntry | None:
+    with _robots_lock:
+        entry = _robots_cache.get(origin)
+    if entry is None or (time.time() - entry.fetched_at) > _ROBOTS_TTL_SEC:
+        return None
+    return entry
+
+
 def can_fetch(url: str) -> bool:
     origin = _origin(url)
-    entry = _robots_cache.get(origin)
-    now = time.time()
-    if entry is None or (now - entry.fetched_at) > _ROBOTS_TTL_SEC:
-        rp = _load_robots(origin)
-        entry = _RobotsCacheEntry(rp=rp, fetched_at=now)
-        _robots_cache[origin] = entry
+    entry = _fresh_robots(origin)
+    if entry is None:
+        with _robots_lock:
+            origin_lock = _robots_origin_locks.setdefault(origin, threading.Lock())
+        with origin_lock:
+            # Another thread may have fetched it while we waited.
+            entry = _fresh_robots(origin)
+            if entry is None:
+                entry = _RobotsCacheEntry(rp=_load_robots(origin), fetched_at=time.time())
+                with _robots_lock:
+                    _robots_cache[origin] = entry
     return entry.rp.can_fetch(_get_user_agent(), url)
 
 
+def _pace(origin: str) -> None:
+    """Wait for this origin's next request slot (``scraper_min_interval_sec`` apart)."""
+    interval = get_settings().scraper_min_interval_sec
+    if interval <= 0:
+        return
+    with _pace_lock:
+        now = time.monotonic()
+        start = max(now, _next_request_at.get(origin, now))
+        _next_request_at[origin] = start + interval
+    if start > now:
+        time.sleep(start - now)
+
+
 def _is_retryable(exc: Exception) -> bool:
     """Determine if an exception is worth retrying."""
     if isinstance(exc, (httpx.TimeoutException, httpx.ConnectError)):
@@ -89,6 +127,7 @@ def get(
         raise ValueError(f"max_retries must be >= 1, got {max_retries}")
     if not can_fetch(url):
         raise RuntimeError(f"Blocked by robots.txt: {url}")
+    _pace(_origin(url))
     headers = {"User-Agent": _get_user_agent()}
     last_exc: httpx.HTTPError | None = None
     with httpx.Client(timeout=timeout, follow_redirects=True, headers=headers) as client:
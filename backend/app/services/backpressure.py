@@ -0,0 +1,181 @@
+"""Backpressure between ingestion (scrapes) and the media / publish pipelines.
+
+Each stage is measured by its backlog (rows waiting in the DB), lag (age of the oldest
+waiting row) and broker queue depth (the Redis lists of its queue, over all priority
+levels):
+
+- ``media``: pending assets and the ``media`` queue;
+- ``publish``: queued posts/uploads whose slot has come, and the ``publish`` queue.
+
+A stage past any of its limits is ``slow``; past twice a limit it is ``stop``. The
+worker consults the snapshot before fanning out: scrapes pause between salons while
+either stage is slow and leave the remaining salons to the next run once one stops,
+download kicks are dropped while media is backed up (the 5-minute sweeper picks the
+assets up), and the download sweeper shrinks or skips its batch while publishing is
+behind. Snapshots are cached in Redis for ``BACKPRESSURE_CACHE_SEC``.
+"""
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+
+import redis
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.redis import get_redis
+from app.models.gbp_media_upload import GbpMediaUpload
+from app.models.gbp_post import GbpPost
+from app.models.media_asset import MediaAsset
+from app.worker.celery_app import QUEUE_MEDIA, QUEUE_PUBLISH, celery_app
+
+logger = logging.getLogger(__name__)
+
+STAGE_MEDIA = "media"
+STAGE_PUBLISH = "publish"
+
+STATE_OK = "ok"
+STATE_SLOW = "slow"
+STATE_STOP = "stop"
+_STATES = (STATE_OK, STATE_SLOW, STATE_STOP)
+
+# A stage stops admitting work at this multiple of its limits.
+_STOP_FACTOR = 2
+
+_CACHE_KEY = "pipeline:pressure"
+
+
+@dataclass(frozen=True)
+class StageStatus:
+    stage: str
+    state: str
+    backlog: int
+    lag_sec: int
+    # None when Redis could not be read.
+    queue_depth: int | None
+
+
+def _now() -> datetime:
+    return datetime.now(tz=timezone.utc)
+
+
+def _lag(oldest: datetime | None, now: datetime) -> int:
+    if oldest is None:
+        return 0
+    if oldest.tzinfo is None:
+        oldest = oldest.replace(tzinfo=timezone.utc)
+    return max(0, int((now - oldest).total_seconds()))
+
+
+def queue_depth(r: redis.Redis, queue: str) -> int:
+    """Messages waiting in ``queue``; the Redis transport keeps one list per priority level."""
+    opts = celery_app.conf.broker_transport_options or {}
+    sep = opts.get("sep", ":")
+    keys = [f"{queue}{sep}{p}" if p else queue for p in opts.get("priority_steps") or [0]]
+    pipe = r.pipeline(transaction=False)
+    for key in keys:
+        pipe.llen(key)
+    return sum(int(n or 0) for n in pipe.execute())
+
+
+def _state(*ratios: float) -> str:
+    worst = max(ratios, default=0.0)
+    if worst > _STOP_FACTOR:
+        return STATE_STOP
+    if worst > 1:
+        return STATE_SLOW
+    return STATE_OK
+
+
+def _ratio(value: int | None, limit: int) -> float:
+    return value / limit if value is not None and limit > 0 else 0.0
+
+
+def _stage(stage: str, *, backlog: int, max_backlog: int, lag_sec: int, depth: int | None) -> StageStatus:
+    settings = get_settings()
+    state = _state(
+        _ratio(backlog, max_backlog),
+        _ratio(lag_sec, settings.backpressure_max_lag_sec),
+        _ratio(depth, settings.backpressure_queue_max_depth),
+    )
+    return StageStatus(stage=stage, state=state, backlog=backlog, lag_sec=lag_sec, queue_depth=depth)
+
+
+def measure_pipeline(db: Session) -> dict[str, StageStatus]:
+    """Fresh snapshot of every stage (DB counts plus broker queue depths)."""
+    settings = get_settings()
+    now = _now()
+    depths: dict[str, int | None] = {}
+    try:
+        r = get_redis()
+        for queue in (QUEUE_MEDIA, QUEUE_PUBLISH):
+            depths[queue] = queue_depth(r, queue)
+    except redis.RedisError:
+        logger.warning("Backpressure: broker queue depth unavailable", exc_info=True)
+
+    media_backlog, media_oldest = db.execute(
+        select(func.count(), func.min(MediaAsset.created_at)).where(MediaAsset.status == "pending")
+    ).one()
+
+    publish_backlog = 0
+    publish_lag = 0
+    for model in (GbpPost, GbpMediaUpload):
+        due = func.coalesce(model.scheduled_at, model.created_at)
+        count, oldest = db.execute(
+            select(func.count(), func.min(due)).where(model.status == "queued", due <= now)
+        ).one()
+        publish_backlog += count
+        publish_lag = max(publish_lag, _lag(oldest, now))
+
+    return {
+        STAGE_MEDIA: _stage(
+            STAGE_MEDIA,
+            backlog=media_backlog,
+            max_backlog=settings.backpressure_media_max_backlog,
+            lag_sec=_lag(media_oldest, now),
+            depth=depths.get(QUEUE_MEDIA),
+        ),
+        STAGE_PUBLISH: _stage(
+            STAGE_PUBLISH,
+            backlog=publish_backlog,
+            max_backlog=settings.backpressure_publish_max_backlog,
+            lag_sec=publish_lag,
+            depth=depths.get(QUEUE_PUBLISH),
+        ),
+    }
+
+
+def pipeline_pressure(db: Session, *, refresh: bool = False) -> dict[str, StageStatus]:
+    """The cached snapshot, measured again when older than ``BACKPRESSURE_CACHE_SEC``."""
+    if not refresh:
+        try:
+            raw = get_redis().get(_CACHE_KEY)
+        except redis.RedisError:
+            raw = None
+        if raw:
+            try:
+                return {k: StageStatus(**v) for k, v in json.loads(raw).items()}
+            except (TypeError, ValueError):
+                pass
+    snapshot = measure_pipeline(db)
+    try:
+        get_redis().set(
+            _CACHE_KEY,
+            json.dumps({k: asdict(v) for k, v in snapshot.items()}),
+            ex=get_settings().backpressure_cache_sec,
+        )
+    except redis.RedisError:
+        pass
+    pressured = {k: v.state for k, v in snapshot.items() if v.state != STATE_OK}
+    if pressured:
+        logger.warning("Backpressure: %s", pressured)
+    return snapshot
+
+
+def admission(db: Session, *stages: str) -> str:
+    """Worst state among ``stages`` (``ok`` / ``slow`` / ``stop``)."""
+    snapshot = pipeline_pressure(db)
+    return max((snapshot[s].state for s in stages), key=_STATES.index, default=STATE_OK)
@@ -0,0 +1,113 @@
+"""Set-based approve / retry / skip for review queues (GBP posts and media uploads).
+
+One SELECT loads the candidates for per-item validation, one ``UPDATE ... RETURNING``
+guarded by the allowed source statuses performs the transition (rows changed
+concurrently simply do not come back), and approved / retried rows are given their
+publish slots (staging the tasks due now in the outbox) within the same transaction.
+"""
+from __future__ import annotations
+
+import uuid
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.schemas.bulk import BULK_MAX_ITEMS, BulkAction, BulkActionItemResult, BulkActionResponse
+from app.services.publish_schedule import schedule_publish
+
+
+@dataclass(frozen=True)
+class _Transition:
+    to_status: str
+    # Exactly one of: the statuses the action applies to, or the statuses it refuses.
+    from_statuses: tuple[str, ...] = ()
+    blocked_statuses: tuple[str, ...] = ()
+    enqueue: bool = False
+
+
+def _transitions(done_status: str) -> dict[str, _Transition]:
+    return {
+        "approve": _Transition("queued", from_statuses=("pending",), enqueue=True),
+        "retry": _Transition("queued", from_statuses=("failed",), enqueue=True),
+        "skip": _Transition("skipped", blocked_statuses=(done_status,)),
+    }
+
+
+def bulk_transition(
+    db: Session,
+    model: Any,
+    *,
+    salon_id: uuid.UUID,
+    action: BulkAction,
+    ids: list[uuid.UUID],
+    status_filter: str | None,
+    done_status: str,
+    errors: dict[str, str],
+    validate: Callable[[Any], str | None] | None = None,
+) -> BulkActionResponse:
+    """Transition many rows of ``model`` in one statement and schedule the approved / retried ones.
+
+    ``errors`` maps ``not_found`` / ``approve`` / ``retry`` / ``skip`` to the per-item
+    messages the single-item endpoints use; ``validate`` returns an error for rows
+    that must not be queued.
+    """
+    t = _transitions(done_status)[action]
+    q = select(model).where(model.salon_id == salon_id)
+    if ids:
+        q = q.where(model.id.in_(ids))
+    else:
+        q = q.where(model.status == status_filter).order_by(model.created_at).limit(BULK_MAX_ITEMS)
+    rows = {row.id: row for row in db.execute(q).scalars()}
+    targets = ids or list(rows)
+
+    results: dict[uuid.UUID, BulkActionItemResult] = {}
+    eligible: list[uuid.UUID] = []
+    for row_id in dict.fromkeys(targets):
+        row = rows.get(row_id)
+        if row is None:
+            results[row_id] = BulkActionItemResult(id=row_id, ok=False, error=errors["not_found"])
+            continue
+        allowed = row.status in t.from_statuses if t.from_statuses else row.status not in t.blocked_statuses
+        error = None if allowed else errors[action]
+        if error is None and t.enqueue and validate is not None:
+            error = validate(row)
+        if error is not None:
+            results[row_id] = BulkActionItemResult(id=row_id, ok=False, status=row.status, error=error)
+            continue
+        eligible.append(row_id)
+
+    changed: list[uuid.UUID] = []
+    statuses: dict[uuid.UUID, str] = {}
+    if eligible:
+        stmt = update(model).where(model.id.in_(eligible))
+        if t.from_statuses:
+            stmt = stmt.where(model.status.in_(t.from_statuses))
+        else:
+            stmt = stmt.where(model.status.notin_(t.blocked_statuses))
+        values: dict[str, Any] = {"status": t.to_status}
+        if t.enqueue:
+            values["error_message"] = None
+            values["reap_count"] = 0
+            values["rate_limit_count"] = 0
+        stmt = stmt.values(**values).returning(model.id).execution_options(synchronize_session=False)
+        changed = list(db.execute(stmt).scalars())
+        if t.enqueue and changed:
+            queued = db.execute(
+                select(model).where(model.id.in_(changed)).execution_options(populate_existing=True)
+            ).scalars().all()
+            statuses = schedule_publish(db, queued)
+        db.commit()
+    changed_set = set(changed)
+    for row_id in eligible:
+        if row_id in changed_set:
+            results[row_id] = BulkActionItemResult(id=row_id, ok=True, status=statuses.get(row_id, t.to_status))
+        else:
+            # Its status changed between the SELECT and the UPDATE.
+            results[row_id] = BulkActionItemResult(id=row_id, ok=False, error=errors[action])
+
+    ordered = [results[row_id] for row_id in dict.fromkeys(targets)]
+    succeeded = sum(r.ok for r in ordered)
+    return BulkActionResponse(succeeded=succeeded, failed=len(ordered) - succeeded, results=ordered)
@@ -0,0 +1,169 @@
+"""Dead-letter store for Celery tasks that failed for good.
+
+The worker's ``task_failure`` hook records every task that raised out of its last
+attempt (retries exhausted, or an error the task does not handle itself) with its
+name, arguments, exception class and attempt count, so failures that used to exist
+only in the logs can be listed and replayed after an outage. The publish tasks catch
+their errors and fail the row instead of raising, so they record those letters
+themselves.
+
+Replay re-sends the letters as one Celery group whose members are staggered by
+``DEAD_LETTER_REPLAY_PER_SEC`` so a few hundred replays do not hit HotPepper or Google
+at once. Publish tasks are not re-sent directly: their row is already ``failed`` and
+the task only claims ``queued`` rows, so the row is moved back through the retry
+path instead (per-location publish slots and the outbox).
+"""
+from __future__ import annotations
+
+import json
+import logging
+import uuid
+from collections import defaultdict
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any
+
+from celery import group
+from sqlalchemy import Select, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.models.dead_letter import DeadLetter
+from app.models.gbp_media_upload import GbpMediaUpload
+from app.models.gbp_post import GbpPost
+from app.services.outbox import GBP_MEDIA_TASK, GBP_POST_TASK
+from app.services.publish_schedule import schedule_publish
+from app.worker.celery_app import celery_app
+
+logger = logging.getLogger(__name__)
+
+_PUBLISH_MODELS: dict[str, Any] = {GBP_POST_TASK: GbpPost, GBP_MEDIA_TASK: GbpMediaUpload}
+
+
+@dataclass(frozen=True)
+class ReplayResult:
+    sent: int
+    rescheduled: int
+    skipped: int
+
+
+def _now() -> datetime:
+    return datetime.now(tz=timezone.utc)
+
+
+def _jsonable(value: Any) -> Any:
+    return json.loads(json.dumps(value, default=str))
+
+
+def record_dead_letter(
+    db: Session,
+    *,
+    task_name: str,
+    task_id: str | None,
+    args: Sequence[Any] | None,
+    kwargs: dict[str, Any] | None,
+    exc: BaseException,
+    attempts: int,
+) -> DeadLetter:
+    """Store a permanently failed task; commits."""
+    letter = DeadLetter(
+        id=uuid.uuid4(),
+        task_name=task_name,
+        task_id=task_id,
+        args=_jsonable(list(args or [])),
+        kwargs=_jsonable(dict(kwargs or {})),
+        exception_type=f"{type(exc).__module__}.{type(exc).__qualname__}",
+        error_message=str(exc)[:2000] or None,
+        attempts=attempts,
+    )
+    db.add(letter)
+    db.commit()
+    return letter
+
+
+def dead_letter_query(
+    *,
+    task_name: str | None = None,
+    exception_type: str | None = None,
+    since: datetime | None = None,
+    replayed: bool | None = False,
+) -> Select[tuple[DeadLetter]]:
+    """Letters matching the filters, newest first. ``replayed=None`` includes both."""
+    q = select(DeadLetter).order_by(DeadLetter.created_at.desc(), DeadLetter.id)
+    if task_name:
+        q = q.where(DeadLetter.task_name == task_name)
+    if exception_type:
+        q = q.where(DeadLetter.exception_type == exception_type)
+    if since is not None:
+        q = q.where(DeadLetter.created_at >= since)
+    if replayed is not None:
+        q = q.where(DeadLetter.replayed_at.is_not(None) if replayed else DeadLetter.replayed_at.is_(None))
+    return q
+
+
+def _reschedule_failed(db: Session, model: Any, ids: list[uuid.UUID]) -> int:
+    changed = list(
+        db.execute(
+            update(model)
+            .where(model.id.in_(ids), model.status == "failed")
+            .values(status="queued", error_message=None, reap_count=0, rate_limit_count=0)
+            .returning(model.id)
+            .execution_options(synchronize_session=False)
+        ).scalars()
+    )
+    if changed:
+        rows = db.execute(
+            select(model).where(model.id.in_(changed)).execution_options(populate_existing=True)
+        ).scalars().all()
+        schedule_publish(db, rows)
+    return len(changed)
+
+
+def replay_dead_letters(db: Session, letters: Sequence[DeadLetter]) -> ReplayResult:
+    """Replay ``letters`` and mark them replayed; commits.
+
+    The group is sent before the commit, so a crash in between replays the letters
+    again on the next call (at-least-once, as with the outbox).
+    """
+    publish: dict[Any, list[uuid.UUID]] = defaultdict(list)
+    direct: list[DeadLetter] = []
+    skipped = 0
+    for letter in letters:
+        model = _PUBLISH_MODELS.get(letter.task_name)
+        if model is None:
+            direct.append(letter)
+            continue
+        try:
+            publish[model].append(uuid.UUID(str(letter.args[0])))
+        except (IndexError, ValueError):
+            skipped += 1
+
+    rescheduled = 0
+    for model, ids in publish.items():
+        count = _reschedule_failed(db, model, ids)
+        rescheduled += count
+        # Rows already retried, skipped or published since the failure.
+        skipped += len(ids) - count
+
+    now = _now()
+    for letter in letters:
+        letter.replayed_at = now
+        letter.replay_count += 1
+        db.add(letter)
+
+    if direct:
+        per_sec = get_settings().dead_letter_replay_per_sec
+        interval = 1.0 / per_sec if per_sec > 0 else 0.0
+        group(
+            celery_app.signature(letter.task_name, args=letter.args, kwargs=letter.kwargs).set(
+                countdown=round(i * interval, 3)
+            )
+            for i, letter in enumerate(direct)
+        ).apply_async()
+    db.commit()
+    logger.info(
+        "Replayed %d dead letters: sent=%d rescheduled=%d skipped=%d",
+        len(letters), len(direct), rescheduled, skipped,
+    )
+    return ReplayResult(sent=len(direct), rescheduled=rescheduled, skipped=skipped)
@@ -1,12 +1,24 @@
+"""Google Business Profile API client.
+
+One :class:`GbpApiClient` per process keeps a pooled (HTTP/2) connection to the
+Google APIs, so publishes no longer pay a TLS handshake each. Callers get it from
+:func:`get_client`; tests swap it with :func:`set_client`. The module-level
+functions are thin wrappers around the process client.
+"""
 from __future__ import annotations
 
 import logging
+import os
+import threading
+import time
+from collections.abc import Callable, Iterable
 from dataclasses import dataclass
 from datetime import date
 from typing import Any
 
 import httpx
 
+from app.core.config import get_settings
 from app.scrapers.text_transform import sanitize_event_title
 
 logger = logging.getLogger(__name__)
@@ -15,9 +27,13 @@ logger = logging.getLogger(__name__)
 GBP_BASE_V4 = "https://mybusiness.googleapis.com/v4"
 GBP_ACCOUNT_MGMT = "https://mybusinessaccountmanagement.googleapis.com/v1"
 GBP_BUSINESS_INFO = "https://mybusinessbusinessinformation.googleapis.com/v1"
+GBP_UPLOAD_V1 = "https://mybusiness.googleapis.com/upload/v1/media"
 
 _MAX_PAGES = 50  # Safety limit to prevent infinite pagination loops
 
+# (operation, HTTP status or None on a transport error, elapsed seconds)
+RequestHook = Callable[[str, int | None, float], None]
+
 
 @dataclass(frozen=True)
 class GbpLocationInfo:
@@ -30,151 +46,328 @@ def _auth_headers(access_token: str) -> dict[str, str]:
     return {"Authorization": f"Bearer {access_token}"}
 
 
-def _paginated_get(
-    client: httpx.Client,
-    url: str,
-    *,
-    headers: dict[str, str],
-    params: dict[str, Any] | None = None,
-    page_size: int,
-    items_key: str,
-) -> list[dict[str, Any]]:
-    """Fetch all pages from a Google API endpoint using cursor-based pagination."""
-    all_items: list[dict[str, Any]] = []
-    req_params: dict[str, Any] = dict(params or {})
-    req_params["pageSize"] = page_size
-    for _ in range(_MAX_PAGES):
-        r = client.get(url, headers=headers, params=req_params)
-        r.raise_for_status()
-        data: dict[str, Any] = r.json()
-        all_items.extend(data.get(items_key) or [])
-        next_token = data.get("nextPageToken")
-        if not next_token:
-            break
-        req_params["pageToken"] = next_token
-    else:
-        logger.warning("Pagination stopped at %d-page safety limit for %s", _MAX_PAGES, url)
-    return all_items
+def _date_to_gbp(d: date) -> dict[str, int]:
+    return {"year": d.year, "month": d.month, "day": d.day}
 
 
-def list_accounts(*, access_token: str) -> list[str]:
-    """List GBP accounts using the Account Management API v1."""
-    url = f"{GBP_ACCOUNT_MGMT}/accounts"
-    with httpx.Client(timeout=20) as client:
-        accounts = _paginated_get(
-            client, url,
+def _log_request(operation: str, status: int | None, elapsed: float) -> None:
+    logger.debug("gbp_api op=%s status=%s elapsed_ms=%.1f", operation, status, elapsed * 1000)
+
+
+def _build_http_client() -> httpx.Client:
+    settings = get_settings()
+    return httpx.Client(
+        http2=settings.gbp_http2,
+        timeout=httpx.Timeout(settings.gbp_http_timeout_sec, connect=settings.gbp_http_connect_timeout_sec),
+        limits=httpx.Limits(
+            max_connections=settings.gbp_http_max_connections,
+            max_keepalive_connections=settings.gbp_http_max_keepalive,
+            keepalive_expiry=settings.gbp_http_keepalive_expiry_sec,
+        ),
+    )
+
+
+class GbpApiClient:
+    """GBP API calls over one long-lived, pooled ``httpx.Client``.
+
+    ``on_request`` is called after every request with the operation name, status
+    code and latency; by default it logs at DEBUG.
+    """
+
+    def __init__(self, http: httpx.Client | None = None, *, on_request: RequestHook | None = None) -> None:
+        self.http = http if http is not None else _build_http_client()
+        self.on_request = on_request or _log_request
+
+    def close(self) -> None:
+        self.http.close()
+
+    def _request(self, operation: str, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        started = time.perf_counter()
+        status: int | None = None
+        try:
+            r = self.http.request(method, url, **kwargs)
+            status = r.status_code
+            r.raise_for_status()
+            return r
+        finally:
+            try:
+                self.on_request(operation, status, time.perf_counter() - started)
+            except Exception:
+                logger.exception("gbp_api request hook failed")
+
+    def _paginated_get(
+        self,
+        operation: str,
+        url: str,
+        *,
+        headers: dict[str, str],
+        params: dict[str, Any] | None = None,
+        page_size: int,
+        items_key: str,
+    ) -> list[dict[str, Any]]:
+        """Fetch all pages from a Google API endpoint using cursor-based pagination."""
+        all_items: list[dict[str, Any]] = []
+        req_params: dict[str, Any] = dict(params or {})
+        req_params["pageSize"] = page_size
+        for _ in range(_MAX_PAGES):
+            r = self._request(operation, "GET", url, headers=headers, params=req_params)
+            data: dict[str, Any] = r.json()
+            all_items.extend(data.get(items_key) or [])
+            next_token = data.get("nextPageToken")
+            if not next_token:
+                break
+            req_params["pageToken"] = next_token
+        else:
+            logger.warning("Pagination stopped at %d-page safety limit for %s", _MAX_PAGES, url)
+        return all_items
+
+    def list_accounts(self, *, access_token: str) -> list[str]:
+        """List GBP accounts using the Account Management API v1."""
+        accounts = self._paginated_get(
+            "list_accounts",
+            f"{GBP_ACCOUNT_MGMT}/accounts",
             headers=_auth_headers(access_token),
             page_size=20,
             items_key="accounts",
         )
-    out: list[str] = []
-    for a in accounts:
-        name = str(a.get("name") or "")
-        if name.startswith("accounts/"):
-            out.append(name.split("/", 1)[1])
-        elif name:
-            out.append(name)
-    return out
+        out: list[str] = []
+        for a in accounts:
+            name = str(a.get("name") or "")
+            if name.startswith("accounts/"):
+                out.append(name.split("/", 1)[1])
+            elif name:
+                out.append(name)
+        return out
 
-
-def list_locations(*, access_token: str, account_id: str) -> list[GbpLocationInfo]:
-    """List locations using the Business Information API v1."""
-    url = f"{GBP_BUSINESS_INFO}/accounts/{account_id}/locations"
-    params = {"readMask": "name,title,storeCode"}
-    with httpx.Client(timeout=30) as client:
-        locations = _paginated_get(
-            client, url,
+    def list_locations(self, *, access_token: str, account_id: str) -> list[GbpLocationInfo]:
+        """List locations using the Business Information API v1."""
+        locations = self._paginated_get(
+            "list_locations",
+            f"{GBP_BUSINESS_INFO}/accounts/{account_id}/locations",
             headers=_auth_headers(access_token),
-            params=params,
+            params={"readMask": "name,title,storeCode"},
             page_size=100,
             items_key="locations",
         )
-    out: list[GbpLocationInfo] = []
-    for loc in locations:
-        name = str(loc.get("name") or "")
-        location_id = ""
-        if "locations/" in name:
-            location_id = name.rsplit("locations/", 1)[1].lstrip("/")
-        if not location_id:
-            location_id = str(loc.get("locationId") or name)
-        location_name = loc.get("title") or loc.get("storeCode")
-        out.append(GbpLocationInfo(account_id=account_id, location_id=location_id, location_name=location_name))
-    return out
+        out: list[GbpLocationInfo] = []
+        for loc in locations:
+            name = str(loc.get("name") or "")
+            location_id = ""
+            if "locations/" in name:
+                location_id = name.rsplit("locations/", 1)[1].lstrip("/")
+            if not location_id:
+                location_id = str(loc.get("locationId") or name)
+            location_name = loc.get("title") or loc.get("storeCode")
+            out.append(GbpLocationInfo(account_id=account_id, location_id=location_id, location_name=location_name))
+        return out
 
+    def create_local_post(
+        self,
+        *,
+        access_token: str,
+        account_id: str,
+        location_id: str,
+        summary: str,
+        image_url: str | None,
+        cta_type: str | None,
+        cta_url: str | None,
+        topic_type: str,
+        offer_redeem_online_url: str | None = None,
+        event_title: str | None = None,
+        event_start_date: date | None = None,
+        event_end_date: date | None = None,
+    ) -> dict[str, Any]:
+        url = f"{GBP_BASE_V4}/accounts/{account_id}/locations/{location_id}/localPosts"
+        body: dict[str, Any] = {
+            "languageCode": "ja",
+            "summary": summary,
+            "topicType": topic_type,
+        }
+        if image_url:
+            body["media"] = [{"mediaFormat": "PHOTO", "sourceUrl": image_url}]
+        if cta_type and cta_url:
+            body["callToAction"] = {"actionType": cta_type, "url": cta_url}
+        if topic_type == "OFFER":
+            if event_title:
+                event_title = sanitize_event_title(event_title)
+            event_fields = (event_title, event_start_date, event_end_date)
+            if all(event_fields):
+                body["event"] = {
+                    "title": event_title,
+                    "schedule": {
+                        "startDate": _date_to_gbp(event_start_date),
+                        "endDate": _date_to_gbp(event_end_date),
+                    },
+                }
+            elif any(event_fields):
+                raise ValueError(
+                    f"OFFER post has incomplete event fields: "
+                    f"title={event_title}, start={event_start_date}, end={event_end_date}"
+                )
+            else:
+                raise ValueError("OFFER post requires event_title, event_start_date, and event_end_date")
+            if offer_redeem_online_url:
+                body["offer"] = {"redeemOnlineUrl": offer_redeem_online_url}
 
-def _date_to_gbp(d: date) -> dict[str, int]:
-    return {"year": d.year, "month": d.month, "day": d.day}
+        return self._request("create_local_post", "POST", url, headers=_auth_headers(access_token), json=body).json()
 
+    def list_local_posts(
+        self, *, access_token: str, account_id: str, location_id: str, page_size: int = 100
+    ) -> list[dict[str, Any]]:
+        """First page of a location's local posts, newest first (enough to find recent attempts)."""
+        url = f"{GBP_BASE_V4}/accounts/{account_id}/locations/{location_id}/localPosts"
+        r = self._request(
+            "list_local_posts", "GET", url, headers=_auth_headers(access_token), params={"pageSize": page_size}
+        )
+        return r.json().get("localPosts") or []
 
-def create_local_post(
-    *,
-    access_token: str,
-    account_id: str,
-    location_id: str,
-    summary: str,
-    image_url: str | None,
-    cta_type: str | None,
-    cta_url: str | None,
-    topic_type: str,
-    offer_redeem_online_url: str | None = None,
-    event_title: str | None = None,
-    event_start_date: date | None = None,
-    event_end_date: date | None = None,
-) -> dict[str, Any]:
-    url = f"{GBP_BASE_V4}/accounts/{account_id}/locations/{location_id}/localPosts"
-    body: dict[str, Any] = {
-        "languageCode": "ja",
-        "summary": summary,
-        "topicType": topic_type,
-    }
-    if image_url:
-        body["media"] = [{"mediaFormat": "PHOTO", "sourceUrl": image_url}]
-    if cta_type and cta_url:
-        body["callToAction"] = {"actionType": cta_type, "url": cta_url}
-    if topic_type == "OFFER":
-        if event_title:
-            event_title = sanitize_event_title(event_title)
-        event_fields = (event_title, event_start_date, event_end_date)
-        if all(event_fields):
-            body["event"] = {
-                "title": event_title,
-                "schedule": {
-                    "startDate": _date_to_gbp(event_start_date),
-                    "endDate": _date_to_gbp(event_end_date),
-                },
-            }
-        elif any(event_fields):
-            raise ValueError(
-                f"OFFER post has incomplete event fields: "
-                f"title={event_title}, start={event_start_date}, end={event_end_date}"
-            )
+    def upload_media(
+        self,
+        *,
+        access_token: str,
+        account_id: str,
+        location_id: str,
+        category: str,
+        media_format: str = "PHOTO",
+        source_url: str | None = None,
+        data_ref: str | None = None,
+    ) -> dict[str, Any]:
+        """Create a location media item from a public ``source_url`` or an uploaded ``data_ref``."""
+        if (source_url is None) == (data_ref is None):
+            raise ValueError("upload_media requires exactly one of source_url or data_ref")
+        url = f"{GBP_BASE_V4}/accounts/{account_id}/locations/{location_id}/media"
+        body: dict[str, Any] = {
+            "mediaFormat": media_format,
+            "locationAssociation": {"category": category},
+        }
+        if data_ref is not None:
+            body["dataRef"] = {"resourceName": data_ref}
         else:
-            raise ValueError("OFFER post requires event_title, event_start_date, and event_end_date")
-        if offer_redeem_online_url:
-            body["offer"] = {"redeemOnlineUrl": offer_redeem_online_url}
-
-    with httpx.Client(timeout=30) as client:
-        r = client.post(url, headers=_auth_headers(access_token), json=body)
-        r.raise_for_status()
-        return r.json()
-
-
-def upload_media(
-    *,
-    access_token: str,
-    account_id: str,
-    location_id: str,
-    source_url: str,
-    category: str,
-    media_format: str = "PHOTO",
-) -> dict[str, Any]:
-    url = f"{GBP_BASE_V4}/accounts/{account_id}/locations/{location_id}/media"
-    body = {
-        "mediaFormat": media_format,
-        "sourceUrl": source_url,
-        "locationAssociation": {"category": category},
-    }
-    with httpx.Client(timeout=30) as client:
-        r = client.post(url, headers=_auth_headers(access_token), json=body)
-        r.raise_for_status()
-        return r.json()
+            body["sourceUrl"] = source_url
+        return self._request("upload_media", "POST", url, headers=_auth_headers(access_token), json=body).json()
+
+    def start_media_upload(self, *, access_token: str, account_id: str, location_id: str) -> str:
+        """Reserve an upload slot (``media:startUpload``) and return its data-ref resource name."""
+        url = f"{GBP_BASE_V4}/accounts/{account_id}/locations/{location_id}/media:startUpload"
+        r = self._request("start_media_upload", "POST", url, headers=_auth_headers(access_token), json={})
+        resource_name = str(r.json().get("resourceName") or "")
+        if not resource_name:
+            raise ValueError("media:startUpload returned no resourceName")
+        return resource_name
+
+    def upload_media_bytes(
+        self,
+        *,
+        access_token: str,
+        account_id: str,
+        location_id: str,
+        chunks: Iterable[bytes],
+        size: int,
+        content_type: str | None,
+        category: str,
+        media_format: str = "PHOTO",
+    ) -> dict[str, Any]:
+        """Upload media by streaming its bytes to Google instead of handing over a URL.
+
+        ``media:startUpload`` -> raw byte upload to the data ref -> media item create
+        with ``dataRef``. Google never has to fetch our ``/media/`` URL.
+        """
+        resource_name = self.start_media_upload(
+            access_token=access_token, account_id=account_id, location_id=location_id
+        )
+        headers = _auth_headers(access_token)
+        headers["Content-Type"] = content_type or "application/octet-stream"
+        headers["Content-Length"] = str(size)
+        settings = get_settings()
+        self._request(
+            "upload_media_bytes",
+            "POST",
+            f"{GBP_UPLOAD_V1}/{resource_name}",
+            params={"upload_type": "media"},
+            headers=headers,
+            content=chunks,
+            timeout=httpx.Timeout(
+                settings.gbp_http_timeout_sec,
+                connect=settings.gbp_http_connect_timeout_sec,
+                write=settings.gbp_http_upload_timeout_sec,
+            ),
+        )
+        return self.upload_media(
+            access_token=access_token,
+            account_id=account_id,
+            location_id=location_id,
+            category=category,
+            media_format=media_format,
+            data_ref=resource_name,
+        )
+
+
+_client: GbpApiClient | None = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> GbpApiClient:
+    """Process-wide GBP API client, created on first use."""
+    global _client
+    client = _client
+    if client is None:
+        with _client_lock:
+            if _client is None:
+                _client = GbpApiClient()
+            client = _client
+    return client
+
+
+def set_client(client: GbpApiClient | None) -> None:
+    """Replace the process client (tests, custom transports); ``None`` resets to the default."""
+    global _client
+    with _client_lock:
+        old, _client = _client, client
+    if old is not None and old is not client:
+        old.close()
+
+
+def _forget_client_after_fork() -> None:
+    # A forked child (Celery prefork) must not share the parent's pooled sockets.
+    # Drop the reference without closing: closing would tear down the parent's TLS sessions.
+    global _client, _client_lock
+    _client = None
+    _client_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_client_after_fork)
+
+
+def list_accounts(*, access_token: str) -> list[str]:
+    return get_client().list_accounts(access_token=access_token)
+
+
+def list_locations(*, access_token: str, account_id: str) -> list[GbpLocationInfo]:
+    return get_client().list_locations(access_token=access_token, account_id=account_id)
+
+
+def create_local_post(**kwargs: Any) -> dict[str, Any]:
+    """See :meth:`GbpApiClient.create_local_post`."""
+    return get_client().create_local_post(**kwargs)
+
+
+def list_local_posts(**kwargs: Any) -> list[dict[str, Any]]:
+    """See :meth:`GbpApiClient.list_local_posts`."""
+    return get_client().list_local_posts(**kwargs)
+
+
+def upload_media(**kwargs: Any) -> dict[str, Any]:
+    """See :meth:`GbpApiClient.upload_media`."""
+    return get_client().upload_media(**kwargs)
+
+
+def start_media_upload(*, access_token: str, account_id: str, location_id: str) -> str:
+    return get_client().start_media_upload(
+        access_token=access_token, account_id=account_id, location_id=location_id
+    )
+
+
+def upload_media_bytes(**kwargs: Any) -> dict[str, Any]:
+    """See :meth:`GbpApiClient.upload_media_bytes`."""
+    return get_client().upload_media_bytes(**kwargs)
@@ -0,0 +1,132 @@
+"""Reconcile retried GBP local posts with what Google already created.
+
+``localPosts.create`` has no idempotency key, so a request that times out after Google
+created the post leaves us not knowing whether it exists. Before each create the task
+records a marker on the row (content fingerprint + send time). When a row with a
+marker is retried, the location's recent posts are listed once (newest-first page,
+cached in Redis for ``GBP_RECONCILE_CACHE_SEC``) and a post with the same fingerprint
+created since the attempt is adopted instead of creating a duplicate. A cached list
+fetched before the attempt cannot show its post, so it is not used for it.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+import redis
+
+from app.core.config import get_settings
+from app.core.redis import get_redis
+from app.services.gbp_client import GbpApiClient
+
+logger = logging.getLogger(__name__)
+
+
+# Allowance for drift between our clock and Google's createTime.
+_CLOCK_SKEW = timedelta(minutes=5)
+
+_WS = re.compile(r"\s+")
+
+
+def post_fingerprint(*, topic_type: str, summary: str, cta_type: str | None, cta_url: str | None) -> str:
+    """Stable hash of the fields Google echoes back for a local post."""
+    if not (cta_type and cta_url):
+        cta_type = cta_url = None
+    parts = [topic_type, _WS.sub(" ", summary).strip(), cta_type or "", cta_url or ""]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def _remote_fingerprint(item: dict[str, Any]) -> str:
+    cta = item.get("callToAction") or {}
+    return post_fingerprint(
+        topic_type=str(item.get("topicType") or "STANDARD"),
+        summary=str(item.get("summary") or ""),
+        cta_type=cta.get("actionType"),
+        cta_url=cta.get("url"),
+    )
+
+
+def _cache_key(account_id: str, location_id: str) -> str:
+    return f"gbp:localposts:{account_id}/{location_id}"
+
+
+def _recent_posts(
+    client: GbpApiClient, *, access_token: str, account_id: str, location_id: str, fetched_since: datetime
+) -> list[dict[str, Any]]:
+    """``[{name, createTime, state, fp}]`` for the location's newest posts, via the Redis cache.
+
+    The cached list is used only if it was fetched at or after ``fetched_since``.
+    """
+    key = _cache_key(account_id, location_id)
+    try:
+        raw = get_redis().get(key)
+    except redis.RedisError:
+        raw = None
+    if raw:
+        try:
+            cached = json.loads(raw)
+            if _parse_time(cached["fetched_at"]) >= fetched_since:
+                return cached["posts"]
+        except (ValueError, KeyError, TypeError):
+            pass
+    fetched_at = datetime.now(tz=timezone.utc)
+    items = client.list_local_posts(access_token=access_token, account_id=account_id, location_id=location_id)
+    posts = [
+        {
+            "name": item.get("name"),
+            "createTime": item.get("createTime"),
+            "state": item.get("state"),
+            "fp": _remote_fingerprint(item),
+        }
+        for item in items
+    ]
+    try:
+        cached = {"fetched_at": fetched_at.isoformat(), "posts": posts}
+        get_redis().set(key, json.dumps(cached), ex=get_settings().gbp_reconcile_cache_sec)
+    except redis.RedisError:
+        pass
+    return posts
+
+
+def forget_recent_posts(account_id: str, location_id: str) -> None:
+    """Drop the cached list after a create attempt (whatever its outcome) so a later reconcile sees it."""
+    try:
+        get_redis().delete(_cache_key(account_id, location_id))
+    except redis.RedisError:
+        pass
+
+
+def _parse_time(value: Any) -> datetime | None:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def find_published_post(
+    client: GbpApiClient,
+    *,
+    access_token: str,
+    account_id: str,
+    location_id: str,
+    attempt_key: str,
+    attempted_at: datetime,
+) -> dict[str, Any] | None:
+    """The remote post created by an earlier attempt with ``attempt_key``, or None."""
+    since = attempted_at - _CLOCK_SKEW
+    posts = _recent_posts(
+        client, access_token=access_token, account_id=account_id, location_id=location_id, fetched_since=attempted_at
+    )
+    for post in posts:
+        if post["fp"] != attempt_key or post.get("state") == "REJECTED":
+            continue
+        created = _parse_time(post.get("createTime"))
+        if created is not None and created >= since:
+            return post
+    return None
@@ -0,0 +1,99 @@
+"""Proactive GBP API rate limiting: Redis token buckets per project, account and location.
+
+Publishing tasks take a permit before calling Google. The buckets for all three scopes
+are checked and debited in one Lua script, so a permit is only granted when every scope
+has capacity; otherwise the caller learns exactly how long to wait. Quotas come from
+``GBP_RATE_*`` settings (a scope with a non-positive rate is not limited). Redis
+problems fail open — the reactive 429 backoff still applies.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import time
+
+import redis
+
+from app.core.config import get_settings
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+# KEYS: bucket keys. ARGV: cost, then (refill rate per second, capacity) for each key.
+# Returns the seconds to wait as a string (0 = permit granted); Lua numbers would be truncated.
+_TOKEN_BUCKET_SCRIPT = """
+local t = redis.call("TIME")
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local cost = tonumber(ARGV[1])
+local wait = 0
+local state = {}
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[2 * i])
+    local cap = tonumber(ARGV[2 * i + 1])
+    local b = redis.call("HMGET", key, "tokens", "ts")
+    local tokens = tonumber(b[1]) or cap
+    local ts = tonumber(b[2]) or now
+    tokens = math.min(cap, tokens + math.max(0, now - ts) * rate)
+    local need = math.min(cost, cap)
+    if tokens < need then
+        wait = math.max(wait, (need - tokens) / rate)
+    end
+    state[i] = {tokens, need, rate, cap}
+end
+for i, key in ipairs(KEYS) do
+    local tokens = state[i][1]
+    if wait == 0 then
+        tokens = tokens - state[i][2]
+    end
+    redis.call("HSET", key, "tokens", tokens, "ts", now)
+    redis.call("EXPIRE", key, math.ceil(state[i][4] / state[i][3]) + 60)
+end
+return tostring(wait)
+"""
+
+
+def _buckets(account_id: str, location_id: str) -> list[tuple[str, float, int]]:
+    """(key, refill per second, capacity) for each enabled scope."""
+    s = get_settings()
+    project = s.google_client_id or "default"
+    scopes = [
+        (f"gbp:rl:project:{project}", s.gbp_rate_project_per_min, s.gbp_rate_project_burst),
+        (f"gbp:rl:account:{account_id}", s.gbp_rate_account_per_min, s.gbp_rate_account_burst),
+        (f"gbp:rl:location:{account_id}/{location_id}", s.gbp_rate_location_per_min, s.gbp_rate_location_burst),
+    ]
+    return [(key, per_min / 60, max(1, burst)) for key, per_min, burst in scopes if per_min > 0]
+
+
+def acquire_permit(*, account_id: str, location_id: str, cost: int = 1) -> float:
+    """Take ``cost`` permits for one publish; returns 0 when granted, else seconds until they would be."""
+    if not get_settings().gbp_rate_limit_enabled:
+        return 0.0
+    buckets = _buckets(account_id, location_id)
+    if not buckets:
+        return 0.0
+    args: list[float] = [cost]
+    for _, rate, capacity in buckets:
+        args.extend((rate, capacity))
+    try:
+        wait = get_redis().eval(_TOKEN_BUCKET_SCRIPT, len(buckets), *[key for key, _, _ in buckets], *args)
+    except redis.RedisError:
+        logger.warning("GBP rate limiter unavailable; publishing without a permit")
+        return 0.0
+    return float(wait)
+
+
+def wait_for_permit(*, account_id: str, location_id: str, cost: int = 1) -> float:
+    """Acquire a permit, sleeping through short waits (``GBP_RATE_MAX_INLINE_WAIT_SEC``).
+
+    Returns 0 once granted; a positive value means the caller should defer the task
+    by that many seconds instead of holding the worker.
+    """
+    max_inline = get_settings().gbp_rate_max_inline_wait_sec
+    while True:
+        wait = acquire_permit(account_id=account_id, location_id=location_id, cost=cost)
+        if wait <= 0:
+            return 0.0
+        if wait > max_inline:
+            return math.ceil(wait)
+        time.sleep(wait)
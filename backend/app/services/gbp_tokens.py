@@ -1,33 +1,233 @@
+"""GBP access tokens: per-process + Redis cache with a single-flight refresh.
+
+Tokens are cached by ``GbpConnection.id`` in process memory and in Redis (encrypted
+with ``TOKEN_ENC_KEY_B64``), each entry carrying its expiry. When a token is close to
+expiring exactly one worker takes the Redis refresh lock and calls Google; the others
+wait for the refreshed token to appear in Redis instead of refreshing (and overwriting
+``access_token_enc``) themselves. ``refresh_expiring_tokens`` refreshes ahead of expiry
+from beat so the request path rarely has to. Redis problems fail open to the old
+per-call refresh.
+"""
 from __future__ import annotations
 
+import json
 import logging
+import threading
+import time
+import uuid
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 
+import redis
 from sqlalchemy.orm import Session
 
 from app.core.config import get_settings
 from app.core.crypto import decrypt_str, encrypt_str
+from app.core.redis import get_redis
 from app.models.gbp_connection import GbpConnection
 from app.services.google_oauth import refresh_access_token
 
 logger = logging.getLogger(__name__)
 
 
+# Tokens expiring within this margin are treated as expired.
+_EXPIRY_MARGIN = timedelta(minutes=5)
+_LOCK_TTL_SEC = 30
+_WAIT_POLL_SEC = 0.2
+
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+@dataclass(frozen=True)
+class _CachedToken:
+    access_token: str
+    expires_at: datetime
+
+
+class _TokenCache:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.entries: dict[uuid.UUID, _CachedToken] = {}
+
+
+_cache = _TokenCache()
+
+
+def _now() -> datetime:
+    return datetime.now(tz=timezone.utc)
+
+
+def _aware(dt: datetime) -> datetime:
+    return dt if dt.tzinfo is not None else dt.replace(tzinfo=timezone.utc)
+
+
+def _cache_key(conn_id: uuid.UUID) -> str:
+    return f"gbp:token:{conn_id}"
+
+
+def _lock_key(conn_id: uuid.UUID) -> str:
+    return f"gbp:token:lock:{conn_id}"
+
+
+def _usable(entry: _CachedToken | None, conn: GbpConnection, *, margin: timedelta = _EXPIRY_MARGIN) -> bool:
+    # A newer expiry on the row means the token was replaced (refresh elsewhere, reconnect).
+    return (
+        entry is not None
+        and entry.expires_at > _now() + margin
+        and entry.expires_at >= _aware(conn.token_expires_at)
+    )
+
+
+def _remember(conn_id: uuid.UUID, entry: _CachedToken) -> None:
+    with _cache.lock:
+        _cache.entries[conn_id] = entry
+
+
+def _redis_get(conn_id: uuid.UUID) -> _CachedToken | None:
+    try:
+        raw = get_redis().get(_cache_key(conn_id))
+    except redis.RedisError:
+        return None
+    if not raw:
+        return None
+    try:
+        data = json.loads(raw)
+        token = decrypt_str(data["enc"], get_settings().token_enc_key_b64)
+        return _CachedToken(access_token=token, expires_at=datetime.fromtimestamp(data["exp"], tz=timezone.utc))
+    except Exception:  # noqa: BLE001
+        logger.warning("Ignoring unreadable cached GBP token for connection_id=%s", conn_id)
+        return None
+
+
+def _redis_put(conn_id: uuid.UUID, entry: _CachedToken) -> None:
+    ttl = int((entry.expires_at - _now()).total_seconds())
+    if ttl <= 0:
+        return
+    payload = json.dumps({
+        "enc": encrypt_str(entry.access_token, get_settings().token_enc_key_b64),
+        "exp": entry.expires_at.timestamp(),
+    })
+    try:
+        get_redis().set(_cache_key(conn_id), payload, ex=ttl)
+    except redis.RedisError:
+        pass
+
+
+def invalidate_access_token(conn_id: uuid.UUID) -> None:
+    """Drop cached tokens for a connection (reconnect, revoked token)."""
+    with _cache.lock:
+        _cache.entries.pop(conn_id, None)
+    try:
+        get_redis().delete(_cache_key(conn_id))
+    except redis.RedisError:
+        pass
+
+
+def _refresh_now(db: Session, conn: GbpConnection) -> _CachedToken:
+    settings = get_settings()
+    logger.info("Refreshing GBP token for connection_id=%s", conn.id)
+    refresh_token = decrypt_str(conn.refresh_token_enc, settings.token_enc_key_b64)
+    refreshed = refresh_access_token(settings, refresh_token=refresh_token)
+    conn.access_token_enc = encrypt_str(refreshed.access_token, settings.token_enc_key_b64)
+    conn.token_expires_at = refreshed.expires_at
+    db.add(conn)
+    db.commit()
+    db.refresh(conn)
+    logger.info("GBP token refreshed, new expiry=%s", conn.token_expires_at)
+    return _CachedToken(access_token=refreshed.access_token, expires_at=_aware(refreshed.expires_at))
+
+
+def _from_row(conn: GbpConnection, *, margin: timedelta) -> _CachedToken | None:
+    expires_at = _aware(conn.token_expires_at)
+    if expires_at <= _now() + margin:
+        return None
+    token = decrypt_str(conn.access_token_enc, get_settings().token_enc_key_b64)
+    return _CachedToken(access_token=token, expires_at=expires_at)
+
+
+def _refresh_single_flight(db: Session, conn: GbpConnection, *, margin: timedelta) -> _CachedToken:
+    """Refresh under the Redis lock, or wait for the worker holding it."""
+    settings = get_settings()
+    owner = uuid.uuid4().hex
+    try:
+        r = get_redis()
+        acquired = bool(r.set(_lock_key(conn.id), owner, nx=True, ex=_LOCK_TTL_SEC))
+    except redis.RedisError:
+        logger.warning("Token lock unavailable for connection_id=%s; refreshing without coalescing", conn.id)
+        return _refresh_now(db, conn)
+
+    if acquired:
+        try:
+            # Another worker may have refreshed between our read and the lock.
+            db.refresh(conn)
+            entry = _from_row(conn, margin=margin) or _refresh_now(db, conn)
+            _redis_put(conn.id, entry)
+            return entry
+        finally:
+            try:
+                r.eval(_RELEASE_LOCK_SCRIPT, 1, _lock_key(conn.id), owner)
+            except redis.RedisError:
+                pass
+
+    deadline = time.monotonic() + settings.gbp_token_lock_wait_sec
+    while time.monotonic() < deadline:
+        time.sleep(_WAIT_POLL_SEC)
+        entry = _redis_get(conn.id)
+        if _usable(entry, conn, margin=margin):
+            return entry
+    db.refresh(conn)
+    entry = _from_row(conn, margin=margin)
+    if entry is not None:
+        return entry
+    logger.warning("Timed out waiting for GBP token refresh connection_id=%s; refreshing here", conn.id)
+    return _refresh_now(db, conn)
+
+
+def _get_token(db: Session, conn: GbpConnection, *, margin: timedelta) -> _CachedToken:
+    with _cache.lock:
+        entry = _cache.entries.get(conn.id)
+    if _usable(entry, conn, margin=margin):
+        return entry
+
+    entry = _redis_get(conn.id)
+    if not _usable(entry, conn, margin=margin):
+        entry = _from_row(conn, margin=margin)
+        if entry is not None:
+            _redis_put(conn.id, entry)
+        else:
+            entry = _refresh_single_flight(db, conn, margin=margin)
+    _remember(conn.id, entry)
+    return entry
+
+
 def get_access_token(db: Session, conn: GbpConnection) -> str:
     if conn.status != "active":
         raise RuntimeError(f"GBP connection {conn.id} is {conn.status}, cannot obtain access token")
-    settings = get_settings()
-    now = datetime.now(tz=timezone.utc)
-    if conn.token_expires_at <= (now + timedelta(minutes=5)):
-        logger.info("Refreshing GBP token for connection_id=%s", conn.id)
-        refresh_token = decrypt_str(conn.refresh_token_enc, settings.token_enc_key_b64)
-        refreshed = refresh_access_token(settings, refresh_token=refresh_token)
-        conn.access_token_enc = encrypt_str(refreshed.access_token, settings.token_enc_key_b64)
-        conn.token_expires_at = refreshed.expires_at
-        db.add(conn)
-        db.commit()
-        db.refresh(conn)
-        logger.info("GBP token refreshed, new expiry=%s", conn.token_expires_at)
-
-    return decrypt_str(conn.access_token_enc, settings.token_enc_key_b64)
+    return _get_token(db, conn, margin=_EXPIRY_MARGIN).access_token
+
 
+def refresh_expiring_tokens(db: Session) -> dict[str, int]:
+    """Refresh active connections whose token expires within ``GBP_TOKEN_REFRESH_AHEAD_MIN``."""
+    ahead = timedelta(minutes=get_settings().gbp_token_refresh_ahead_min)
+    conns = (
+        db.query(GbpConnection)
+        .filter(GbpConnection.status == "active")
+        .filter(GbpConnection.token_expires_at <= _now() + ahead)
+        .all()
+    )
+    refreshed = 0
+    failed = 0
+    for conn in conns:
+        try:
+            _get_token(db, conn, margin=ahead)
+            refreshed += 1
+        except Exception as e:  # noqa: BLE001
+            db.rollback()
+            failed += 1
+            logger.error("Proactive GBP token refresh failed connection_id=%s: %s", conn.id, e)
+    return {"refreshed": refreshed, "failed": failed}
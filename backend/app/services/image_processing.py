@@ -0,0 +1,128 @@
+"""Transcode downloaded images into GBP-ready variants (JPEG/PNG, bounded size, no metadata)."""
+from __future__ import annotations
+
+import io
+from dataclasses import dataclass
+from pathlib import Path
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# Google Business Profile photo requirements: JPG/PNG, 10KB-5MB, at least 250x250.
+GBP_MIN_DIMENSION = 250
+GBP_MAX_BYTES = 5 * 1024 * 1024
+
+_MIN_JPEG_QUALITY = 60
+_THUMBNAIL_QUALITY = 80
+
+# Decompression-bomb limit. Pillow only warns above MAX_IMAGE_PIXELS (and raises
+# at twice that), so _open checks the header size itself before decoding.
+_MAX_PIXELS = 60_000_000
+Image.MAX_IMAGE_PIXELS = _MAX_PIXELS
+
+
+class ImageProcessingError(Exception):
+    """The file is not a decodable image."""
+
+
+@dataclass(frozen=True)
+class EncodedImage:
+    data: bytes
+    content_type: str
+    width: int
+    height: int
+
+
+def _has_alpha(img: Image.Image) -> bool:
+    return img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+
+
+def _encode(img: Image.Image, *, fmt: str, quality: int) -> bytes:
+    buf = io.BytesIO()
+    if fmt == "PNG":
+        img.save(buf, format="PNG", optimize=True)
+    else:
+        img.save(buf, format="JPEG", quality=quality, optimize=True, progressive=True)
+    return buf.getvalue()
+
+
+def _open(src: Path) -> Image.Image:
+    try:
+        img = Image.open(src)
+        if img.width * img.height > _MAX_PIXELS:
+            raise ImageProcessingError(f"Image too large: {img.width}x{img.height}")
+        img.load()
+        # Apply the EXIF orientation before the metadata is dropped.
+        return ImageOps.exif_transpose(img)
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        raise ImageProcessingError(f"Not a decodable image: {e}") from e
+
+
+def _fit(img: Image.Image, *, max_dimension: int) -> Image.Image:
+    w, h = img.size
+    if max(w, h) > max_dimension:
+        scale = max_dimension / max(w, h)
+    elif min(w, h) < GBP_MIN_DIMENSION:
+        # GBP rejects images below 250px on either side; upscale rather than fail the upload.
+        scale = GBP_MIN_DIMENSION / min(w, h)
+    else:
+        return img
+    return img.resize((max(1, round(w * scale)), max(1, round(h * scale))), Image.LANCZOS)
+
+
+def to_gbp_image(src: Path, *, max_dimension: int, quality: int) -> EncodedImage:
+    """Re-encode ``src`` within GBP's photo limits.
+
+    Images with transparency stay PNG, everything else becomes RGB JPEG. EXIF,
+    ICC and text chunks are not carried over. Quality and then dimensions are
+    reduced until the result fits ``GBP_MAX_BYTES``, but never below
+    ``GBP_MIN_DIMENSION``.
+    """
+    img = _open(src)
+    if _has_alpha(img):
+        fmt, content_type = "PNG", "image/png"
+        img = img.convert("RGBA")
+    else:
+        fmt, content_type = "JPEG", "image/jpeg"
+        img = img.convert("RGB")
+    img = _fit(img, max_dimension=max_dimension)
+
+    q = quality
+    data = _encode(img, fmt=fmt, quality=q)
+    while len(data) > GBP_MAX_BYTES:
+        if fmt == "JPEG" and q > _MIN_JPEG_QUALITY:
+            q = max(_MIN_JPEG_QUALITY, q - 10)
+        else:
+            # Never shrink below GBP's minimum; an image that cannot fit there is refused.
+            scale = max(0.8, GBP_MIN_DIMENSION / min(img.width, img.height))
+            if scale >= 1:
+                raise ImageProcessingError(f"Cannot fit {img.width}x{img.height} within {GBP_MAX_BYTES} bytes")
+            img = img.resize((round(img.width * scale), round(img.height * scale)), Image.LANCZOS)
+        data = _encode(img, fmt=fmt, quality=q)
+    return EncodedImage(data=data, content_type=content_type, width=img.width, height=img.height)
+
+
+def to_thumbnail(src: Path, *, size: int) -> EncodedImage:
+    """Small RGB JPEG preview of ``src`` whose longest side is at most ``size``."""
+    img = _open(src).convert("RGB")
+    img.thumbnail((size, size), Image.LANCZOS)
+    data = _encode(img, fmt="JPEG", quality=_THUMBNAIL_QUALITY)
+    return EncodedImage(data=data, content_type="image/jpeg", width=img.width, height=img.height)
+
+
+def dhash(src: Path) -> int:
+    """64-bit difference hash of ``src`` as a signed integer (fits a BIGINT column).
+
+    Robust to rescaling and re-encoding, so the same photo at another resolution
+    lands within a few bits.
+    """
+    img = _open(src).convert("L").resize((9, 8), Image.LANCZOS)
+    px = img.load()
+    value = 0
+    for y in range(8):
+        for x in range(8):
+            value = (value << 1) | (px[x, y] > px[x + 1, y])
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return ((a ^ b) & 0xFFFFFFFFFFFFFFFF).bit_count()
@@ -0,0 +1,266 @@
+"""Storage backends for media blobs: the shared local volume, or an S3-compatible bucket.
+
+Objects are addressed by a ``location`` string kept in ``MediaBlob.local_path`` /
+``MediaAsset.local_path``: an absolute path for the local backend, ``s3://<bucket>/<key>``
+for S3. New blobs go to the configured backend (``MEDIA_STORAGE_BACKEND``); existing
+locations keep resolving to the backend they were written to.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import shutil
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+_S3_SCHEME = "s3://"
+
+
+def ensure_dir(path: Path) -> None:
+    path.mkdir(parents=True, exist_ok=True)
+
+
+def link_or_copy(src: Path, dest: Path) -> None:
+    try:
+        os.link(src, dest)
+    except FileNotFoundError:
+        raise
+    except OSError:
+        shutil.copyfile(src, dest)
+
+
+def public_url_for(rel_path: str) -> str:
+    settings = get_settings()
+    return settings.app_public_base_url.rstrip("/") + settings.media_public_path.rstrip("/") + "/" + rel_path
+
+
+class StorageBackend(ABC):
+    @abstractmethod
+    def location(self, key: str) -> str:
+        """Location string for ``key`` (what is stored in ``local_path``)."""
+
+    @abstractmethod
+    def key_for(self, location: str) -> str:
+        """Inverse of :meth:`location`."""
+
+    @abstractmethod
+    def store(self, staged: Path, key: str, *, content_type: str | None) -> str:
+        """Move the staged file to ``key`` and return its location.
+
+        Keys are content-addressed, so an existing object is kept and the staged
+        file is simply discarded.
+        """
+
+    @abstractmethod
+    def fetch(self, key: str, dest: Path) -> bool:
+        """Copy the object at ``key`` to ``dest``; False if it does not exist."""
+
+    @abstractmethod
+    def size(self, location: str) -> int | None:
+        """Object size in bytes, or None if it does not exist."""
+
+    @abstractmethod
+    def iter_bytes(self, location: str, *, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """Stream the object's content."""
+
+    @abstractmethod
+    def delete(self, location: str) -> None:
+        """Remove the object (missing objects are ignored)."""
+
+    @abstractmethod
+    def public_url(self, location: str) -> str:
+        """URL GBP and browsers can fetch the object from."""
+
+
+class LocalStorageBackend(StorageBackend):
+    """Files under ``media_root``, served by nginx at ``media_public_path``."""
+
+    def __init__(self, root: str) -> None:
+        self.root = Path(root)
+
+    def location(self, key: str) -> str:
+        return str(self.root / key)
+
+    def key_for(self, location: str) -> str:
+        return Path(location).relative_to(self.root).as_posix()
+
+    def store(self, staged: Path, key: str, *, content_type: str | None) -> str:
+        dest = self.root / key
+        if dest.exists():
+            staged.unlink(missing_ok=True)
+        else:
+            ensure_dir(dest.parent)
+            os.replace(staged, dest)
+        return str(dest)
+
+    def fetch(self, key: str, dest: Path) -> bool:
+        # Hard link: the staged copy survives a concurrent cleanup of the original.
+        try:
+            link_or_copy(self.root / key, dest)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def size(self, location: str) -> int | None:
+        try:
+            return Path(location).stat().st_size
+        except FileNotFoundError:
+            return None
+
+    def iter_bytes(self, location: str, *, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        with open(location, "rb") as f:
+            while chunk := f.read(chunk_size):
+                yield chunk
+
+    def delete(self, location: str) -> None:
+        Path(location).unlink(missing_ok=True)
+
+    def public_url(self, location: str) -> str:
+        return public_url_for(self.key_for(location))
+
+
+class S3StorageBackend(StorageBackend):
+    """S3-compatible bucket (AWS S3, MinIO in development).
+
+    Uploads go through boto3's managed transfer, which switches to a streamed
+    multipart upload above ``media_s3_multipart_threshold_mb``. Public URLs use
+    ``media_s3_public_base_url`` (CDN / public bucket) when set, otherwise a
+    pre-signed GET URL.
+    """
+
+    def __init__(self, *, bucket: str, client: Any | None = None) -> None:
+        settings = get_settings()
+        self.bucket = bucket
+        if client is None:
+            import boto3
+            from botocore.config import Config
+
+            # A session of its own: boto3's default session is not safe to share
+            # between the threads of a thread-pool worker.
+            client = boto3.session.Session().client(
+                "s3",
+                endpoint_url=settings.media_s3_endpoint_url or None,
+                region_name=settings.media_s3_region or None,
+                aws_access_key_id=settings.media_s3_access_key_id or None,
+                aws_secret_access_key=settings.media_s3_secret_access_key or None,
+                config=Config(signature_version="s3v4", s3={"addressing_style": "path"}),
+            )
+        self.client = client
+
+    def _transfer_config(self) -> Any:
+        from boto3.s3.transfer import TransferConfig
+
+        part = get_settings().media_s3_multipart_threshold_mb * 1024 * 1024
+        return TransferConfig(multipart_threshold=part, multipart_chunksize=part)
+
+    def location(self, key: str) -> str:
+        return f"{_S3_SCHEME}{self.bucket}/{key}"
+
+    def key_for(self, location: str) -> str:
+        return location[len(_S3_SCHEME):].split("/", 1)[1]
+
+    def _head(self, key: str) -> dict[str, Any] | None:
+        from botocore.exceptions import ClientError
+
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    def _exists(self, key: str) -> bool:
+        return self._head(key) is not None
+
+    def size(self, location: str) -> int | None:
+        head = self._head(self.key_for(location))
+        return None if head is None else int(head.get("ContentLength", 0))
+
+    def iter_bytes(self, location: str, *, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        body = self.client.get_object(Bucket=self.bucket, Key=self.key_for(location))["Body"]
+        try:
+            yield from body.iter_chunks(chunk_size)
+        finally:
+            body.close()
+
+    def store(self, staged: Path, key: str, *, content_type: str | None) -> str:
+        if not self._exists(key):
+            extra = {"CacheControl": "public, max-age=31536000, immutable"}
+            if content_type:
+                extra["ContentType"] = content_type
+            self.client.upload_file(str(staged), self.bucket, key, ExtraArgs=extra, Config=self._transfer_config())
+        staged.unlink(missing_ok=True)
+        return self.location(key)
+
+    def fetch(self, key: str, dest: Path) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.download_file(self.bucket, key, str(dest))
+        except ClientError as e:
+            dest.unlink(missing_ok=True)
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return True
+
+    def delete(self, location: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self.key_for(location))
+
+    def public_url(self, location: str) -> str:
+        settings = get_settings()
+        key = self.key_for(location)
+        if settings.media_s3_public_base_url:
+            return settings.media_s3_public_base_url.rstrip("/") + "/" + key
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": key},
+            ExpiresIn=settings.media_s3_presign_expires_sec,
+        )
+
+
+_s3_backends: dict[str, S3StorageBackend] = {}
+_s3_backends_lock = threading.Lock()
+
+
+def _s3_backend(bucket: str) -> S3StorageBackend:
+    # boto3 clients are thread-safe once built; building one is not.
+    with _s3_backends_lock:
+        backend = _s3_backends.get(bucket)
+        if backend is None:
+            backend = _s3_backends[bucket] = S3StorageBackend(bucket=bucket)
+        return backend
+
+
+def get_storage() -> StorageBackend:
+    """Backend new blobs are written to."""
+    settings = get_settings()
+    if settings.media_storage_backend == "s3":
+        return _s3_backend(settings.media_s3_bucket)
+    return LocalStorageBackend(settings.media_root)
+
+
+def storage_for(location: str) -> StorageBackend:
+    """Backend holding an existing ``location``."""
+    if location.startswith(_S3_SCHEME):
+        return _s3_backend(location[len(_S3_SCHEME):].split("/", 1)[0])
+    return LocalStorageBackend(get_settings().media_root)
+
+
+def resolve_public_url(location: str | None, stored_url: str | None) -> str | None:
+    """Current public URL for a stored object.
+
+    Pre-signed URLs expire, so S3 objects are re-signed on every call; local files
+    keep the URL recorded when they were stored.
+    """
+    if location and location.startswith(_S3_SCHEME):
+        return storage_for(location).public_url(location)
+    return stored_url
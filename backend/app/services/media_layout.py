@@ -0,0 +1,124 @@
+"""Move existing media files into the sharded directory layout.
+
+New files are written as ``cas/ab/cd/<sha256>.<ext>``; this module migrates the
+pre-blob-store files stored under ``<salon_id>/`` while the app keeps serving::
+
+    python -m app.services.media_layout --batch-size 500 [--dry-run]
+
+Each file is hard-linked to its new path and rows are rewritten one committed
+batch at a time, so the command can be interrupted and re-run. Old paths keep
+working until the orphan sweep removes them after its grace period; after that
+nginx maps ``/media/<salon_id>/<name>.<ext>`` onto ``legacy/<shard>/<name>.<ext>``,
+so GBP posts published with the old URLs keep their images (which is why legacy
+files keep their file name).
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.models.media_asset import MediaAsset
+from app.services.media_backends import ensure_dir, link_or_copy, public_url_for
+from app.services.media_storage import shard
+
+logger = logging.getLogger(__name__)
+
+
+# Pre-blob-store files, sharded by their original (random hex) file name.
+_LEGACY_DIR = "legacy"
+
+
+@dataclass
+class LayoutMigrationResult:
+    assets: int = 0
+    missing: int = 0
+
+
+def _relink(old: Path, new: Path) -> bool:
+    """Link ``old`` to ``new``; returns False when the source file is gone."""
+    if new.exists():
+        return True
+    try:
+        ensure_dir(new.parent)
+        link_or_copy(old, new)
+    except FileNotFoundError:
+        return False
+    # Restart the orphan sweep's grace period for the path we are leaving behind.
+    os.utime(old)
+    return True
+
+
+def _migrate_legacy_assets(db: Session, *, batch_size: int, dry_run: bool, out: LayoutMigrationResult) -> None:
+    root = Path(get_settings().media_root)
+    cursor: uuid.UUID | None = None
+    while True:
+        q = (
+            select(MediaAsset)
+            .where(
+                MediaAsset.blob_id.is_(None),
+                MediaAsset.status == "available",
+                ~MediaAsset.local_path.like(f"%/{_LEGACY_DIR}/__/__/%"),
+            )
+            .order_by(MediaAsset.id)
+            .limit(batch_size)
+        )
+        if cursor is not None:
+            q = q.where(MediaAsset.id > cursor)
+        assets = db.execute(q).scalars().all()
+        if not assets:
+            break
+        cursor = assets[-1].id
+
+        rows: list[dict[str, object]] = []
+        for asset in assets:
+            old = Path(asset.local_path)
+            rel = f"{_LEGACY_DIR}/{shard(old.stem)}/{old.name}"
+            if dry_run:
+                out.assets += 1
+                continue
+            if not _relink(Path(asset.local_path), root / rel):
+                logger.warning("Asset %s: file missing at %s, left as is", asset.id, asset.local_path)
+                out.missing += 1
+                continue
+            rows.append({"id": asset.id, "local_path": str(root / rel), "public_url": public_url_for(rel)})
+        if rows:
+            db.execute(update(MediaAsset), rows)
+        db.commit()
+        out.assets += len(rows)
+        logger.info("media layout: %d legacy assets migrated so far", out.assets)
+
+
+def migrate_media_layout(db: Session, *, batch_size: int = 500, dry_run: bool = False) -> LayoutMigrationResult:
+    """Move legacy per-salon files into the sharded layout.
+
+    With ``dry_run`` nothing is touched and the result counts what would move.
+    """
+    out = LayoutMigrationResult()
+    _migrate_legacy_assets(db, batch_size=batch_size, dry_run=dry_run, out=out)
+    return out
+
+
+def main(argv: list[str] | None = None) -> None:
+    from app.db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Migrate media files to the sharded layout.")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    with SessionLocal() as db:
+        result = migrate_media_layout(db, batch_size=args.batch_size, dry_run=args.dry_run)
+    print(f"legacy_assets={result.assets} missing={result.missing} dry_run={args.dry_run}")
+
+
+if __name__ == "__main__":
+    main()
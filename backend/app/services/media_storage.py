@@ -1,17 +1,70 @@
 from __future__ import annotations
 
+import contextvars
 import hashlib
+import logging
 import os
+import threading
 import uuid
-from dataclasses import dataclass
+from collections import Counter
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
 import httpx
+import redis
+from sqlalchemy import ColumnElement, and_, or_, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.core.config import get_settings
+from app.core.redis import get_redis
 from app.models.media_asset import MediaAsset
+from app.models.media_blob import MediaBlob
+from app.services.image_processing import ImageProcessingError, dhash, to_gbp_image, to_thumbnail
+from app.services.media_backends import ensure_dir, get_storage, public_url_for, storage_for
+
+logger = logging.getLogger(__name__)
+
+
+_CHUNK_SIZE = 64 * 1024
+
+# Directories under media_root: content-addressed blobs, and in-progress downloads.
+_BLOB_DIR = "cas"
+_TMP_DIR = "tmp"
+# Orphans moved aside by a dry-run sweep.
+_QUARANTINE_DIR = "_quarantine"
+
+# Signed-URL parameters that change between fetches of the same image (Instagram CDN).
+_VOLATILE_QUERY_PARAMS = {"oh", "oe", "efg", "ccb"}
+_VOLATILE_QUERY_PREFIXES = ("_nc_",)
+
+_DOWNLOAD_LOCK_TTL_SEC = 300
+
+# Batch downloads: attempts before an asset is marked failed, and when a claim is considered abandoned.
+_MAX_DOWNLOAD_ATTEMPTS = 3
+_CLAIM_STALE_AFTER_SEC = 15 * 60
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+_EXT_BY_CONTENT_TYPE = {
+    "image/jpeg": ".jpg",
+    "image/jpg": ".jpg",
+    "image/png": ".png",
+    "image/webp": ".webp",
+    "image/gif": ".gif",
+}
+
+
+class MediaDownloadError(Exception):
+    """Remote media was rejected (size / content type). Retrying will not help."""
 
 
 @dataclass(frozen=True)
@@ -19,39 +72,193 @@ class DownloadResult:
     content_type: str | None
     bytes: int
     sha256: str
-    local_path: str
-    public_url: str
+    # Staged file under ``<media_root>/tmp``; moved into the blob store by mark_asset_available.
+    # ``sha256`` is the hash of the original download, ``content_type``/``bytes`` describe the
+    # GBP-ready variant that was staged.
+    temp_path: str
+    thumbnail_path: str | None = None
+    # Perceptual hash of the original; None when the variant came from the cache.
+    phash: int | None = None
 
 
 def _guess_ext(content_type: str | None) -> str:
     if not content_type:
         return ".bin"
     ct = content_type.split(";", 1)[0].strip().lower()
-    return {
-        "image/jpeg": ".jpg",
-        "image/jpg": ".jpg",
-        "image/png": ".png",
-        "image/webp": ".webp",
-        "image/gif": ".gif",
-    }.get(ct, ".bin")
+    return _EXT_BY_CONTENT_TYPE.get(ct, ".bin")
 
 
-def _ensure_dir(path: Path) -> None:
-    path.mkdir(parents=True, exist_ok=True)
+def shard(name: str) -> str:
+    """Two-level fan-out (``ab/cd/``) so no directory grows past a few thousand entries."""
+    return f"{name[:2]}/{name[2:4]}"
 
 
-def create_pending_asset(db: Session, *, salon_id: uuid.UUID, source_url: str) -> MediaAsset:
+def _blob_rel_path(sha256: str, content_type: str | None) -> str:
+    return f"{_BLOB_DIR}/{shard(sha256)}/{sha256}{_guess_ext(content_type)}"
+
+
+def _thumbnail_rel_path(sha256: str) -> str:
+    return f"{_BLOB_DIR}/{shard(sha256)}/{sha256}_thumb.jpg"
+
+
+def _stage_cached_variants(sha256: str, stem: Path) -> DownloadResult | None:
+    """Stage the variants already in the blob store for ``sha256``, if both exist."""
+    storage = get_storage()
+    variant_tmp = stem.with_suffix(".var")
+    thumb_tmp = stem.with_suffix(".thumb")
+    for content_type in ("image/jpeg", "image/png"):
+        if not storage.fetch(_blob_rel_path(sha256, content_type), variant_tmp):
+            continue
+        if not storage.fetch(_thumbnail_rel_path(sha256), thumb_tmp):
+            variant_tmp.unlink(missing_ok=True)
+            return None
+        return DownloadResult(
+            content_type=content_type,
+            bytes=variant_tmp.stat().st_size,
+            sha256=sha256,
+            temp_path=str(variant_tmp),
+            thumbnail_path=str(thumb_tmp),
+        )
+    return None
+
+
+def _process_download(raw_path: Path, sha256: str) -> DownloadResult:
+    """Replace a raw download with its GBP-ready variant and thumbnail (cached by content hash)."""
     settings = get_settings()
-    file_id = uuid.uuid4().hex
-    rel_dir = f"{salon_id}"
-    rel_name = f"{file_id}.bin"
+    stem = raw_path.with_suffix("")
+    staged = _stage_cached_variants(sha256, stem)
+    if staged is None:
+        try:
+            variant = to_gbp_image(
+                raw_path,
+                max_dimension=settings.media_image_max_dimension,
+                quality=settings.media_jpeg_quality,
+            )
+            thumb = to_thumbnail(raw_path, size=settings.media_thumbnail_size)
+            phash = dhash(raw_path)
+        except ImageProcessingError as e:
+            raise MediaDownloadError(str(e)) from e
+        variant_tmp = stem.with_suffix(".var")
+        thumb_tmp = stem.with_suffix(".thumb")
+        variant_tmp.write_bytes(variant.data)
+        thumb_tmp.write_bytes(thumb.data)
+        staged = DownloadResult(
+            content_type=variant.content_type,
+            bytes=len(variant.data),
+            sha256=sha256,
+            temp_path=str(variant_tmp),
+            thumbnail_path=str(thumb_tmp),
+            phash=phash,
+        )
+    raw_path.unlink(missing_ok=True)
+    return staged
+
+
+def normalize_source_url(url: str) -> str:
+    """Canonical form of a remote media URL: lower-case scheme/host, no fragment or
+    default port, sorted query without per-fetch signature parameters."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    port = parts.port
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        host = f"{host}:{port}"
+    query = sorted(
+        (k, v)
+        for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k not in _VOLATILE_QUERY_PARAMS and not k.startswith(_VOLATILE_QUERY_PREFIXES)
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+def source_key(url: str) -> str:
+    return hashlib.sha256(normalize_source_url(url).encode("utf-8")).hexdigest()
+
 
-    local_path = str(Path(settings.media_root) / rel_dir / rel_name)
-    public_url = settings.app_public_base_url.rstrip("/") + settings.media_public_path.rstrip("/") + f"/{rel_dir}/{rel_name}"
+def _reuse_recent_blob(db: Session, asset: MediaAsset) -> bool:
+    """Point ``asset`` at the blob of a recently completed download of the same URL.
+
+    Takes a reference on the blob and fills in the asset fields; the caller commits.
+    """
+    settings = get_settings()
+    since = datetime.now(tz=timezone.utc) - timedelta(hours=settings.media_url_reuse_hours)
+    sibling = (
+        db.query(MediaAsset)
+        .filter(MediaAsset.source_key == asset.source_key)
+        .filter(MediaAsset.status == "available")
+        .filter(MediaAsset.blob_id.isnot(None))
+        .filter(MediaAsset.created_at >= since)
+        .order_by(MediaAsset.created_at.desc())
+        .first()
+    )
+    if sibling is None or sibling.id == asset.id:
+        return False
+    blob = db.query(MediaBlob).filter(MediaBlob.id == sibling.blob_id).with_for_update().one_or_none()
+    # Ask the backend that holds the blob: an S3 location is never a local path.
+    if blob is None or storage_for(blob.local_path).size(blob.local_path) is None:
+        return False
+    blob.ref_count = blob.ref_count + 1
+    db.add(blob)
+    asset.content_type = blob.content_type
+    asset.bytes = blob.bytes
+    asset.sha256 = blob.sha256
+    asset.blob_id = blob.id
+    asset.local_path = blob.local_path
+    asset.public_url = blob.public_url
+    asset.status = "available"
+    asset.error_message = None
+    return True
+
+
+def reuse_recent_download(db: Session, asset: MediaAsset) -> bool:
+    """Complete a pending asset from an earlier download of the same URL, if any."""
+    if asset.source_key is None:
+        asset.source_key = source_key(asset.source_url)
+    if not _reuse_recent_blob(db, asset):
+        return False
+    db.add(asset)
+    db.commit()
+    db.refresh(asset)
+    logger.info("Asset %s reused blob %s for %s", asset.id, asset.blob_id, asset.source_url)
+    return True
+
+
+def acquire_download_slot(key: str, owner: uuid.UUID) -> bool:
+    """Single-flight guard: True if this caller should download ``key``.
+
+    Fails open when Redis is unavailable — the blob store still dedupes the result.
+    """
+    try:
+        return bool(get_redis().set(f"media:dl:{key}", str(owner), nx=True, ex=_DOWNLOAD_LOCK_TTL_SEC))
+    except redis.RedisError:
+        logger.warning("Download lock unavailable for %s; downloading without coalescing", key)
+        return True
+
+
+def release_download_slot(key: str, owner: uuid.UUID) -> None:
+    try:
+        get_redis().eval(_RELEASE_LOCK_SCRIPT, 1, f"media:dl:{key}", str(owner))
+    except redis.RedisError:
+        pass
+
+
+def create_pending_asset(db: Session, *, salon_id: uuid.UUID, source_url: str) -> MediaAsset:
+    """Create the MediaAsset for ``source_url``.
+
+    If the same URL was downloaded recently the asset is returned already
+    ``available``; callers only need to enqueue a download while it is ``pending``.
+    """
+    settings = get_settings()
+    # Placeholder until the download lands in the blob store; its stem names the staging file.
+    rel_path = f"{_TMP_DIR}/{uuid.uuid4().hex}.bin"
+    local_path = str(Path(settings.media_root) / rel_path)
+    public_url = public_url_for(rel_path)
 
     asset = MediaAsset(
+        id=uuid.uuid4(),
         salon_id=salon_id,
         source_url=source_url,
+        source_key=source_key(source_url),
         content_type=None,
         sha256=None,
         local_path=local_path,
@@ -60,53 +267,164 @@ def create_pending_asset(db: Session, *, salon_id: uuid.UUID, source_url: str) -
         status="pending",
         error_message=None,
     )
+    _reuse_recent_blob(db, asset)
     db.add(asset)
     db.commit()
     db.refresh(asset)
     return asset
 
 
-def download_asset(db: Session, asset: MediaAsset) -> DownloadResult:
+def download_asset(db: Session, asset: MediaAsset, *, client: httpx.Client | None = None) -> DownloadResult:
+    """Stream the remote file to a staging path, hashing it incrementally.
+
+    Content type and declared length are checked before the body is read, and the
+    transfer is aborted as soon as it exceeds ``media_max_bytes``. The download is
+    then transcoded into the GBP-ready variant plus a thumbnail; undecodable images
+    raise ``MediaDownloadError``. Pass ``client`` to reuse a pooled connection
+    (batch downloads); otherwise a client is created.
+    """
+    if client is None:
+        with httpx.Client(timeout=30, follow_redirects=True) as own_client:
+            return download_asset(db, asset, client=own_client)
+
     settings = get_settings()
-    local_path = Path(asset.local_path)
-    _ensure_dir(local_path.parent)
-
-    with httpx.Client(timeout=30, follow_redirects=True) as client:
-        r = client.get(asset.source_url)
-        r.raise_for_status()
-        content = r.content
-        content_type = r.headers.get("content-type")
-
-    sha = hashlib.sha256(content).hexdigest()
-    ext = _guess_ext(content_type)
-
-    # If ext differs, rename file deterministically.
-    final_local = local_path.with_suffix(ext)
-    final_rel = final_local.relative_to(Path(settings.media_root))
-    final_public_url = (
-        settings.app_public_base_url.rstrip("/") + settings.media_public_path.rstrip("/") + "/" + str(final_rel)
-    )
+    tmp_dir = Path(settings.media_root) / _TMP_DIR
+    ensure_dir(tmp_dir)
+    tmp_path = tmp_dir / f"{Path(asset.local_path).stem}.tmp"
+    max_bytes = settings.media_max_bytes
 
-    tmp_path = final_local.with_suffix(final_local.suffix + ".tmp")
-    with open(tmp_path, "wb") as f:
-        f.write(content)
-    os.replace(tmp_path, final_local)
-
-    return DownloadResult(
-        content_type=content_type,
-        bytes=len(content),
-        sha256=sha,
-        local_path=str(final_local),
-        public_url=final_public_url,
-    )
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with client.stream("GET", asset.source_url) as r:
+            r.raise_for_status()
+            content_type = r.headers.get("content-type")
+            if _guess_ext(content_type) == ".bin":
+                raise MediaDownloadError(f"Unsupported content type: {content_type or 'none'}")
+            declared = r.headers.get("content-length", "")
+            if declared.isdigit() and int(declared) > max_bytes:
+                raise MediaDownloadError(f"Media too large: {declared} bytes (limit {max_bytes})")
+
+            with open(tmp_path, "wb") as f:
+                for chunk in r.iter_bytes(_CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise MediaDownloadError(f"Media too large: exceeded {max_bytes} bytes")
+                    digest.update(chunk)
+                    f.write(chunk)
+        return _process_download(tmp_path, digest.hexdigest())
+    except BaseException:
+        for suffix in (".tmp", ".var", ".thumb"):
+            tmp_path.with_suffix(suffix).unlink(missing_ok=True)
+        raise
+
+
+def _place_thumbnail(blob: MediaBlob, result: DownloadResult) -> None:
+    """Store the staged thumbnail for an existing blob, backfilling blobs that predate thumbnails."""
+    if not result.thumbnail_path:
+        return
+    staged = Path(result.thumbnail_path)
+    thumb_key = _thumbnail_rel_path(blob.sha256)
+    if blob.thumbnail_path is None:
+        storage = storage_for(blob.local_path)
+        blob.thumbnail_path = storage.store(staged, thumb_key, content_type="image/jpeg")
+        blob.thumbnail_url = storage.public_url(blob.thumbnail_path)
+        return
+    storage = storage_for(blob.thumbnail_path)
+    storage.store(staged, storage.key_for(blob.thumbnail_path), content_type="image/jpeg")
+
+
+def _attach_blob(db: Session, result: DownloadResult, *, refs: int = 1) -> MediaBlob:
+    """Find or create the blob for ``result.sha256`` and take ``refs`` references on it.
+
+    The blob row is locked while the file is stored so that a concurrent cleanup
+    cannot delete it between our existence check and the reference increment.
+    """
+    temp_path = Path(result.temp_path)
+    for _ in range(2):
+        blob = (
+            db.query(MediaBlob)
+            .filter(MediaBlob.sha256 == result.sha256)
+            .with_for_update()
+            .one_or_none()
+        )
+        if blob is not None:
+            # Re-stores the object if it went missing; otherwise just discards the staged copy.
+            storage = storage_for(blob.local_path)
+            storage.store(temp_path, storage.key_for(blob.local_path), content_type=blob.content_type)
+            _place_thumbnail(blob, result)
+            if blob.phash is None and result.phash is not None:
+                blob.phash = result.phash
+            blob.ref_count = blob.ref_count + refs
+            db.add(blob)
+            return blob
+
+        storage = get_storage()
+        key = _blob_rel_path(result.sha256, result.content_type)
+        location = storage.location(key)
+        blob = MediaBlob(
+            id=uuid.uuid4(),
+            sha256=result.sha256,
+            content_type=result.content_type,
+            bytes=result.bytes,
+            local_path=location,
+            public_url=storage.public_url(location),
+            phash=result.phash,
+            ref_count=refs,
+        )
+        if result.thumbnail_path:
+            blob.thumbnail_path = storage.location(_thumbnail_rel_path(result.sha256))
+            blob.thumbnail_url = storage.public_url(blob.thumbnail_path)
+        nested = db.begin_nested()
+        try:
+            db.add(blob)
+            nested.commit()
+        except IntegrityError:
+            # Another worker inserted the same content first; take a reference on theirs.
+            nested.rollback()
+            continue
+        storage.store(temp_path, key, content_type=result.content_type)
+        if result.thumbnail_path:
+            storage.store(Path(result.thumbnail_path), _thumbnail_rel_path(result.sha256), content_type="image/jpeg")
+        return blob
+    raise RuntimeError(f"Could not attach media blob sha256={result.sha256}")
+
+
+def _release_blob(db: Session, blob_id: uuid.UUID, *, refs: int = 1) -> list[str]:
+    """Drop ``refs`` references; the row is deleted with the last one.
+
+    Returns the locations to delete once the caller has committed, so a rolled-back
+    transaction never leaves a blob row pointing at a missing object.
+    """
+    blob = db.query(MediaBlob).filter(MediaBlob.id == blob_id).with_for_update().one_or_none()
+    if blob is None:
+        return []
+    blob.ref_count = blob.ref_count - refs
+    if blob.ref_count > 0:
+        db.add(blob)
+        return []
+    db.delete(blob)
+    db.flush()
+    return [p for p in (blob.local_path, blob.thumbnail_path) if p]
+
+
+def _delete_quietly(locations: list[str]) -> None:
+    for location in locations:
+        try:
+            storage_for(location).delete(location)
+        except Exception:
+            # Best-effort; local leftovers are picked up by the orphan sweep.
+            logger.warning("Could not delete media object %s", location, exc_info=True)
 
 
 def mark_asset_available(db: Session, asset: MediaAsset, result: DownloadResult) -> MediaAsset:
+    blob = _attach_blob(db, result)
     asset.content_type = result.content_type
     asset.bytes = result.bytes
     asset.sha256 = result.sha256
-    asset.local_path = result.local_path
-    asset.public_url = result.public_url
+    asset.blob_id = blob.id
+    asset.local_path = blob.local_path
+    asset.public_url = blob.public_url
     asset.status = "available"
     asset.error_message = None
     db.add(asset)
@@ -124,26 +442,339 @@ def mark_asset_failed(db: Session, asset: MediaAsset, *, error_message: str) ->
     return asset
 
 
-def cleanup_old_assets(db: Session) -> int:
+@dataclass
+class BatchDownloadResult:
+    claimed: int = 0
+    reused: int = 0
+    downloaded: int = 0
+    deferred: int = 0
+    failed: list[tuple[MediaAsset, str]] = field(default_factory=list)
+    # Assets that became available in this batch (downloaded or reused).
+    available: list[uuid.UUID] = field(default_factory=list)
+
+
+def _claimable(now: datetime) -> ColumnElement[bool]:
+    """Pending assets, and claims a lost worker left behind."""
+    stale_before = now - timedelta(seconds=_CLAIM_STALE_AFTER_SEC)
+    return or_(
+        MediaAsset.status == "pending",
+        and_(MediaAsset.status == "downloading", MediaAsset.claimed_at < stale_before),
+    )
+
+
+def claim_asset(db: Session, asset_id: uuid.UUID) -> MediaAsset | None:
+    """Claim one asset for the per-asset download task; None if it is not claimable.
+
+    Same conditional ``pending -> downloading`` transition as the batch claim, so the
+    task and the batch sweeper never download one asset twice. Failed assets can be
+    claimed too: they are what the task's retries (and dead-letter replays) redo.
+    """
+    now = datetime.now(tz=timezone.utc)
+    claimed = db.execute(
+        update(MediaAsset)
+        .where(MediaAsset.id == asset_id, or_(MediaAsset.status == "failed", _claimable(now)))
+        .values(status="downloading", claimed_at=now)
+        .returning(MediaAsset.id)
+        .execution_options(synchronize_session=False)
+    ).scalar_one_or_none()
+    db.commit()
+    if claimed is None:
+        return None
+    return db.execute(
+        select(MediaAsset).where(MediaAsset.id == asset_id).execution_options(populate_existing=True)
+    ).scalar_one()
+
+
+def release_asset_claim(db: Session, asset: MediaAsset) -> None:
+    """Hand a claimed asset back as ``pending`` (unless someone else has moved it on)."""
+    db.execute(
+        update(MediaAsset)
+        .where(MediaAsset.id == asset.id, MediaAsset.status == "downloading")
+        .values(status="pending", claimed_at=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def claim_pending_assets(db: Session, *, limit: int) -> list[MediaAsset]:
+    """Claim up to ``limit`` pending assets (and stale claims) for this worker.
+
+    Uses ``SELECT ... FOR UPDATE SKIP LOCKED`` so concurrent batch workers never
+    claim the same rows.
+    """
+    now = datetime.now(tz=timezone.utc)
+    ids = (
+        db.execute(
+            select(MediaAsset.id)
+            .where(_claimable(now))
+            .order_by(MediaAsset.created_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        .scalars()
+        .all()
+    )
+    if not ids:
+        db.commit()
+        return []
+    db.execute(
+        update(MediaAsset)
+        .where(MediaAsset.id.in_(ids))
+        .values(status="downloading", claimed_at=now)
+    )
+    db.commit()
+    return db.query(MediaAsset).filter(MediaAsset.id.in_(ids)).all()
+
+
+def _download_concurrently(assets: list[MediaAsset]) -> dict[uuid.UUID, DownloadResult | Exception]:
+    """Download ``assets`` over one pooled client, bounded overall and per host."""
     settings = get_settings()
-    cutoff = datetime.now(tz=timezone.utc) - timedelta(days=settings.media_retention_days)
-    q = (
-        db.query(MediaAsset)
-        .filter(MediaAsset.status == "available")
-        .filter(MediaAsset.created_at < cutoff)
+    per_host = {
+        urlsplit(a.source_url).hostname or "": threading.BoundedSemaphore(settings.media_download_per_host)
+        for a in assets
+    }
+
+    def _one(client: httpx.Client, asset: MediaAsset) -> DownloadResult:
+        with per_host[urlsplit(asset.source_url).hostname or ""]:
+            return download_asset(None, asset, client=client)
+
+    out: dict[uuid.UUID, DownloadResult | Exception] = {}
+    limits = httpx.Limits(
+        max_connections=settings.media_download_concurrency,
+        max_keepalive_connections=settings.media_download_concurrency,
     )
-    assets = q.all()
-    deleted = 0
+    with (
+        httpx.Client(timeout=30, follow_redirects=True, limits=limits) as client,
+        ThreadPoolExecutor(max_workers=settings.media_download_concurrency) as pool,
+    ):
+        # Run in copies of the caller's context so per-task accounting sees the downloads.
+        futures = {a.id: pool.submit(contextvars.copy_context().run, _one, client, a) for a in assets}
+        for asset_id, fut in futures.items():
+            try:
+                out[asset_id] = fut.result()
+            except Exception as e:  # noqa: BLE001
+                out[asset_id] = e
+    return out
+
+
+def download_pending_assets(db: Session, *, limit: int) -> BatchDownloadResult:
+    """Claim a batch of pending assets, download them concurrently and mark them in bulk.
+
+    Assets sharing a source URL are fetched once; URLs already downloaded recently
+    are reused, and URLs being fetched by another worker are returned to ``pending``.
+    """
+    out = BatchDownloadResult()
+    assets = claim_pending_assets(db, limit=limit)
+    out.claimed = len(assets)
+    if not assets:
+        return out
+
+    groups: dict[str, list[MediaAsset]] = {}
     for a in assets:
-        try:
-            Path(a.local_path).unlink(missing_ok=True)
-        except Exception:
-            # Best-effort.
-            pass
-        a.status = "deleted"
-        db.add(a)
-        deleted += 1
-    if deleted:
+        if a.source_key is None:
+            a.source_key = source_key(a.source_url)
+        if _reuse_recent_blob(db, a):
+            out.reused += 1
+            out.available.append(a.id)
+            continue
+        groups.setdefault(a.source_key, []).append(a)
+    db.commit()
+
+    leaders: list[MediaAsset] = []
+    rows: list[dict[str, object]] = []
+    deferred: list[uuid.UUID] = []
+    for key, group in groups.items():
+        if acquire_download_slot(key, group[0].id):
+            leaders.append(group[0])
+        else:
+            # Lost the single-flight race: not an attempt.
+            out.deferred += len(group)
+            deferred.extend(a.id for a in group)
+
+    try:
+        results = _download_concurrently(leaders)
+        for leader in leaders:
+            group = groups[leader.source_key]
+            res = results[leader.id]
+            if isinstance(res, DownloadResult):
+                blob = _attach_blob(db, res, refs=len(group))
+                out.downloaded += len(group)
+                out.available.extend(a.id for a in group)
+                rows.extend(
+                    {
+                        "id": a.id,
+                        "content_type": res.content_type,
+                        "bytes": res.bytes,
+                        "sha256": res.sha256,
+                        "blob_id": blob.id,
+                        "local_path": blob.local_path,
+                        "public_url": blob.public_url,
+                        "status": "available",
+                        "error_message": None,
+                        "download_attempts": a.download_attempts + 1,
+                    }
+                    for a in group
+                )
+                continue
+            msg = str(res)[:2000] or res.__class__.__name__
+            for a in group:
+                attempts = a.download_attempts + 1
+                if isinstance(res, MediaDownloadError) or attempts >= _MAX_DOWNLOAD_ATTEMPTS:
+                    rows.append({"id": a.id, "status": "failed", "error_message": msg, "download_attempts": attempts})
+                    out.failed.append((a, msg))
+                else:
+                    rows.append({"id": a.id, "status": "pending", "error_message": msg, "download_attempts": attempts})
+        if rows:
+            db.execute(update(MediaAsset), rows)
+        if deferred:
+            # Only while still ours: the per-asset task may have finished it meanwhile.
+            db.execute(
+                update(MediaAsset)
+                .where(MediaAsset.id.in_(deferred), MediaAsset.status == "downloading")
+                .values(status="pending")
+                .execution_options(synchronize_session=False)
+            )
+        db.commit()
+    finally:
+        for leader in leaders:
+            release_download_slot(leader.source_key, leader.id)
+    return out
+
+
+def cleanup_old_assets(db: Session, *, batch_size: int | None = None) -> int:
+    """Mark available assets past ``media_retention_days`` deleted and release their files.
+
+    Expired rows are walked in ``(created_at, id)`` keyset order, one committed
+    batch at a time, so memory and transaction length stay bounded. Processed rows
+    leave the ``available`` state, which makes an interrupted run resumable: the
+    next run simply starts from the oldest remaining row.
+    """
+    settings = get_settings()
+    batch_size = batch_size or settings.media_cleanup_batch_size
+    cutoff = datetime.now(tz=timezone.utc) - timedelta(days=settings.media_retention_days)
+    cursor: tuple[datetime, uuid.UUID] | None = None
+    deleted = 0
+    while True:
+        q = (
+            select(MediaAsset.id, MediaAsset.created_at, MediaAsset.blob_id, MediaAsset.local_path)
+            .where(MediaAsset.status == "available", MediaAsset.created_at < cutoff)
+            .order_by(MediaAsset.created_at, MediaAsset.id)
+            .limit(batch_size)
+        )
+        if cursor is not None:
+            q = q.where(tuple_(MediaAsset.created_at, MediaAsset.id) > tuple_(*cursor))
+        rows = db.execute(q).all()
+        if not rows:
+            break
+        cursor = (rows[-1].created_at, rows[-1].id)
+
+        to_unlink: list[str] = []
+        blob_refs = Counter(r.blob_id for r in rows if r.blob_id is not None)
+        # Lock blobs in a stable order so concurrent cleanups cannot deadlock.
+        for blob_id in sorted(blob_refs, key=str):
+            to_unlink.extend(_release_blob(db, blob_id, refs=blob_refs[blob_id]))
+        # Legacy per-salon files from before the blob store.
+        to_unlink.extend(r.local_path for r in rows if r.blob_id is None)
+        db.execute(
+            update(MediaAsset)
+            .where(MediaAsset.id.in_([r.id for r in rows]), MediaAsset.status == "available")
+            .values(status="deleted")
+        )
         db.commit()
+        _delete_quietly(to_unlink)
+        deleted += len(rows)
+        if len(rows) < batch_size:
+            break
     return deleted
 
+
+@dataclass
+class OrphanSweepResult:
+    scanned: int = 0
+    removed: int = 0
+    quarantined: int = 0
+    bytes: int = 0
+
+
+def _iter_media_files(root: Path, *, skip: set[Path]) -> Iterator[os.DirEntry]:
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        try:
+            entries = list(os.scandir(current))
+        except FileNotFoundError:
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if Path(entry.path) not in skip:
+                    stack.append(Path(entry.path))
+            elif entry.is_file(follow_symlinks=False):
+                yield entry
+
+
+def _live_paths(db: Session, paths: list[str]) -> set[str]:
+    live = set(
+        db.execute(
+            select(MediaAsset.local_path).where(MediaAsset.local_path.in_(paths), MediaAsset.status != "deleted")
+        ).scalars()
+    )
+    live.update(db.execute(select(MediaBlob.local_path).where(MediaBlob.local_path.in_(paths))).scalars())
+    live.update(db.execute(select(MediaBlob.thumbnail_path).where(MediaBlob.thumbnail_path.in_(paths))).scalars())
+    return live
+
+
+def sweep_orphan_files(
+    db: Session,
+    *,
+    dry_run: bool,
+    grace_hours: int | None = None,
+    batch_size: int = 500,
+) -> OrphanSweepResult:
+    """Remove files under ``media_root`` that no live MediaAsset or MediaBlob points at.
+
+    Files younger than the grace period are skipped so in-flight downloads are not
+    touched. With ``dry_run`` orphans are moved to ``<media_root>/_quarantine``
+    (same relative path) instead of being deleted.
+    """
+    settings = get_settings()
+    root = Path(settings.media_root)
+    quarantine = root / _QUARANTINE_DIR
+    grace = timedelta(hours=settings.media_orphan_grace_hours if grace_hours is None else grace_hours)
+    cutoff = (datetime.now(tz=timezone.utc) - grace).timestamp()
+    out = OrphanSweepResult()
+
+    def _flush(batch: list[os.DirEntry]) -> None:
+        live = _live_paths(db, [e.path for e in batch])
+        db.rollback()
+        for entry in batch:
+            if entry.path in live:
+                continue
+            try:
+                size = entry.stat(follow_symlinks=False).st_size
+                if dry_run:
+                    dest = quarantine / Path(entry.path).relative_to(root)
+                    ensure_dir(dest.parent)
+                    os.replace(entry.path, dest)
+                    out.quarantined += 1
+                else:
+                    os.unlink(entry.path)
+                    out.removed += 1
+                out.bytes += size
+            except FileNotFoundError:
+                continue
+
+    batch: list[os.DirEntry] = []
+    for entry in _iter_media_files(root, skip={quarantine}):
+        out.scanned += 1
+        try:
+            if entry.stat(follow_symlinks=False).st_mtime > cutoff:
+                continue
+        except FileNotFoundError:
+            continue
+        batch.append(entry)
+        if len(batch) >= batch_size:
+            _flush(batch)
+            batch = []
+    if batch:
+        _flush(batch)
+    return out
@@ -0,0 +1,158 @@
+"""Near-duplicate media detection per GBP location using the blobs' perceptual hashes.
+
+The same photo often arrives from HotPepper style pages and Instagram at different
+resolutions, so byte-identical blob matching misses it. Each blob stores a 64-bit
+dHash; candidates are found through four 16-bit band indexes (any two hashes within
+3 bits share at least one band) and then filtered by Hamming distance.
+"""
+from __future__ import annotations
+
+import logging
+import uuid
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from sqlalchemy import ColumnElement, literal_column, or_, select
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.models.gbp_media_upload import GbpMediaUpload
+from app.models.gbp_post import GbpPost
+from app.models.media_asset import MediaAsset
+from app.models.media_blob import MediaBlob
+from app.services.image_processing import hamming_distance
+
+logger = logging.getLogger(__name__)
+
+
+_BAND_SHIFTS = (48, 32, 16, 0)
+# The band lookup only guarantees recall up to this distance.
+MAX_DISTANCE = len(_BAND_SHIFTS) - 1
+
+# Media that is (or will be) on the location. ``committed`` excludes items still awaiting review.
+_UPLOAD_STATUSES = ("pending", "scheduled", "queued", "uploading", "uploaded")
+_POST_STATUSES = ("pending", "scheduled", "queued", "posting", "posted")
+_COMMITTED_UPLOAD_STATUSES = ("uploading", "uploaded")
+_COMMITTED_POST_STATUSES = ("posting", "posted")
+
+
+@dataclass(frozen=True)
+class NearDuplicate:
+    kind: str  # upload / post
+    id: uuid.UUID
+    distance: int
+
+    def describe(self) -> str:
+        return f"{self.kind} {self.id} (distance {self.distance})"
+
+
+def _band_match(phash: int) -> ColumnElement[bool]:
+    return or_(
+        *(
+            MediaBlob.phash.op(">>")(literal_column(str(shift))).op("&")(literal_column("65535"))
+            == ((phash >> shift) & 0xFFFF)
+            for shift in _BAND_SHIFTS
+        )
+    )
+
+
+def find_near_duplicate(
+    db: Session,
+    *,
+    location_id: uuid.UUID,
+    phash: int,
+    exclude_upload_id: uuid.UUID | None = None,
+    committed: bool = False,
+) -> NearDuplicate | None:
+    """Closest media upload or post image at ``location_id`` within the configured distance."""
+    settings = get_settings()
+    threshold = min(settings.media_near_duplicate_distance, MAX_DISTANCE)
+    upload_statuses = _COMMITTED_UPLOAD_STATUSES if committed else _UPLOAD_STATUSES
+    post_statuses = _COMMITTED_POST_STATUSES if committed else _POST_STATUSES
+
+    uploads = (
+        select(GbpMediaUpload.id, MediaBlob.phash)
+        .join(MediaAsset, GbpMediaUpload.media_asset_id == MediaAsset.id)
+        .join(MediaBlob, MediaAsset.blob_id == MediaBlob.id)
+        .where(
+            GbpMediaUpload.gbp_location_id == location_id,
+            GbpMediaUpload.status.in_(upload_statuses),
+            _band_match(phash),
+        )
+    )
+    if exclude_upload_id is not None:
+        uploads = uploads.where(GbpMediaUpload.id != exclude_upload_id)
+    posts = (
+        select(GbpPost.id, MediaBlob.phash)
+        .join(MediaAsset, GbpPost.image_asset_id == MediaAsset.id)
+        .join(MediaBlob, MediaAsset.blob_id == MediaBlob.id)
+        .where(
+            GbpPost.gbp_location_id == location_id,
+            GbpPost.status.in_(post_statuses),
+            _band_match(phash),
+        )
+    )
+
+    best: NearDuplicate | None = None
+    for kind, stmt in (("upload", uploads), ("post", posts)):
+        for row_id, other in db.execute(stmt):
+            d = hamming_distance(phash, other)
+            if d <= threshold and (best is None or d < best.distance):
+                best = NearDuplicate(kind=kind, id=row_id, distance=d)
+    return best
+
+
+def _upload_phash(db: Session, up: GbpMediaUpload) -> int | None:
+    return db.execute(
+        select(MediaBlob.phash)
+        .join(MediaAsset, MediaAsset.blob_id == MediaBlob.id)
+        .where(MediaAsset.id == up.media_asset_id)
+    ).scalar_one_or_none()
+
+
+def apply_near_duplicate_policy(db: Session, uploads: Iterable[GbpMediaUpload]) -> int:
+    """Skip or flag pending uploads that nearly duplicate media already at their location.
+
+    ``MEDIA_NEAR_DUPLICATE_ACTION``: ``skip`` marks them skipped, ``flag`` leaves them
+    pending with a note for the reviewer, ``off`` disables the check. Uploads whose
+    image has not been downloaded yet are left alone. Does not commit.
+    """
+    action = get_settings().media_near_duplicate_action
+    if action not in ("skip", "flag"):
+        return 0
+    matched = 0
+    for up in uploads:
+        if up.status != "pending":
+            continue
+        phash = _upload_phash(db, up)
+        if phash is None:
+            continue
+        dup = find_near_duplicate(db, location_id=up.gbp_location_id, phash=phash, exclude_upload_id=up.id)
+        if dup is None:
+            continue
+        matched += 1
+        if action == "skip":
+            up.status = "skipped"
+            up.error_message = f"Near-duplicate of {dup.describe()}"
+        else:
+            up.error_message = f"Possible near-duplicate of {dup.describe()}"
+        db.add(up)
+        logger.info("Near-duplicate upload_id=%s matches %s action=%s", up.id, dup.describe(), action)
+    return matched
+
+
+def check_uploads_for_assets(db: Session, asset_ids: Iterable[uuid.UUID]) -> int:
+    """Apply the near-duplicate policy to pending uploads of freshly downloaded assets and commit."""
+    ids = list(asset_ids)
+    if not ids:
+        return 0
+    uploads = (
+        db.query(GbpMediaUpload)
+        .filter(GbpMediaUpload.media_asset_id.in_(ids))
+        .filter(GbpMediaUpload.status == "pending")
+        .order_by(GbpMediaUpload.created_at, GbpMediaUpload.id)
+        .all()
+    )
+    matched = apply_near_duplicate_policy(db, uploads)
+    db.commit()
+    return matched
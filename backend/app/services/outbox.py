@@ -0,0 +1,113 @@
+"""Transactional outbox for Celery tasks.
+
+Code that changes state and needs a task (approve -> ``post_gbp_post``) adds a
+``TaskOutbox`` row in the same transaction instead of calling ``delay()`` after the
+commit, so a broker outage or a crash in between can no longer strand the row in
+``queued``. The relay publishes unsent rows in batches over one producer connection
+and marks them sent; it runs from beat and is kicked right after API requests.
+
+Delivery is at-least-once: a crash between publishing and marking sent republishes
+the batch, which the tasks' status CAS claims already tolerate.
+"""
+from __future__ import annotations
+
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.models.task_outbox import TaskOutbox
+from app.worker.celery_app import celery_app
+
+logger = logging.getLogger(__name__)
+
+GBP_POST_TASK = "app.worker.tasks.post_gbp_post"
+GBP_MEDIA_TASK = "app.worker.tasks.upload_gbp_media"
+
+# Upper bound on batches per relay run, so a busy outbox cannot pin one run forever.
+_MAX_BATCHES = 20
+
+
+def _now() -> datetime:
+    return datetime.now(tz=timezone.utc)
+
+
+def enqueue_task(db: Session, task_name: str, *args: Any) -> TaskOutbox:
+    """Stage ``task_name(*args)`` for publishing once the caller's transaction commits. Does not commit."""
+    row = TaskOutbox(id=uuid.uuid4(), task_name=task_name, args=list(args))
+    db.add(row)
+    return row
+
+
+def relay_outbox(db: Session, *, batch_size: int | None = None) -> int:
+    """Publish unsent outbox rows to the broker; returns how many were sent.
+
+    Rows are claimed with ``FOR UPDATE SKIP LOCKED`` so concurrent relays split the
+    work. The outbox row id doubles as the Celery task id.
+    """
+    size = batch_size or get_settings().outbox_relay_batch_size
+    total = 0
+    for _ in range(_MAX_BATCHES):
+        rows = (
+            db.execute(
+                select(TaskOutbox)
+                .where(TaskOutbox.sent_at.is_(None))
+                .order_by(TaskOutbox.created_at, TaskOutbox.id)
+                .limit(size)
+                .with_for_update(skip_locked=True)
+            )
+            .scalars()
+            .all()
+        )
+        if not rows:
+            break
+        sent = 0
+        try:
+            with celery_app.producer_or_acquire() as producer:
+                for row in rows:
+                    celery_app.send_task(row.task_name, args=row.args, task_id=str(row.id), producer=producer)
+                    row.sent_at = _now()
+                    sent += 1
+        except Exception as e:  # noqa: BLE001
+            failed = rows[sent]
+            failed.attempts += 1
+            failed.last_error = str(e)[:2000]
+            db.commit()
+            total += sent
+            logger.warning("Outbox relay stopped after %d tasks: %s", total, e)
+            return total
+        db.commit()
+        total += sent
+        if len(rows) < size:
+            break
+    if total:
+        logger.info("Outbox relay published %d tasks", total)
+    return total
+
+
+def kick_relay() -> None:
+    """Relay right away (FastAPI background task); beat picks up anything this misses."""
+    from app.db.session import SessionLocal
+
+    try:
+        with SessionLocal() as db:
+            relay_outbox(db)
+    except Exception:  # noqa: BLE001
+        logger.exception("Outbox relay kick failed")
+
+
+def purge_sent(db: Session, *, older_than: timedelta | None = None) -> int:
+    """Delete rows published more than ``older_than`` ago (default ``OUTBOX_RETENTION_HOURS``)."""
+    if older_than is None:
+        older_than = timedelta(hours=get_settings().outbox_retention_hours)
+    result = db.execute(
+        delete(TaskOutbox)
+        .where(TaskOutbox.sent_at.is_not(None), TaskOutbox.sent_at < _now() - older_than)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount or 0
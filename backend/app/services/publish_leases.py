@@ -0,0 +1,165 @@
+"""Leases on claimed GBP posts / media uploads, and the reaper for expired ones.
+
+``post_gbp_post`` / ``upload_gbp_media`` claim a row by moving it to ``posting`` /
+``uploading``; the claim also records who holds it and until when. A worker killed
+mid-publish (OOM, deploy, node loss) never releases its claim, so the reaper returns
+rows whose lease ran out to ``queued`` and stages their tasks in the outbox, all in one
+``UPDATE ... RETURNING`` per table. Rows reaped ``GBP_PUBLISH_MAX_REAPS`` times are
+failed with an alert instead, so a row that kills its worker cannot loop forever.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session, aliased
+
+from app.core.config import get_settings
+from app.models.gbp_connection import GbpConnection
+from app.models.gbp_location import GbpLocation
+from app.models.gbp_media_upload import GbpMediaUpload
+from app.models.gbp_post import GbpPost
+from app.models.media_asset import MediaAsset
+from app.services.alerts import create_alert
+from app.services.outbox import GBP_MEDIA_TASK, GBP_POST_TASK, enqueue_task
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class _Leased:
+    model: Any
+    claimed_status: str
+    task_name: str
+    alert_type: str
+    entity_type: str
+
+
+_LEASED = (
+    _Leased(GbpPost, "posting", GBP_POST_TASK, "gbp_post_failed", "gbp_post"),
+    _Leased(GbpMediaUpload, "uploading", GBP_MEDIA_TASK, "gbp_media_failed", "gbp_media_upload"),
+)
+
+
+def _now() -> datetime:
+    return datetime.now(tz=timezone.utc)
+
+
+def lease_owner(task_id: str | None) -> str:
+    """Identify the claiming worker as ``host:pid:task_id`` for debugging stuck rows."""
+    return f"{socket.gethostname()}:{os.getpid()}:{task_id or '-'}"[:200]
+
+
+def lease_expiry() -> datetime:
+    return _now() + timedelta(seconds=get_settings().gbp_publish_lease_sec)
+
+
+def claim_for_publish(
+    db: Session,
+    model: type[GbpPost] | type[GbpMediaUpload],
+    row_id: str,
+    *,
+    claimed_status: str,
+    asset_column: str,
+    owner: str,
+) -> tuple[Any, GbpLocation, GbpConnection, MediaAsset | None] | None:
+    """Claim a queued / pending row and load its location, connection and asset in one query.
+
+    Returns None if another worker got the row first. A row claimed here whose location or
+    connection is gone is failed on the spot rather than left for the reaper.
+    """
+    claimed = (
+        update(model)
+        .where(model.id == uuid.UUID(row_id))
+        .where(model.status.in_(["queued", "pending"]))
+        .values(status=claimed_status, lease_owner=owner, lease_expires_at=lease_expiry())
+        .returning(*model.__table__.c)
+        .cte("claimed")
+    )
+    # The CTE's RETURNING carries the post-update row, so the aliased entity loads as a
+    # normal persistent instance with the claimed status.
+    row = aliased(model, claimed)
+    result = db.execute(
+        select(row, GbpLocation, GbpConnection, MediaAsset)
+        .join(GbpLocation, GbpLocation.id == row.gbp_location_id)
+        .join(GbpConnection, GbpConnection.id == GbpLocation.gbp_connection_id)
+        .outerjoin(MediaAsset, MediaAsset.id == getattr(row, asset_column))
+    ).one_or_none()
+    if result is None:
+        # The inner joins hide a row the CTE did claim; only ours matches lease_owner.
+        orphaned = db.execute(
+            update(model)
+            .where(model.id == uuid.UUID(row_id), model.status == claimed_status, model.lease_owner == owner)
+            .values(
+                status="failed",
+                error_message="GBP location or connection not found",
+                lease_owner=None,
+                lease_expires_at=None,
+            )
+            .returning(model.id)
+            .execution_options(synchronize_session=False)
+        ).scalar_one_or_none()
+        if orphaned is not None:
+            logger.warning("%s claimed without a location / connection, failed id=%s", model.__tablename__, row_id)
+    db.commit()
+    return None if result is None else result.tuple()
+
+
+def reap_expired_leases(db: Session) -> dict[str, int]:
+    """Re-queue (or, past the reap limit, fail) claimed rows whose lease expired.
+
+    Returns ``{"requeued": n, "failed": n}``. Re-queued tasks are staged in the
+    outbox; the caller relays them.
+    """
+    max_reaps = get_settings().gbp_publish_max_reaps
+    now = _now()
+    requeued = 0
+    failed: list[tuple[_Leased, uuid.UUID, uuid.UUID]] = []
+    for leased in _LEASED:
+        model = leased.model
+        expired = (model.status == leased.claimed_status, model.lease_expires_at < now)
+        lost = db.execute(
+            update(model)
+            .where(*expired, model.reap_count >= max_reaps)
+            .values(
+                status="failed",
+                error_message=f"Worker lost the publish lease {max_reaps + 1} times",
+                lease_owner=None,
+                lease_expires_at=None,
+            )
+            .returning(model.id, model.salon_id)
+            .execution_options(synchronize_session=False)
+        ).all()
+        failed.extend((leased, row_id, salon_id) for row_id, salon_id in lost)
+
+        ids = db.execute(
+            update(model)
+            .where(*expired, model.reap_count < max_reaps)
+            .values(status="queued", lease_owner=None, lease_expires_at=None, reap_count=model.reap_count + 1)
+            .returning(model.id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        for row_id in ids:
+            enqueue_task(db, leased.task_name, str(row_id))
+        requeued += len(ids)
+    db.commit()
+
+    for leased, row_id, salon_id in failed:
+        create_alert(
+            db,
+            salon_id=salon_id,
+            severity="warning",
+            alert_type=leased.alert_type,
+            message=f"Publishing stopped after the worker was lost {max_reaps + 1} times",
+            entity_type=leased.entity_type,
+            entity_id=row_id,
+        )
+    if requeued or failed:
+        logger.warning("Reaped expired publish leases: %d re-queued, %d failed", requeued, len(failed))
+    return {"requeued": requeued, "failed": len(failed)}
@@ -0,0 +1,246 @@
+"""Per-location publish scheduling for approved GBP posts and media uploads.
+
+Approving used to publish right away, so approving a seed backlog sent dozens of
+items to one location within seconds. Now approve / retry give each item a slot
+(``scheduled_at``) after the location's recent and already-scheduled items:
+items are at least ``1h / per_hour`` apart, at most ``per_day`` land on one local
+calendar day, and none fall in the quiet hours. Items whose slot is now are queued
+immediately; the rest wait in ``scheduled`` until the beat dispatcher moves due rows
+to ``queued`` in bulk and stages their tasks in the outbox. Celery therefore never
+holds ETA tasks for scheduled work.
+"""
+from __future__ import annotations
+
+import logging
+import uuid
+from collections import Counter, defaultdict
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta, timezone, tzinfo
+from typing import Any
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.models.gbp_location import GbpLocation
+from app.models.gbp_media_upload import GbpMediaUpload
+from app.models.gbp_post import GbpPost
+from app.services.outbox import GBP_MEDIA_TASK, GBP_POST_TASK, enqueue_task
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class _Schedulable:
+    model: Any
+    task_name: str
+    claimed_status: str
+    done_at: str
+    # Settings prefix for the per-hour / per-day limits.
+    limits: str
+
+
+_SCHEDULABLE = (
+    _Schedulable(GbpPost, GBP_POST_TASK, "posting", "posted_at", "gbp_schedule_posts"),
+    _Schedulable(GbpMediaUpload, GBP_MEDIA_TASK, "uploading", "uploaded_at", "gbp_schedule_media"),
+)
+
+
+@dataclass(frozen=True)
+class SlotPolicy:
+    per_hour: int
+    per_day: int
+    tz: tzinfo
+    quiet_start: int
+    quiet_end: int
+
+    def is_quiet(self, local: datetime) -> bool:
+        if self.quiet_start == self.quiet_end:
+            return False
+        if self.quiet_start < self.quiet_end:
+            return self.quiet_start <= local.hour < self.quiet_end
+        return local.hour >= self.quiet_start or local.hour < self.quiet_end
+
+    def quiet_over(self, local: datetime) -> datetime:
+        """End of the quiet period ``local`` is in."""
+        day = local.date() if local.hour < self.quiet_end else local.date() + timedelta(days=1)
+        return datetime.combine(day, time(self.quiet_end), tzinfo=self.tz)
+
+
+def _now() -> datetime:
+    return datetime.now(tz=timezone.utc)
+
+
+def _aware(dt: datetime) -> datetime:
+    return dt if dt.tzinfo is not None else dt.replace(tzinfo=timezone.utc)
+
+
+def _spec(model: Any) -> _Schedulable:
+    return next(s for s in _SCHEDULABLE if s.model is model)
+
+
+def _policy(spec: _Schedulable) -> SlotPolicy:
+    settings = get_settings()
+    return SlotPolicy(
+        per_hour=getattr(settings, f"{spec.limits}_per_hour"),
+        per_day=getattr(settings, f"{spec.limits}_per_day"),
+        tz=ZoneInfo(settings.gbp_schedule_timezone),
+        quiet_start=settings.gbp_schedule_quiet_start_hour,
+        quiet_end=settings.gbp_schedule_quiet_end_hour,
+    )
+
+
+def next_slots(taken: Sequence[datetime], count: int, *, now: datetime, policy: SlotPolicy) -> list[datetime]:
+    """``count`` slots after the location's ``taken`` times (recent and upcoming) under ``policy``."""
+    gap = timedelta(hours=1) / policy.per_hour if policy.per_hour > 0 else timedelta(0)
+    per_day = Counter(t.astimezone(policy.tz).date() for t in taken)
+    last = max(taken, default=None)
+    slots: list[datetime] = []
+    for _ in range(count):
+        slot = now if last is None else max(now, last + gap)
+        while True:
+            local = slot.astimezone(policy.tz)
+            if policy.is_quiet(local):
+                slot = policy.quiet_over(local).astimezone(timezone.utc)
+            elif policy.per_day > 0 and per_day[local.date()] >= policy.per_day:
+                next_day = datetime.combine(local.date() + timedelta(days=1), time(0), tzinfo=policy.tz)
+                slot = next_day.astimezone(timezone.utc)
+            else:
+                break
+        per_day[local.date()] += 1
+        slots.append(slot)
+        last = slot
+    return slots
+
+
+def _taken_slots(
+    db: Session, spec: _Schedulable, location_id: uuid.UUID, exclude: list[uuid.UUID], since: datetime
+) -> list[datetime]:
+    model = spec.model
+    done_at = getattr(model, spec.done_at)
+    upcoming = db.execute(
+        select(model.scheduled_at).where(
+            model.gbp_location_id == location_id,
+            model.status.in_(("scheduled", "queued", spec.claimed_status)),
+            model.scheduled_at >= since,
+            model.id.notin_(exclude),
+        )
+    ).scalars()
+    published = db.execute(
+        select(done_at).where(model.gbp_location_id == location_id, done_at >= since)
+    ).scalars()
+    return [_aware(t) for t in (*upcoming, *published) if t is not None]
+
+
+def schedule_publish(db: Session, rows: Sequence[Any]) -> dict[uuid.UUID, str]:
+    """Give approved ``rows`` (one model) their slots; queue and stage the ones due now.
+
+    Returns each row's new status (``queued`` or ``scheduled``). Does not commit.
+    """
+    if not rows:
+        return {}
+    spec = _spec(type(rows[0]))
+    policy = _policy(spec)
+    now = _now()
+    by_location: dict[uuid.UUID, list[Any]] = defaultdict(list)
+    for row in rows:
+        by_location[row.gbp_location_id].append(row)
+
+    statuses: dict[uuid.UUID, str] = {}
+    for location_id, items in by_location.items():
+        items.sort(key=lambda r: (r.created_at or now, str(r.id)))
+        if policy.per_hour <= 0 and policy.per_day <= 0 and policy.quiet_start == policy.quiet_end:
+            slots = [now] * len(items)
+        else:
+            # Serialise slot assignment per location.
+            db.execute(select(GbpLocation.id).where(GbpLocation.id == location_id).with_for_update())
+            taken = _taken_slots(db, spec, location_id, [r.id for r in items], now - timedelta(days=1))
+            slots = next_slots(taken, len(items), now=now, policy=policy)
+        for row, slot in zip(items, slots):
+            row.scheduled_at = slot
+            if slot <= now:
+                row.status = "queued"
+                enqueue_task(db, spec.task_name, str(row.id))
+            else:
+                row.status = "scheduled"
+            db.add(row)
+            statuses[row.id] = row.status
+    return statuses
+
+
+def reschedule_claimed(
+    db: Session, model: Any, row_id: uuid.UUID, *, claimed_status: str, delay: float, **values: Any
+) -> bool:
+    """Hand a claimed row back as ``scheduled`` ``delay`` seconds from now, dropping its lease.
+
+    The beat dispatcher re-queues it when due, so the retry goes through the outbox
+    rather than a Celery countdown. ``values`` are set alongside. False if the claim
+    was already lost. Does not commit.
+    """
+    moved = db.execute(
+        update(model)
+        .where(model.id == row_id, model.status == claimed_status)
+        .values(
+            status="scheduled",
+            scheduled_at=_now() + timedelta(seconds=delay),
+            lease_owner=None,
+            lease_expires_at=None,
+            **values,
+        )
+        .returning(model.id)
+        .execution_options(synchronize_session=False)
+    ).scalar_one_or_none()
+    return moved is not None
+
+
+def back_off_rate_limited(db: Session, row: Any, *, claimed_status: str, limit: int) -> int | None:
+    """Reschedule a claimed ``row`` that got a GBP 429, backing off exponentially.
+
+    Returns the delay in seconds, or None once ``row`` has been pushed back ``limit``
+    times (the caller fails it). Does not commit.
+    """
+    if row.rate_limit_count >= limit:
+        return None
+    delay = min(600, 30 * 2**row.rate_limit_count)
+    reschedule_claimed(
+        db,
+        type(row),
+        row.id,
+        claimed_status=claimed_status,
+        delay=delay,
+        error_message=None,
+        rate_limit_count=row.rate_limit_count + 1,
+    )
+    return delay
+
+
+def dispatch_due(db: Session, *, batch_size: int | None = None) -> int:
+    """Move ``scheduled`` rows whose slot is due to ``queued`` and stage their tasks; commits."""
+    size = batch_size or get_settings().gbp_schedule_dispatch_batch
+    now = _now()
+    total = 0
+    for spec in _SCHEDULABLE:
+        model = spec.model
+        due = (
+            select(model.id)
+            .where(model.status == "scheduled", model.scheduled_at <= now)
+            .order_by(model.scheduled_at)
+            .limit(size)
+            .with_for_update(skip_locked=True)
+        )
+        ids = db.execute(
+            update(model)
+            .where(model.id.in_(due))
+            .values(status="queued")
+            .returning(model.id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        for row_id in ids:
+            enqueue_task(db, spec.task_name, str(row_id))
+        total += len(ids)
+    db.commit()
+    if total:
+        logger.info("Dispatched %d scheduled GBP publishes", total)
+    return total
@@ -1,25 +1,106 @@
 from __future__ import annotations
 
+import logging
+from typing import Any
+
 from celery import Celery
+from celery.signals import worker_init
 
-from app.core.config import get_settings
+from app.core.config import Settings, get_settings
 from app.core.logging import setup_logging
 
 
 settings = get_settings()
 setup_logging(settings.log_level, app_env=settings.app_env)
 
+
+def result_backend_url(s: Settings) -> str:
+    backend = s.celery_result_backend
+    if not backend:
+        return s.redis_url
+    if backend == "database":
+        return f"db+{s.database_url}"
+    return backend
+
+
 celery_app = Celery(
     "salon_gbp_system",
     broker=settings.redis_url,
-    backend=settings.redis_url,
+    backend=result_backend_url(settings),
     include=["app.worker.tasks"],
 )
 
 celery_app.conf.timezone = "UTC"
 
+# Nothing reads AsyncResult: task outcomes live on the rows they act on (post/upload/asset
+# status) and in JobLog. Storing a result per task only filled the Redis instance the broker
+# shares (allkeys-lru), so tasks store none unless they opt in with ignore_result=False, and
+# those that do expire quickly.
+celery_app.conf.task_ignore_result = True
+celery_app.conf.result_expires = settings.celery_result_expires_sec
+
+# Queues, each served by its own worker pool in production (deploy/docker-compose.prod.yml)
+# so a long crawl cannot hold the capacity user-approved publishing needs.
+QUEUE_PUBLISH = "publish"
+QUEUE_MEDIA = "media"
+QUEUE_SCRAPE = "scrape"
+QUEUE_MAINTENANCE = "maintenance"
+
+celery_app.conf.task_default_queue = QUEUE_MAINTENANCE
+celery_app.conf.task_routes = {
+    # Publishing jumps ahead of everything else in its queue (0 is the highest Redis priority).
+    "app.worker.tasks.post_gbp_post": {"queue": QUEUE_PUBLISH, "priority": 0},
+    "app.worker.tasks.upload_gbp_media": {"queue": QUEUE_PUBLISH, "priority": 0},
+    "app.worker.tasks.download_media_asset": {"queue": QUEUE_MEDIA},
+    "app.worker.tasks.download_pending_media_assets": {"queue": QUEUE_MEDIA},
+    "app.worker.tasks.scrape_*": {"queue": QUEUE_SCRAPE},
+    "app.worker.tasks.fetch_instagram_media": {"queue": QUEUE_SCRAPE},
+    # Everything else (outbox relay, scheduler, reaper, token refresh, media cleanup)
+    # falls through to the maintenance queue.
+}
+celery_app.conf.task_default_priority = 5
+celery_app.conf.broker_transport_options = {
+    # Real per-message priorities on the Redis transport, and workers consuming several
+    # queues drain them in the order given to -Q.
+    "priority_steps": list(range(10)),
+    "sep": ":",
+    "queue_order_strategy": "priority",
+}
+# Reserve one task at a time so an hour-long crawl does not sit on prefetched work.
+celery_app.conf.worker_prefetch_multiplier = 1
+
+
+@worker_init.connect
+def _check_thread_pool_db_connections(sender: Any = None, **_kwargs: Any) -> None:
+    """Thread-pool workers run every task in one process; each needs its own DB connection."""
+    pool_cls = getattr(sender, "pool_cls", None)
+    if "thread" not in str(getattr(pool_cls, "__module__", pool_cls)):
+        return
+    available = settings.db_pool_size + settings.db_max_overflow
+    if sender.concurrency > available:
+        logging.getLogger(__name__).warning(
+            "Thread pool concurrency %d exceeds DB connections %d (DB_POOL_SIZE + DB_MAX_OVERFLOW); "
+            "tasks will wait for connections",
+            sender.concurrency,
+            available,
+        )
+
+
 # Periodic tasks (best-effort; adjust in production).
 celery_app.conf.beat_schedule = {
+    # Safety net for outbox rows the API-side relay kick did not publish.
+    "relay-task-outbox-10s": {
+        "task": "app.worker.tasks.relay_task_outbox",
+        "schedule": 10,
+    },
+    "purge-task-outbox-daily": {
+        "task": "app.worker.tasks.purge_task_outbox",
+        "schedule": 24 * 60 * 60,
+    },
+    "purge-job-resource-usage-daily": {
+        "task": "app.worker.tasks.purge_job_resource_usage",
+        "schedule": 24 * 60 * 60,
+    },
     "scrape-hotpepper-blog-4h": {
         "task": "app.worker.tasks.scrape_hotpepper_blog",
         "schedule": 4 * 60 * 60,
@@ -36,10 +117,33 @@ celery_app.conf.beat_schedule = {
         "task": "app.worker.tasks.fetch_instagram_media",
         "schedule": 4 * 60 * 60,
     },
+    # Sweeper for assets whose scrape-time kick was lost or deferred.
+    "download-pending-media-5m": {
+        "task": "app.worker.tasks.download_pending_media_assets",
+        "schedule": 5 * 60,
+    },
     "cleanup-media-assets-daily": {
         "task": "app.worker.tasks.cleanup_media_assets",
         "schedule": 24 * 60 * 60,
     },
+    "sweep-media-orphans-weekly": {
+        "task": "app.worker.tasks.sweep_media_orphans",
+        "schedule": 7 * 24 * 60 * 60,
+    },
+    # Per-location publish slots are minute-granular.
+    "dispatch-scheduled-publishes-1m": {
+        "task": "app.worker.tasks.dispatch_scheduled_publishes",
+        "schedule": 60,
+    },
+    # Re-queue posts/uploads whose worker died holding the claim.
+    "reap-publish-leases-1m": {
+        "task": "app.worker.tasks.reap_publish_leases",
+        "schedule": 60,
+    },
+    "refresh-gbp-tokens-5m": {
+        "task": "app.worker.tasks.refresh_gbp_tokens",
+        "schedule": 5 * 60,
+    },
     "refresh-instagram-tokens-daily": {
         "task": "app.worker.tasks.refresh_instagram_tokens",
         "schedule": 24 * 60 * 60,
@@ -0,0 +1,281 @@
+"""Per-task resource accounting for Celery workers.
+
+``task_prerun`` starts a profile for the task about to run and ``task_postrun`` writes
+it to ``job_resource_usage``: wall time, CPU time, growth of the process' peak RSS,
+HTTP requests and bytes (every sync httpx transport) and DB queries and their time
+(engine cursor events). The beat ticks in ``UNPROFILED_TASKS`` are not recorded: they
+run every few seconds, and their rows would swamp the table.
+
+Figures are split per salon: a task calls ``switch_salon`` when it starts working for
+a salon, and everything measured from then on is charged to that salon until the next
+switch (work before the first switch is not attributed). Tasks that keep a JobLog link
+their rows to it with ``link_job_log``.
+
+CPU time is the process' under prefork, where a child runs one task at a time, so it
+includes the task's helper threads (batch downloads). Under the thread pool it can only
+be the calling thread's: work a task hands to other threads is not counted. Peak RSS is
+process-wide, so under the thread pool its growth is charged to whichever task was
+running when the peak moved.
+"""
+from __future__ import annotations
+
+import contextvars
+import logging
+import resource
+import threading
+import time
+import uuid
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+import httpx
+from celery.signals import task_postrun, task_prerun, worker_init
+from sqlalchemy import delete, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.session import SessionLocal, engine
+from app.models.job_resource_usage import JobResourceUsage
+
+logger = logging.getLogger(__name__)
+
+UNPROFILED_TASKS = frozenset(
+    {
+        "app.worker.tasks.relay_task_outbox",
+        "app.worker.tasks.dispatch_scheduled_publishes",
+        "app.worker.tasks.reap_publish_leases",
+    }
+)
+
+# Switched to process_time for prefork workers in _install_on_worker_init.
+_cpu_clock = time.thread_time
+
+
+@dataclass
+class Usage:
+    wall_ms: float = 0.0
+    cpu_ms: float = 0.0
+    peak_rss_delta_kb: int = 0
+    http_requests: int = 0
+    http_bytes: int = 0
+    db_queries: int = 0
+    db_time_ms: float = 0.0
+
+
+def _peak_rss_kb() -> int:
+    # ru_maxrss is in KiB on Linux.
+    return int(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+class TaskProfile:
+    def __init__(self, task_name: str, task_id: str | None) -> None:
+        self.task_name = task_name
+        self.task_id = task_id
+        self.job_log_id: uuid.UUID | None = None
+        self.salon_id: uuid.UUID | None = None
+        self.usage: dict[uuid.UUID | None, Usage] = {}
+        # HTTP counters may be updated from helper threads (batch downloads).
+        self._lock = threading.Lock()
+        self._mark()
+
+    def _mark(self) -> None:
+        self._wall = time.perf_counter()
+        self._cpu = _cpu_clock()
+        self._rss = _peak_rss_kb()
+
+    def _current(self) -> Usage:
+        return self.usage.setdefault(self.salon_id, Usage())
+
+    def _close_segment(self) -> None:
+        u = self._current()
+        u.wall_ms += (time.perf_counter() - self._wall) * 1000
+        u.cpu_ms += (_cpu_clock() - self._cpu) * 1000
+        u.peak_rss_delta_kb += max(0, _peak_rss_kb() - self._rss)
+
+    def switch_salon(self, salon_id: uuid.UUID | None) -> None:
+        with self._lock:
+            if salon_id == self.salon_id:
+                return
+            self._close_segment()
+            self.salon_id = salon_id
+            self._mark()
+
+    def add_http(self, *, requests: int = 0, nbytes: int = 0) -> None:
+        with self._lock:
+            u = self._current()
+            u.http_requests += requests
+            u.http_bytes += nbytes
+
+    def add_db_query(self, elapsed: float) -> None:
+        with self._lock:
+            u = self._current()
+            u.db_queries += 1
+            u.db_time_ms += elapsed * 1000
+
+    def finish(self) -> dict[uuid.UUID | None, Usage]:
+        with self._lock:
+            self._close_segment()
+            self._mark()
+            return self.usage
+
+
+_current: contextvars.ContextVar[TaskProfile | None] = contextvars.ContextVar("task_profile", default=None)
+
+
+def current_profile() -> TaskProfile | None:
+    return _current.get()
+
+
+def switch_salon(salon_id: uuid.UUID | None) -> None:
+    """Charge what the running task measures from now on to ``salon_id``."""
+    profile = _current.get()
+    if profile is not None:
+        profile.switch_salon(salon_id)
+
+
+def link_job_log(job_log_id: uuid.UUID) -> None:
+    profile = _current.get()
+    if profile is not None:
+        profile.job_log_id = job_log_id
+
+
+# --- Instrumentation -------------------------------------------------------------
+
+
+class _CountingStream(httpx.SyncByteStream):
+    def __init__(self, stream: Any, profile: TaskProfile) -> None:
+        self._stream = stream
+        self._profile = profile
+
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self._stream:
+            self._profile.add_http(nbytes=len(chunk))
+            yield chunk
+
+    def close(self) -> None:
+        close = getattr(self._stream, "close", None)
+        if close is not None:
+            close()
+
+
+_installed = False
+_install_lock = threading.Lock()
+
+
+def _wrap_transport() -> None:
+    original = httpx.HTTPTransport.handle_request
+
+    def handle_request(self: httpx.HTTPTransport, request: httpx.Request) -> httpx.Response:
+        profile = _current.get()
+        if profile is None:
+            return original(self, request)
+        sent = int(request.headers.get("content-length") or 0)
+        profile.add_http(requests=1, nbytes=sent)
+        response = original(self, request)
+        response.stream = _CountingStream(response.stream, profile)
+        return response
+
+    httpx.HTTPTransport.handle_request = handle_request  # type: ignore[method-assign]
+
+
+def _listen_engine(engine: Engine) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn: Any, cursor: Any, statement: Any, parameters: Any, context: Any, executemany: bool) -> None:
+        conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn: Any, cursor: Any, statement: Any, parameters: Any, context: Any, executemany: bool) -> None:
+        started = conn.info.get("profile_started")
+        if not started:
+            return
+        elapsed = time.perf_counter() - started.pop()
+        profile = _current.get()
+        if profile is not None:
+            profile.add_db_query(elapsed)
+
+
+def install(engine: Engine) -> None:
+    """Count HTTP and DB work of profiled tasks (idempotent)."""
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        _wrap_transport()
+        _listen_engine(engine)
+        _installed = True
+
+
+# --- Recording ---------------------------------------------------------------------
+
+
+def record_usage(db: Session, profile: TaskProfile, *, status: str) -> int:
+    """Write one row per salon the task worked for; commits. Returns the row count."""
+    rows = [
+        JobResourceUsage(
+            id=uuid.uuid4(),
+            job_log_id=profile.job_log_id,
+            salon_id=salon_id,
+            task_name=profile.task_name,
+            task_id=profile.task_id,
+            status=status,
+            wall_ms=round(u.wall_ms),
+            cpu_ms=round(u.cpu_ms),
+            peak_rss_delta_kb=u.peak_rss_delta_kb,
+            http_requests=u.http_requests,
+            http_bytes=u.http_bytes,
+            db_queries=u.db_queries,
+            db_time_ms=round(u.db_time_ms),
+        )
+        for salon_id, u in profile.finish().items()
+    ]
+    db.add_all(rows)
+    db.commit()
+    return len(rows)
+
+
+def purge_usage(db: Session, *, older_than: timedelta | None = None) -> int:
+    """Delete rows older than ``older_than`` (default ``JOB_RESOURCE_RETENTION_DAYS``)."""
+    if older_than is None:
+        older_than = timedelta(days=get_settings().job_resource_retention_days)
+    result = db.execute(
+        delete(JobResourceUsage)
+        .where(JobResourceUsage.created_at < datetime.now(tz=timezone.utc) - older_than)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount or 0
+
+
+@worker_init.connect
+def _install_on_worker_init(sender: Any = None, **_kwargs: Any) -> None:
+    global _cpu_clock
+    if not get_settings().task_profiling_enabled:
+        return
+    pool_cls = getattr(sender, "pool_cls", None)
+    if "thread" not in str(getattr(pool_cls, "__module__", pool_cls)):
+        _cpu_clock = time.process_time
+    install(engine)
+
+
+@task_prerun.connect
+def _start_profile(sender: Any = None, task_id: str | None = None, **_kwargs: Any) -> None:
+    if not _installed or sender is None or sender.name in UNPROFILED_TASKS:
+        return
+    _current.set(TaskProfile(sender.name, task_id))
+
+
+@task_postrun.connect
+def _finish_profile(sender: Any = None, state: str | None = None, **_kwargs: Any) -> None:
+    profile = _current.get()
+    if profile is None:
+        return
+    # The profile must not count its own writes.
+    _current.set(None)
+    try:
+        with SessionLocal() as db:
+            record_usage(db, profile, status=state or "UNKNOWN")
+    except Exception:  # noqa: BLE001
+        logger.warning("Failed to record resource usage task=%s id=%s", profile.task_name, profile.task_id, exc_info=True)
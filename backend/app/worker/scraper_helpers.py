@@ -13,6 +13,7 @@ from app.models.gbp_media_upload import GbpMediaUpload
 from app.models.gbp_post import GbpPost
 from app.models.scrape_seed import ScrapeSeeded
 from app.models.source_content import SourceContent
+from app.services.near_duplicates import apply_near_duplicate_policy
 
 logger = logging.getLogger(__name__)
 
@@ -92,7 +93,11 @@ def create_media_uploads_for_source(
     category: str,
     media_format: str,
 ) -> list[GbpMediaUpload]:
-    """Create pending GbpMediaUpload for each active location, skipping duplicates."""
+    """Create pending GbpMediaUpload for each active location, skipping duplicates.
+
+    Near-duplicates of media already at a location are flagged or skipped
+    according to ``media_near_duplicate_action``.
+    """
     locations = _active_gbp_locations(db, salon_id)
     uploads: list[GbpMediaUpload] = []
     for loc in locations:
@@ -122,6 +127,8 @@ def create_media_uploads_for_source(
         )
         db.add(up)
         uploads.append(up)
+    # Only acts when the image is already downloaded; otherwise checked after download.
+    apply_near_duplicate_policy(db, uploads)
     return uploads
 
 
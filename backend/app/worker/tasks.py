@@ -8,8 +8,7 @@ from typing import Any
 from urllib.parse import urlsplit, urlunsplit
 
 import httpx
-from celery.exceptions import MaxRetriesExceededError
-from sqlalchemy import update
+from celery.signals import task_failure
 from sqlalchemy.orm import Session
 
 logger = logging.getLogger(__name__)
@@ -24,6 +23,7 @@ from app.models.gbp_post import GbpPost
 from app.models.instagram_account import InstagramAccount
 from app.models.job_log import JobLog
 from app.models.media_asset import MediaAsset
+from app.models.media_blob import MediaBlob
 from app.models.salon import Salon
 from app.models.source_content import SourceContent
 from app.scrapers.hotpepper_blog import fetch_blog_article, fetch_blog_links
@@ -32,16 +32,35 @@ from app.scrapers.hotpepper_style import fetch_style_images
 from app.scrapers.text_transform import hotpepper_blog_to_gbp, instagram_caption_to_gbp, sanitize_event_title
 from app.services import gbp_client
 from app.services.alerts import create_alert
-from app.services.gbp_tokens import get_access_token
+from app.services.backpressure import STAGE_MEDIA, STAGE_PUBLISH, STATE_OK, STATE_SLOW, STATE_STOP, admission
+from app.services.dead_letters import record_dead_letter
+from app.services.gbp_post_reconcile import find_published_post, forget_recent_posts, post_fingerprint
+from app.services.gbp_rate_limit import wait_for_permit
+from app.services.gbp_tokens import get_access_token, invalidate_access_token, refresh_expiring_tokens
 from app.services.meta_oauth import refresh_long_lived_token
+from app.services.outbox import purge_sent, relay_outbox
+from app.services.publish_leases import claim_for_publish, lease_owner, reap_expired_leases
+from app.services.publish_schedule import back_off_rate_limited, dispatch_due, reschedule_claimed
+from app.services.near_duplicates import NearDuplicate, check_uploads_for_assets, find_near_duplicate
+from app.services.media_backends import StorageBackend, resolve_public_url, storage_for
+from app.services.media_layout import migrate_media_layout as migrate_media_layout_files
 from app.services.media_storage import (
+    MediaDownloadError,
+    acquire_download_slot,
+    claim_asset,
     cleanup_old_assets,
     create_pending_asset,
     download_asset,
+    download_pending_assets,
     mark_asset_available,
     mark_asset_failed,
+    release_asset_claim,
+    release_download_slot,
+    reuse_recent_download,
+    sweep_orphan_files,
 )
 from app.worker.celery_app import celery_app
+from app.worker.profiling import link_job_log, purge_usage, switch_salon
 from app.worker.scraper_helpers import (
     create_gbp_posts_for_source,
     create_media_uploads_for_source,
@@ -74,7 +93,8 @@ def _is_private_hostname(hostname: str) -> bool:
 
 def _resolve_public_url(asset: MediaAsset) -> str | None:
     """公開アクセス可能なURLを返す。localhostの場合はsource_urlにフォールバック。解決不能ならNone。"""
-    parsed = urlsplit(asset.public_url)
+    public_url = resolve_public_url(asset.local_path, asset.public_url) or ""
+    parsed = urlsplit(public_url)
     hostname = (parsed.hostname or "").lower()
     if _is_private_hostname(hostname):
         if asset.source_url:
@@ -84,7 +104,7 @@ def _resolve_public_url(asset: MediaAsset) -> str | None:
             return clean
         logger.warning("Asset %s: private address %s but no source_url to fall back to", asset.id, hostname)
         return None
-    return asset.public_url
+    return public_url
 
 
 def _format_gbp_api_error(exc: httpx.HTTPStatusError, max_length: int = 500) -> str:
@@ -99,6 +119,46 @@ def _format_gbp_api_error(exc: httpx.HTTPStatusError, max_length: int = 500) ->
     return f"GBP API error: {status_code}"
 
 
+def _direct_upload_source(asset: MediaAsset) -> tuple[StorageBackend, int] | None:
+    """バイト直接アップロードに使うストレージとサイズを返す。sourceUrl方式にする場合はNone。"""
+    mode = get_settings().gbp_media_upload_mode
+    if mode == "source_url":
+        return None
+    storage = storage_for(asset.local_path)
+    size = storage.size(asset.local_path)
+    if size is None:
+        logger.info("Asset %s: stored file missing at %s", asset.id, asset.local_path)
+        return None
+    return storage, size
+
+
+def _find_committed_near_duplicate(db: Session, up: GbpMediaUpload, asset: MediaAsset) -> NearDuplicate | None:
+    """skipモード時、同じロケーションに投稿・アップロード済みの近似重複画像があれば返す。"""
+    if get_settings().media_near_duplicate_action != "skip" or asset.blob_id is None:
+        return None
+    phash = db.query(MediaBlob.phash).filter(MediaBlob.id == asset.blob_id).scalar()
+    if phash is None:
+        return None
+    return find_near_duplicate(
+        db, location_id=up.gbp_location_id, phash=phash, exclude_upload_id=up.id, committed=True
+    )
+
+
+def _find_uploaded_duplicate(db: Session, up: GbpMediaUpload, asset: MediaAsset) -> GbpMediaUpload | None:
+    """同じロケーションに同一内容（同じblob）のメディアがアップロード済みなら返す。"""
+    if asset.blob_id is None:
+        return None
+    return (
+        db.query(GbpMediaUpload)
+        .join(MediaAsset, GbpMediaUpload.media_asset_id == MediaAsset.id)
+        .filter(GbpMediaUpload.gbp_location_id == up.gbp_location_id)
+        .filter(GbpMediaUpload.id != up.id)
+        .filter(GbpMediaUpload.status == "uploaded")
+        .filter(MediaAsset.blob_id == asset.blob_id)
+        .first()
+    )
+
+
 def _check_connection_active(conn: GbpConnection) -> str | None:
     """接続が active でなければエラーメッセージを返す。active なら None。"""
     if conn.status != "active":
@@ -106,6 +166,26 @@ def _check_connection_active(conn: GbpConnection) -> str | None:
     return None
 
 
+def _defer_if_throttled(
+    task: Any,
+    db: Session,
+    model: type[GbpPost] | type[GbpMediaUpload],
+    row_id: str,
+    *,
+    claimed_status: str,
+    loc: GbpLocation,
+    cost: int = 1,
+) -> bool:
+    """GBP のレート制限に当たれば待ち時間後に scheduled へ戻し（dispatch_due が再投入）、True を返す。"""
+    wait = wait_for_permit(account_id=loc.account_id, location_id=loc.location_id, cost=cost)
+    if wait <= 0:
+        return False
+    reschedule_claimed(db, model, uuid.UUID(row_id), claimed_status=claimed_status, delay=wait)
+    db.commit()
+    logger.info("%s throttled for location %s, deferred %ss id=%s", task.name, loc.location_id, wait, row_id)
+    return True
+
+
 def _start_job(db: Session, *, salon_id: uuid.UUID | None, job_type: str) -> JobLog:
     job = JobLog(
         salon_id=salon_id,
@@ -118,6 +198,7 @@ def _start_job(db: Session, *, salon_id: uuid.UUID | None, job_type: str) -> Job
     db.add(job)
     db.commit()
     db.refresh(job)
+    link_job_log(job.id)
     return job
 
 
@@ -163,15 +244,93 @@ def _salon_coupon_url(salon: Salon) -> str | None:
     return None
 
 
+def _check_near_duplicates(db: Session, asset_ids: list[uuid.UUID]) -> None:
+    """ダウンロード完了したアセットの保留中アップロードに近似重複ポリシーを適用する（失敗しても処理は継続）。"""
+    try:
+        check_uploads_for_assets(db, asset_ids)
+    except Exception:  # noqa: BLE001
+        db.rollback()
+        logger.warning("Near-duplicate check failed for %d assets", len(asset_ids), exc_info=True)
+
+
+def _scrape_admitted(db: Session, job_type: str) -> bool:
+    """取り込み先パイプラインが詰まっていれば待機し、停止状態なら False を返す（残りのサロンは次回実行に回す）。"""
+    state = admission(db, STAGE_MEDIA, STAGE_PUBLISH)
+    if state == STATE_STOP:
+        logger.warning("%s deferred by backpressure", job_type)
+        return False
+    if state == STATE_SLOW:
+        time.sleep(get_settings().backpressure_slow_delay_sec)
+    return True
+
+
+def _kick_media_downloads(db: Session) -> None:
+    """メディアパイプラインに余裕があればダウンロードを即時起動する。詰まっていれば定期スイーパーに任せる。"""
+    if admission(db, STAGE_MEDIA) == STATE_OK:
+        download_pending_media_assets.delay()
+
+
+@task_failure.connect
+def _record_dead_letter(
+    sender: Any = None,
+    task_id: str | None = None,
+    exception: BaseException | None = None,
+    args: Any = None,
+    kwargs: Any = None,
+    **_kw: Any,
+) -> None:
+    """最終的に失敗したタスク（リトライ上限到達・未処理の例外）をデッドレターに記録する。"""
+    if sender is None or exception is None:
+        return
+    request = getattr(sender, "request", None)
+    attempts = (getattr(request, "retries", 0) or 0) + 1
+    _store_dead_letter(sender.name, task_id, args, kwargs, exception, attempts)
+
+
+def _dead_letter_failed_row(task: Any, row_id: str, exc: BaseException) -> None:
+    """例外を送出せず行を failed にして終える公開タスクの失敗もデッドレターに記録する。"""
+    _store_dead_letter(task.name, task.request.id, [row_id], {}, exc, (task.request.retries or 0) + 1)
+
+
+def _store_dead_letter(
+    task_name: str, task_id: str | None, args: Any, kwargs: Any, exc: BaseException, attempts: int
+) -> None:
+    try:
+        with SessionLocal() as db:
+            record_dead_letter(
+                db,
+                task_name=task_name,
+                task_id=task_id,
+                args=args,
+                kwargs=kwargs,
+                exc=exc,
+                attempts=attempts,
+            )
+    except Exception:  # noqa: BLE001
+        logger.exception("Failed to record dead letter task=%s id=%s", task_name, task_id)
+
+
 @celery_app.task(name="app.worker.tasks.download_media_asset", bind=True, max_retries=3)
 def download_media_asset(self, asset_id: str) -> None:
     with SessionLocal() as db:
-        asset = db.query(MediaAsset).filter(MediaAsset.id == uuid.UUID(asset_id)).one_or_none()
+        # Same pending -> downloading CAS as the batch sweeper; None means done or taken.
+        asset = claim_asset(db, uuid.UUID(asset_id))
         if asset is None:
             return
+        switch_salon(asset.salon_id)
+        # Coalesce by source URL: reuse a finished download, or wait for an in-flight one.
+        if reuse_recent_download(db, asset):
+            _check_near_duplicates(db, [asset.id])
+            return
+        if not acquire_download_slot(asset.source_key, asset.id) and self.request.retries < self.max_retries:
+            logger.info("download_media_asset joining in-flight download asset_id=%s", asset_id)
+            release_asset_claim(db, asset)
+            raise self.retry(countdown=5)
+        asset.download_attempts += 1
         try:
             result = download_asset(db, asset)
             mark_asset_available(db, asset, result)
+            _check_near_duplicates(db, [asset.id])
         except Exception as e:  # noqa: BLE001
             msg = str(e)
             mark_asset_failed(db, asset, error_message=msg)
@@ -187,16 +346,166 @@ def download_media_asset(self, asset_id: str) -> None:
                 )
             except Exception:
                 pass
+            if isinstance(e, MediaDownloadError):
+                # Oversized / unsupported media will be rejected again; don't retry.
+                return
             raise self.retry(countdown=30) from e
+        finally:
+            release_download_slot(asset.source_key, asset.id)
+
+
+@celery_app.task(name="app.worker.tasks.download_pending_media_assets")
+def download_pending_media_assets() -> dict[str, Any]:
+    """Download a batch of pending assets concurrently; re-enqueues itself while the batch is full."""
+    settings = get_settings()
+    batch_size = settings.media_download_batch_size
+    with SessionLocal() as db:
+        # Downloads give way to publishing while it is behind.
+        state = admission(db, STAGE_PUBLISH)
+        if state == STATE_STOP:
+            logger.info("download_pending_media_assets deferred by publish backpressure")
+            return {"claimed": 0, "reused": 0, "downloaded": 0, "deferred": 0, "failed": 0}
+        if state == STATE_SLOW:
+            batch_size = max(1, batch_size // 2)
+        result = download_pending_assets(db, limit=batch_size)
+        _check_near_duplicates(db, result.available)
+        for asset, msg in result.failed:
+            try:
+                create_alert(
+                    db,
+                    salon_id=asset.salon_id,
+                    severity="warning",
+                    alert_type="media_download_failed",
+                    message=f"Media download failed: {msg}",
+                    entity_type="media_asset",
+                    entity_id=asset.id,
+                )
+            except Exception:
+                db.rollback()
+    logger.info(
+        "download_pending_media_assets claimed=%d reused=%d downloaded=%d deferred=%d failed=%d",
+        result.claimed, result.reused, result.downloaded, result.deferred, len(result.failed),
+    )
+    if result.claimed >= batch_size and state == STATE_OK:
+        download_pending_media_assets.delay()
+    return {
+        "claimed": result.claimed,
+        "reused": result.reused,
+        "downloaded": result.downloaded,
+        "deferred": result.deferred,
+        "failed": len(result.failed),
+    }
 
 
 @celery_app.task(name="app.worker.tasks.cleanup_media_assets")
 def cleanup_media_assets() -> dict[str, Any]:
     with SessionLocal() as db:
-        deleted = cleanup_old_assets(db)
+        job = _start_job(db, salon_id=None, job_type="cleanup_media")
+        try:
+            deleted = cleanup_old_assets(db)
+        except Exception as e:  # noqa: BLE001
+            db.rollback()
+            _finish_job(db, job, status="failed", items_found=0, items_processed=0, error_message=str(e))
+            raise
+        _finish_job(db, job, status="completed", items_found=deleted, items_processed=deleted)
     return {"deleted": deleted}
 
 
+# Operator-invoked with a dry-run option, so the summary is kept in the result backend.
+@celery_app.task(name="app.worker.tasks.sweep_media_orphans", ignore_result=False)
+def sweep_media_orphans(dry_run: bool | None = None) -> dict[str, Any]:
+    """Remove (or quarantine, in dry-run mode) media files no live row references."""
+    settings = get_settings()
+    if dry_run is None:
+        dry_run = settings.media_orphan_dry_run
+    with SessionLocal() as db:
+        job = _start_job(db, salon_id=None, job_type="sweep_media_orphans")
+        try:
+            result = sweep_orphan_files(db, dry_run=dry_run)
+        except Exception as e:  # noqa: BLE001
+            db.rollback()
+            _finish_job(db, job, status="failed", items_found=0, items_processed=0, error_message=str(e))
+            raise
+        _finish_job(
+            db, job, status="completed", items_found=result.scanned, items_processed=result.removed + result.quarantined
+        )
+    logger.info(
+        "sweep_media_orphans dry_run=%s scanned=%d removed=%d quarantined=%d bytes=%d",
+        dry_run, result.scanned, result.removed, result.quarantined, result.bytes,
+    )
+    return {
+        "dry_run": dry_run,
+        "scanned": result.scanned,
+        "removed": result.removed,
+        "quarantined": result.quarantined,
+        "bytes": result.bytes,
+    }
+
+
+@celery_app.task(name="app.worker.tasks.migrate_media_layout", ignore_result=False)
+def migrate_media_layout(dry_run: bool = False) -> dict[str, Any]:
+    """Move existing media files into the sharded layout (one-off, safe to re-run)."""
+    with SessionLocal() as db:
+        result = migrate_media_layout_files(db, dry_run=dry_run)
+    logger.info(
+        "migrate_media_layout dry_run=%s assets=%d missing=%d",
+        dry_run, result.assets, result.missing,
+    )
+    return {"dry_run": dry_run, "assets": result.assets, "missing": result.missing}
+
+
+@celery_app.task(name="app.worker.tasks.relay_task_outbox")
+def relay_task_outbox() -> dict[str, Any]:
+    with SessionLocal() as db:
+        sent = relay_outbox(db)
+    return {"sent": sent}
+
+
+@celery_app.task(name="app.worker.tasks.purge_task_outbox")
+def purge_task_outbox() -> dict[str, Any]:
+    with SessionLocal() as db:
+        purged = purge_sent(db)
+    logger.info("purge_task_outbox: %d sent rows removed", purged)
+    return {"purged": purged}
+
+
+@celery_app.task(name="app.worker.tasks.purge_job_resource_usage")
+def purge_job_resource_usage() -> dict[str, Any]:
+    with SessionLocal() as db:
+        purged = purge_usage(db)
+    logger.info("purge_job_resource_usage: %d rows removed", purged)
+    return {"purged": purged}
+
+
+@celery_app.task(name="app.worker.tasks.dispatch_scheduled_publishes")
+def dispatch_scheduled_publishes() -> dict[str, Any]:
+    """Queue scheduled posts/uploads whose publish slot has come."""
+    with SessionLocal() as db:
+        dispatched = dispatch_due(db)
+        if dispatched:
+            relay_outbox(db)
+    return {"dispatched": dispatched}
+
+
+@celery_app.task(name="app.worker.tasks.reap_publish_leases")
+def reap_publish_leases() -> dict[str, Any]:
+    """Return posts/uploads whose worker died mid-publish to the queue."""
+    with SessionLocal() as db:
+        result = reap_expired_leases(db)
+        if result["requeued"]:
+            relay_outbox(db)
+    return result
+
+
+@celery_app.task(name="app.worker.tasks.refresh_gbp_tokens")
+def refresh_gbp_tokens() -> dict[str, Any]:
+    """Refresh GBP access tokens ahead of expiry so publishing tasks hit the cache."""
+    with SessionLocal() as db:
+        result = refresh_expiring_tokens(db)
+    logger.info("refresh_gbp_tokens: %s", result)
+    return result
+
+
 @celery_app.task(name="app.worker.tasks.refresh_instagram_tokens")
 def refresh_instagram_tokens() -> dict[str, Any]:
     """Refresh Instagram long-lived tokens expiring within 14 days."""
@@ -250,10 +559,14 @@ def scrape_hotpepper_blog() -> dict[str, Any]:
         try:
             salons = db.query(Salon).filter(Salon.is_active.is_(True)).all()
             for salon in salons:
+                if not _scrape_admitted(db, "scrape_blog"):
+                    break
+                switch_salon(salon.id)
                 blog_url = _salon_blog_url(salon)
                 if not blog_url:
                     continue
                 seeding = not is_seeded(db, salon_id=salon.id, source_type="hotpepper_blog")
+                media_pending = False
                 if seeding:
                     logger.info("Seed mode for hotpepper_blog salon_id=%s", salon.id)
                 time.sleep(5)
@@ -309,7 +622,7 @@ def scrape_hotpepper_blog() -> dict[str, Any]:
                             if first_img:
                                 asset = create_pending_asset(db, salon_id=salon.id, source_url=first_img)
                                 image_asset_id = asset.id
-                                download_media_asset.delay(str(asset.id))
+                                media_pending = media_pending or asset.status == "pending"
 
                             create_gbp_posts_for_source(
                                 db,
@@ -337,6 +650,8 @@ def scrape_hotpepper_blog() -> dict[str, Any]:
                         )
                         continue
 
+                if media_pending:
+                    _kick_media_downloads(db)
                 if seeding:
                     mark_seeded(db, salon_id=salon.id, source_type="hotpepper_blog")
 
@@ -356,10 +671,14 @@ def scrape_hotpepper_style() -> dict[str, Any]:
         try:
             salons = db.query(Salon).filter(Salon.is_active.is_(True)).all()
             for salon in salons:
+                if not _scrape_admitted(db, "scrape_style"):
+                    break
+                switch_salon(salon.id)
                 style_url = _salon_style_url(salon)
                 if not style_url:
                     continue
                 seeding = not is_seeded(db, salon_id=salon.id, source_type="hotpepper_style")
+                media_pending = False
                 if seeding:
                     logger.info("Seed mode for hotpepper_style salon_id=%s", salon.id)
                 time.sleep(5)
@@ -406,7 +725,7 @@ def scrape_hotpepper_style() -> dict[str, Any]:
 
                         if not seeding:
                             asset = create_pending_asset(db, salon_id=salon.id, source_url=img.image_url)
-                            download_media_asset.delay(str(asset.id))
+                            media_pending = media_pending or asset.status == "pending"
 
                             create_media_uploads_for_source(
                                 db,
@@ -432,6 +751,8 @@ def scrape_hotpepper_style() -> dict[str, Any]:
                         )
                         continue
 
+                if media_pending:
+                    _kick_media_downloads(db)
                 if seeding:
                     mark_seeded(db, salon_id=salon.id, source_type="hotpepper_style")
 
@@ -451,6 +772,9 @@ def scrape_hotpepper_coupon() -> dict[str, Any]:
         try:
             salons = db.query(Salon).filter(Salon.is_active.is_(True)).all()
             for salon in salons:
+                if not _scrape_admitted(db, "scrape_coupon"):
+                    break
+                switch_salon(salon.id)
                 coupon_url = _salon_coupon_url(salon)
                 if not coupon_url:
                     continue
@@ -565,8 +889,14 @@ def fetch_instagram_media() -> dict[str, Any]:
                     seeding_salons.add(acc.salon_id)
                     logger.info("Seed mode for instagram salon_id=%s", acc.salon_id)
 
-            for acc in accounts:
+            for i, acc in enumerate(accounts):
+                if not _scrape_admitted(db, "fetch_instagram"):
+                    # Salons not reached stay in seed mode for the next run.
+                    seeding_salons -= {a.salon_id for a in accounts[i:]}
+                    break
+                switch_salon(acc.salon_id)
                 seeding = acc.salon_id in seeding_salons
+                media_pending = False
                 time.sleep(1)
                 try:
                     token = decrypt_str(acc.access_token_enc, settings.token_enc_key_b64)
@@ -640,7 +970,7 @@ def fetch_instagram_media() -> dict[str, Any]:
                             if image_url:
                                 asset = create_pending_asset(db, salon_id=acc.salon_id, source_url=image_url)
                                 image_asset_id = asset.id
-                                download_media_asset.delay(str(asset.id))
+                                media_pending = media_pending or asset.status == "pending"
 
                             summary = instagram_caption_to_gbp(
                                 caption=caption,
@@ -674,6 +1004,9 @@ def fetch_instagram_media() -> dict[str, Any]:
                         )
                         continue
 
+                if media_pending:
+                    _kick_media_downloads(db)
+
             for sid in seeding_salons:
                 mark_seeded(db, salon_id=sid, source_type="instagram")
 
@@ -687,24 +1020,17 @@ def fetch_instagram_media() -> dict[str, Any]:
 @celery_app.task(name="app.worker.tasks.post_gbp_post", bind=True, max_retries=5)
 def post_gbp_post(self, gbp_post_id: str) -> None:
     logger.info("post_gbp_post started post_id=%s", gbp_post_id)
-    with SessionLocal() as db:
-        # CAS: atomically claim the post for processing
-        result = db.execute(
-            update(GbpPost)
-            .where(GbpPost.id == uuid.UUID(gbp_post_id))
-            .where(GbpPost.status.in_(["queued", "pending"]))
-            .values(status="posting")
-            .returning(GbpPost.id)
+    # Objects stay loaded across the task's commits instead of being re-selected.
+    with SessionLocal(expire_on_commit=False) as db:
+        claimed = claim_for_publish(
+            db, GbpPost, gbp_post_id,
+            claimed_status="posting", asset_column="image_asset_id", owner=lease_owner(self.request.id),
         )
-        row = result.fetchone()
-        db.commit()
-        if row is None:
+        if claimed is None:
             logger.info("post_gbp_post skipped (already processed) post_id=%s", gbp_post_id)
             return
-        post = db.query(GbpPost).filter(GbpPost.id == uuid.UUID(gbp_post_id)).one()
-
-        loc = db.query(GbpLocation).filter(GbpLocation.id == post.gbp_location_id).one()
-        conn = db.query(GbpConnection).filter(GbpConnection.id == loc.gbp_connection_id).one()
+        post, loc, conn, asset = claimed
+        switch_salon(post.salon_id)
 
         conn_err = _check_connection_active(conn)
         if conn_err:
@@ -727,7 +1053,6 @@ def post_gbp_post(self, gbp_post_id: str) -> None:
 
         image_url = None
         if post.image_asset_id:
-            asset = db.query(MediaAsset).filter(MediaAsset.id == post.image_asset_id).one_or_none()
             if asset and asset.status == "available":
                 image_url = _resolve_public_url(asset)
                 if image_url is None:
@@ -748,23 +1073,59 @@ def post_gbp_post(self, gbp_post_id: str) -> None:
                     )
                     return
 
+        fingerprint = post_fingerprint(
+            topic_type=post.post_type, summary=post.summary_final, cta_type=post.cta_type, cta_url=post.cta_url
+        )
+        # An earlier attempt with the same content may have reached Google without us seeing
+        # the response; check the location's recent posts before creating another.
+        reconcile = post.publish_attempted_at is not None and post.publish_attempt_key == fingerprint
+        cost = 2 if reconcile else 1
+        if _defer_if_throttled(self, db, GbpPost, gbp_post_id, claimed_status="posting", loc=loc, cost=cost):
+            return
+
+        # Set just before the create call: only its errors say whether Google made the post.
+        creating = False
         try:
             access_token = get_access_token(db, conn)
-            payload = gbp_client.create_local_post(
-                access_token=access_token,
-                account_id=loc.account_id,
-                location_id=loc.location_id,
-                summary=post.summary_final,
-                image_url=image_url,
-                cta_type=post.cta_type,
-                cta_url=post.cta_url,
-                topic_type=post.post_type,
-                offer_redeem_online_url=post.offer_redeem_online_url,
-                event_title=post.event_title,
-                event_start_date=post.event_start_date,
-                event_end_date=post.event_end_date,
-            )
-            post.gbp_post_id = str(payload.get("name") or payload.get("id") or "")
+            client = gbp_client.get_client()
+            existing = None
+            if reconcile:
+                existing = find_published_post(
+                    client,
+                    access_token=access_token,
+                    account_id=loc.account_id,
+                    location_id=loc.location_id,
+                    attempt_key=fingerprint,
+                    attempted_at=post.publish_attempted_at,
+                )
+            if existing is not None:
+                post.gbp_post_id = str(existing.get("name") or "")
+                logger.info("post_gbp_post adopted existing GBP post post_id=%s name=%s", gbp_post_id, post.gbp_post_id)
+            else:
+                post.publish_attempt_key = fingerprint
+                post.publish_attempted_at = _now()
+                db.add(post)
+                db.commit()
+                creating = True
+                try:
+                    payload = client.create_local_post(
+                        access_token=access_token,
+                        account_id=loc.account_id,
+                        location_id=loc.location_id,
+                        summary=post.summary_final,
+                        image_url=image_url,
+                        cta_type=post.cta_type,
+                        cta_url=post.cta_url,
+                        topic_type=post.post_type,
+                        offer_redeem_online_url=post.offer_redeem_online_url,
+                        event_title=post.event_title,
+                        event_start_date=post.event_start_date,
+                        event_end_date=post.event_end_date,
+                    )
+                finally:
+                    # Even a failed create may have made the post; don't serve the old list.
+                    forget_recent_posts(loc.account_id, loc.location_id)
+                post.gbp_post_id = str(payload.get("name") or payload.get("id") or "")
             post.status = "posted"
             post.posted_at = _now()
             post.error_message = None
@@ -773,31 +1134,31 @@ def post_gbp_post(self, gbp_post_id: str) -> None:
             logger.info("post_gbp_post completed post_id=%s", gbp_post_id)
         except httpx.HTTPStatusError as e:
             status_code = e.response.status_code
-            if status_code == 429:
-                countdown = min(600, 30 * (2 ** self.request.retries))
-                logger.warning("post_gbp_post rate limited (429), retrying in %ds post_id=%s", countdown, gbp_post_id)
-                # CAS: atomically reset to retryable state
-                db.execute(
-                    update(GbpPost)
-                    .where(GbpPost.id == uuid.UUID(gbp_post_id))
-                    .where(GbpPost.status == "posting")
-                    .values(status="queued", error_message=None)
-                )
+            if creating and status_code < 500:
+                # Google refused the create, so the post does not exist; a retry need not
+                # reconcile. A failed reconcile lookup keeps the marker.
+                post.publish_attempted_at = None
+                db.add(post)
                 db.commit()
-                try:
-                    raise self.retry(countdown=countdown) from e
-                except MaxRetriesExceededError:
-                    post = db.query(GbpPost).filter(GbpPost.id == uuid.UUID(gbp_post_id)).one()
-                    post.status = "failed"
-                    post.error_message = "GBP API rate limited (429) - max retries exceeded"
-                    db.add(post)
+            if status_code == 429:
+                # Release the claim rather than retrying under the lease, so the reaper
+                # cannot start a second run while we wait.
+                countdown = back_off_rate_limited(db, post, claimed_status="posting", limit=self.max_retries)
+                if countdown is not None:
                     db.commit()
-                    logger.error("post_gbp_post max retries exceeded post_id=%s", gbp_post_id)
-                    raise
+                    logger.warning("post_gbp_post rate limited (429), rescheduled in %ds post_id=%s", countdown, gbp_post_id)
+                    return
+                post.status = "failed"
+                post.error_message = "GBP API rate limited (429) - max retries exceeded"
+                db.add(post)
+                db.commit()
+                logger.error("post_gbp_post max retries exceeded post_id=%s", gbp_post_id)
+                raise
             if status_code == 401:
                 conn.status = "expired"
                 db.add(conn)
                 db.commit()
+                invalidate_access_token(conn.id)
                 create_alert(
                     db,
                     salon_id=post.salon_id,
@@ -813,12 +1174,14 @@ def post_gbp_post(self, gbp_post_id: str) -> None:
             db.add(post)
             db.commit()
             logger.error("post_gbp_post failed post_id=%s %s", gbp_post_id, err_msg)
+            _dead_letter_failed_row(self, gbp_post_id, e)
         except Exception as e:  # noqa: BLE001
             post.status = "failed"
             post.error_message = str(e)[:2000]
             db.add(post)
             db.commit()
             logger.error("post_gbp_post failed post_id=%s error=%s", gbp_post_id, e)
+            _dead_letter_failed_row(self, gbp_post_id, e)
             create_alert(
                 db,
                 salon_id=post.salon_id,
@@ -833,24 +1196,16 @@ def post_gbp_post(self, gbp_post_id: str) -> None:
 @celery_app.task(name="app.worker.tasks.upload_gbp_media", bind=True, max_retries=5)
 def upload_gbp_media(self, upload_id: str) -> None:
     logger.info("upload_gbp_media started upload_id=%s", upload_id)
-    with SessionLocal() as db:
-        # CAS: atomically claim the upload for processing
-        result = db.execute(
-            update(GbpMediaUpload)
-            .where(GbpMediaUpload.id == uuid.UUID(upload_id))
-            .where(GbpMediaUpload.status.in_(["queued", "pending"]))
-            .values(status="uploading")
-            .returning(GbpMediaUpload.id)
+    with SessionLocal(expire_on_commit=False) as db:
+        claimed = claim_for_publish(
+            db, GbpMediaUpload, upload_id,
+            claimed_status="uploading", asset_column="media_asset_id", owner=lease_owner(self.request.id),
         )
-        row = result.fetchone()
-        db.commit()
-        if row is None:
+        if claimed is None:
             logger.info("upload_gbp_media skipped (already processed) upload_id=%s", upload_id)
             return
-        up = db.query(GbpMediaUpload).filter(GbpMediaUpload.id == uuid.UUID(upload_id)).one()
-
-        loc = db.query(GbpLocation).filter(GbpLocation.id == up.gbp_location_id).one()
-        conn = db.query(GbpConnection).filter(GbpConnection.id == loc.gbp_connection_id).one()
+        up, loc, conn, asset = claimed
+        switch_salon(up.salon_id)
 
         conn_err = _check_connection_active(conn)
         if conn_err:
@@ -871,7 +1226,6 @@ def upload_gbp_media(self, upload_id: str) -> None:
             )
             return
 
-        asset = db.query(MediaAsset).filter(MediaAsset.id == up.media_asset_id).one_or_none()
         if not asset or asset.status != "available":
             up.status = "failed"
             up.error_message = "Media asset not available"
@@ -879,14 +1233,38 @@ def upload_gbp_media(self, upload_id: str) -> None:
             db.commit()
             return
 
-        source_url = _resolve_public_url(asset)
-        if source_url is None:
-            error_msg = "Media URL is a private address with no public fallback"
+        dup = _find_uploaded_duplicate(db, up, asset)
+        if dup is not None:
+            up.status = "skipped"
+            up.error_message = f"Identical media already uploaded to this location (upload {dup.id})"
+            db.add(up)
+            db.commit()
+            logger.info("upload_gbp_media skipped (duplicate of %s) upload_id=%s", dup.id, upload_id)
+            return
+
+        near = _find_committed_near_duplicate(db, up, asset)
+        if near is not None:
+            up.status = "skipped"
+            up.error_message = f"Near-duplicate of {near.describe()} already on this location"
+            db.add(up)
+            db.commit()
+            logger.info("upload_gbp_media skipped (near-duplicate of %s) upload_id=%s", near.describe(), upload_id)
+            return
+
+        direct = _direct_upload_source(asset)
+        bytes_only = get_settings().gbp_media_upload_mode == "bytes"
+        source_url = None if direct or bytes_only else _resolve_public_url(asset)
+        if direct is None and source_url is None:
+            error_msg = (
+                "Stored media file is missing"
+                if bytes_only
+                else "Media URL is a private address with no public fallback"
+            )
             up.status = "failed"
             up.error_message = error_msg
             db.add(up)
             db.commit()
-            logger.warning("upload_gbp_media failed (no public URL) upload_id=%s", upload_id)
+            logger.warning("upload_gbp_media failed (no media source) upload_id=%s", upload_id)
             create_alert(
                 db,
                 salon_id=up.salon_id,
@@ -898,16 +1276,35 @@ def upload_gbp_media(self, upload_id: str) -> None:
             )
             return
 
+        # Streaming makes three API calls (startUpload, bytes, create).
+        cost = 3 if direct is not None else 1
+        if _defer_if_throttled(self, db, GbpMediaUpload, upload_id, claimed_status="uploading", loc=loc, cost=cost):
+            return
+
         try:
             access_token = get_access_token(db, conn)
-            payload = gbp_client.upload_media(
-                access_token=access_token,
-                account_id=loc.account_id,
-                location_id=loc.location_id,
-                source_url=source_url,
-                category=up.category,
-                media_format=up.media_format,
-            )
+            gbp = gbp_client.get_client()
+            if direct is not None:
+                storage, size = direct
+                payload = gbp.upload_media_bytes(
+                    access_token=access_token,
+                    account_id=loc.account_id,
+                    location_id=loc.location_id,
+                    chunks=storage.iter_bytes(asset.local_path),
+                    size=size,
+                    content_type=asset.content_type,
+                    category=up.category,
+                    media_format=up.media_format,
+                )
+            else:
+                payload = gbp.upload_media(
+                    access_token=access_token,
+                    account_id=loc.account_id,
+                    location_id=loc.location_id,
+                    source_url=source_url,
+                    category=up.category,
+                    media_format=up.media_format,
+                )
             up.gbp_media_name = str(payload.get("name") or "")
             up.status = "uploaded"
             up.uploaded_at = _now()
@@ -918,30 +1315,24 @@ def upload_gbp_media(self, upload_id: str) -> None:
         except httpx.HTTPStatusError as e:
             status_code = e.response.status_code
             if status_code == 429:
-                countdown = min(600, 30 * (2 ** self.request.retries))
-                logger.warning("upload_gbp_media rate limited (429), retrying in %ds upload_id=%s", countdown, upload_id)
-                # CAS: atomically reset to retryable state
-                db.execute(
-                    update(GbpMediaUpload)
-                    .where(GbpMediaUpload.id == uuid.UUID(upload_id))
-                    .where(GbpMediaUpload.status == "uploading")
-                    .values(status="queued", error_message=None)
-                )
-                db.commit()
-                try:
-                    raise self.retry(countdown=countdown) from e
-                except MaxRetriesExceededError:
-                    up = db.query(GbpMediaUpload).filter(GbpMediaUpload.id == uuid.UUID(upload_id)).one()
-                    up.status = "failed"
-                    up.error_message = "GBP API rate limited (429) - max retries exceeded"
-                    db.add(up)
+                # Release the claim rather than retrying under the lease, so the reaper
+                # cannot start a second run while we wait.
+                countdown = back_off_rate_limited(db, up, claimed_status="uploading", limit=self.max_retries)
+                if countdown is not None:
                     db.commit()
-                    logger.error("upload_gbp_media max retries exceeded upload_id=%s", upload_id)
-                    raise
+                    logger.warning("upload_gbp_media rate limited (429), rescheduled in %ds upload_id=%s", countdown, upload_id)
+                    return
+                up.status = "failed"
+                up.error_message = "GBP API rate limited (429) - max retries exceeded"
+                db.add(up)
+                db.commit()
+                logger.error("upload_gbp_media max retries exceeded upload_id=%s", upload_id)
+                raise
             if status_code == 401:
                 conn.status = "expired"
                 db.add(conn)
                 db.commit()
+                invalidate_access_token(conn.id)
                 create_alert(
                     db,
                     salon_id=up.salon_id,
@@ -957,12 +1348,14 @@ def upload_gbp_media(self, upload_id: str) -> None:
             db.add(up)
             db.commit()
             logger.error("upload_gbp_media failed upload_id=%s %s", upload_id, err_msg)
+            _dead_letter_failed_row(self, upload_id, e)
         except Exception as e:  # noqa: BLE001
             up.status = "failed"
             up.error_message = str(e)[:2000]
             db.add(up)
             db.commit()
             logger.error("upload_gbp_media failed upload_id=%s error=%s", upload_id, e)
+            _dead_letter_failed_row(self, upload_id, e)
             create_alert(
                 db,
                 salon_id=up.salon_id,
@@ -49,10 +49,12 @@ def register_sqlite_functions(engine):
 
 @pytest.fixture(autouse=True)
 def clear_robots_cache():
-    """Clear the robots.txt cache before and after each test."""
+    """Clear the robots.txt cache and request pacing before and after each test."""
     http_client._robots_cache.clear()
+    http_client._next_request_at.clear()
     yield
     http_client._robots_cache.clear()
+    http_client._next_request_at.clear()
 
 
 @pytest.fixture(autouse=True)
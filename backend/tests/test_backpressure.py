@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import fakeredis
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.db.base import Base
+from app.models.gbp_post import GbpPost
+from app.models.media_asset import MediaAsset
+from app.services.backpressure import admission, measure_pipeline, pipeline_pressure, queue_depth
+
+from conftest import register_sqlite_functions, setup_sqlite_compat
+
+
+@pytest.fixture
+def db_session() -> Session:
+    setup_sqlite_compat()
+    engine = create_engine("sqlite:///:memory:")
+    register_sqlite_functions(engine)
+    Base.metadata.create_all(engine)
+    Session_ = sessionmaker(bind=engine)
+    session = Session_()
+    yield session
+    session.close()
+
+
+@pytest.fixture(autouse=True)
+def redis_client():
+    r = fakeredis.FakeRedis()
+    settings = SimpleNamespace(
+        backpressure_media_max_backlog=2,
+        backpressure_publish_max_backlog=10,
+        backpressure_max_lag_sec=3600,
+        backpressure_queue_max_depth=5,
+        backpressure_cache_sec=15,
+    )
+    with (
+        patch("app.services.backpressure.get_redis", return_value=r),
+        patch("app.services.backpressure.get_settings", return_value=settings),
+    ):
+        yield r
+
+
+def _now() -> datetime:
+    return datetime.now(tz=timezone.utc)
+
+
+def _assets(db: Session, n: int, *, age: timedelta = timedelta(0)) -> None:
+    for _ in range(n):
+        db.add(MediaAsset(
+            id=uuid.uuid4(), salon_id=uuid.uuid4(), source_url="https://example.com/a.jpg",
+            local_path="/unused.bin", public_url="https://app.example.com/unused.bin", status="pending",
+            created_at=_now() - age,
+        ))
+    db.commit()
+
+
+def test_queue_depth_sums_every_priority_level(redis_client) -> None:
+    redis_client.rpush("publish", "a", "b")
+    redis_client.rpush("publish:5", "c")
+    redis_client.rpush("media", "d")
+
+    assert queue_depth(redis_client, "publish") == 3
+
+
+def test_backlog_past_the_limit_slows_and_past_twice_stops(db_session: Session) -> None:
+    _assets(db_session, 3)
+    assert measure_pipeline(db_session)["media"].state == "slow"
+
+    _assets(db_session, 2)
+    media = measure_pipeline(db_session)["media"]
+    assert (media.state, media.backlog, media.queue_depth) == ("stop", 5, 0)
+
+
+def test_publish_lag_counts_only_due_queued_rows(db_session: Session) -> None:
+    def post(scheduled_at: datetime) -> GbpPost:
+        return GbpPost(
+            id=uuid.uuid4(), salon_id=uuid.uuid4(), source_content_id=uuid.uuid4(), gbp_location_id=uuid.uuid4(),
+            post_type="STANDARD", summary_generated="s", summary_final="s", status="queued",
+            scheduled_at=scheduled_at,
+        )
+
+    db_session.add_all([post(_now() - timedelta(hours=1, minutes=30)), post(_now() + timedelta(hours=3))])
+    db_session.commit()
+
+    publish = measure_pipeline(db_session)["publish"]
+    assert publish.backlog == 1
+    assert publish.lag_sec >= 5400
+    assert publish.state == "slow"
+
+
+def test_broker_depth_alone_triggers_backpressure(db_session: Session, redis_client) -> None:
+    redis_client.rpush("media", *range(11))
+    assert measure_pipeline(db_session)["media"].state == "stop"
+    assert measure_pipeline(db_session)["publish"].state == "ok"
+
+
+def test_admission_uses_the_cached_snapshot_and_worst_stage(db_session: Session) -> None:
+    assert admission(db_session, "media", "publish") == "ok"
+
+    _assets(db_session, 5)
+    # Still the cached snapshot until refreshed.
+    assert admission(db_session, "media", "publish") == "ok"
+    assert pipeline_pressure(db_session, refresh=True)["media"].state == "stop"
+    assert admission(db_session, "media", "publish") == "stop"
+    assert admission(db_session, "publish") == "ok"
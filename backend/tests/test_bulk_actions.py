@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import sys
+import types
+import uuid
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from fastapi import BackgroundTasks
+from pydantic import ValidationError
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+tasks_stub = types.ModuleType("app.worker.tasks")
+tasks_stub.post_gbp_post = types.SimpleNamespace(delay=lambda *_args, **_kwargs: None)
+tasks_stub.upload_gbp_media = types.SimpleNamespace(delay=lambda *_args, **_kwargs: None)
+sys.modules.setdefault("app.worker.tasks", tasks_stub)
+
+from app.api.deps import CurrentUser  # noqa: E402
+from app.api.routes import media_uploads as media_routes  # noqa: E402
+from app.api.routes import posts as post_routes  # noqa: E402
+from app.db.base import Base  # noqa: E402
+from app.models.gbp_media_upload import GbpMediaUpload  # noqa: E402
+from app.models.gbp_post import GbpPost  # noqa: E402
+from app.models.task_outbox import TaskOutbox  # noqa: E402
+from app.schemas.bulk import BulkPostActionRequest, BulkUploadActionRequest  # noqa: E402
+from app.services.outbox import GBP_MEDIA_TASK, GBP_POST_TASK  # noqa: E402
+
+from conftest import register_sqlite_functions, setup_sqlite_compat  # noqa: E402
+
+
+@pytest.fixture
+def db_session() -> Session:
+    setup_sqlite_compat()
+    engine = create_engine("sqlite:///:memory:")
+    register_sqlite_functions(engine)
+    Base.metadata.create_all(engine)
+    Session_ = sessionmaker(bind=engine)
+    session = Session_()
+    yield session
+    session.close()
+
+
+@pytest.fixture(autouse=True)
+def _publish_immediately():
+    settings = SimpleNamespace(
+        gbp_schedule_timezone="Asia/Tokyo",
+        gbp_schedule_quiet_start_hour=0,
+        gbp_schedule_quiet_end_hour=0,
+        gbp_schedule_posts_per_hour=0,
+        gbp_schedule_posts_per_day=0,
+        gbp_schedule_media_per_hour=0,
+        gbp_schedule_media_per_day=0,
+    )
+    with patch("app.services.publish_schedule.get_settings", return_value=settings):
+        yield
+
+
+def _user() -> CurrentUser:
+    return CurrentUser(
+        id=uuid.uuid4(), supabase_user_id=uuid.uuid4(), email="admin@example.com", role="super_admin", salon_ids=()
+    )
+
+
+def _post(db: Session, salon_id: uuid.UUID, status: str = "pending", **kwargs) -> GbpPost:
+    post = GbpPost(
+        id=uuid.uuid4(), salon_id=salon_id, source_content_id=uuid.uuid4(), gbp_location_id=uuid.uuid4(),
+        post_type=kwargs.pop("post_type", "STANDARD"), summary_generated="s", summary_final="s",
+        status=status, error_message="old", **kwargs,
+    )
+    db.add(post)
+    db.commit()
+    return post
+
+
+def _upload(db: Session, salon_id: uuid.UUID, status: str) -> GbpMediaUpload:
+    up = GbpMediaUpload(
+        id=uuid.uuid4(), salon_id=salon_id, source_content_id=uuid.uuid4(), gbp_location_id=uuid.uuid4(),
+        media_asset_id=uuid.uuid4(), media_format="PHOTO", category="ADDITIONAL",
+        source_image_url="https://example.com/a.jpg", status=status,
+    )
+    db.add(up)
+    db.commit()
+    return up
+
+
+_REQUESTS = {post_routes: BulkPostActionRequest, media_routes: BulkUploadActionRequest}
+
+
+def _run(module, db: Session, salon_id: uuid.UUID, **payload):
+    background = BackgroundTasks()
+    result = module.bulk_action(
+        background_tasks=background,
+        payload=_REQUESTS[module](**payload),
+        db=db,
+        user=_user(),
+        x_salon_id=str(salon_id),
+    )
+    assert len(background.tasks) == 1
+    enqueued = [(row.task_name, row.args[0]) for row in db.query(TaskOutbox).all()]
+    return result, enqueued
+
+
+def test_bulk_approve_reports_per_item_and_enqueues_one_group(db_session: Session) -> None:
+    salon_id = uuid.uuid4()
+    ok1 = _post(db_session, salon_id)
+    ok2 = _post(db_session, salon_id)
+    posted = _post(db_session, salon_id, status="posted")
+    bad_offer = _post(db_session, salon_id, post_type="OFFER")
+    foreign = _post(db_session, uuid.uuid4())
+    missing = uuid.uuid4()
+
+    result, enqueued = _run(
+        post_routes, db_session, salon_id,
+        action="approve", ids=[ok1.id, posted.id, bad_offer.id, foreign.id, missing, ok2.id],
+    )
+
+    assert (result.succeeded, result.failed) == (2, 4)
+    by_id = {r.id: r for r in result.results}
+    assert [r.id for r in result.results] == [ok1.id, posted.id, bad_offer.id, foreign.id, missing, ok2.id]
+    assert by_id[ok1.id].status == "queued"
+    assert by_id[posted.id].error == "Post is not pending"
+    assert "event_title" in by_id[bad_offer.id].error
+    assert by_id[foreign.id].error == by_id[missing].error == "Post not found"
+    assert sorted(enqueued) == sorted((GBP_POST_TASK, str(p.id)) for p in (ok1, ok2))
+
+    db_session.expire_all()
+    assert db_session.get(GbpPost, ok1.id).status == "queued"
+    assert db_session.get(GbpPost, ok1.id).error_message is None
+    assert db_session.get(GbpPost, foreign.id).status == "pending"
+
+
+def test_bulk_skip_by_status_filter(db_session: Session) -> None:
+    salon_id = uuid.uuid4()
+    pending = [_upload(db_session, salon_id, "pending") for _ in range(3)]
+    failed = _upload(db_session, salon_id, "failed")
+
+    result, enqueued = _run(media_routes, db_session, salon_id, action="skip", status="pending")
+
+    assert result.succeeded == 3
+    assert {r.id for r in result.results} == {u.id for u in pending}
+    assert enqueued == []
+    db_session.expire_all()
+    assert db_session.get(GbpMediaUpload, failed.id).status == "failed"
+
+
+def test_bulk_retry_only_failed(db_session: Session) -> None:
+    salon_id = uuid.uuid4()
+    failed = _upload(db_session, salon_id, "failed")
+    uploaded = _upload(db_session, salon_id, "uploaded")
+
+    result, enqueued = _run(media_routes, db_session, salon_id, action="retry", ids=[failed.id, uploaded.id])
+
+    assert [r.ok for r in result.results] == [True, False]
+    assert result.results[1].error == "Upload is not failed"
+    assert enqueued == [(GBP_MEDIA_TASK, str(failed.id))]
+
+
+def test_bulk_request_needs_ids_or_status() -> None:
+    with pytest.raises(ValidationError):
+        BulkPostActionRequest(action="approve")
+    with pytest.raises(ValidationError):
+        BulkPostActionRequest(action="approve", ids=[uuid.uuid4()], status="pending")
+    with pytest.raises(ValidationError):
+        BulkPostActionRequest(action="approve", ids=[uuid.uuid4() for _ in range(501)])
+
+
+def test_bulk_request_status_filter_is_per_model() -> None:
+    assert BulkPostActionRequest(action="skip", status="posted").status == "posted"
+    assert BulkUploadActionRequest(action="skip", status="uploaded").status == "uploaded"
+    with pytest.raises(ValidationError):
+        BulkPostActionRequest(action="skip", status="uploaded")
+    with pytest.raises(ValidationError):
+        BulkUploadActionRequest(action="approve", status="bogus")
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+
+from app.worker.celery_app import celery_app, result_backend_url
+
+
+def _route(name: str) -> dict:
+    return celery_app.amqp.router.route({}, name)
+
+
+@pytest.mark.parametrize(
+    ("task", "queue"),
+    [
+        ("app.worker.tasks.post_gbp_post", "publish"),
+        ("app.worker.tasks.upload_gbp_media", "publish"),
+        ("app.worker.tasks.download_media_asset", "media"),
+        ("app.worker.tasks.scrape_hotpepper_style", "scrape"),
+        ("app.worker.tasks.fetch_instagram_media", "scrape"),
+        ("app.worker.tasks.relay_task_outbox", "maintenance"),
+        ("app.worker.tasks.reap_publish_leases", "maintenance"),
+    ],
+)
+def test_tasks_are_routed_to_their_queue(task: str, queue: str) -> None:
+    assert _route(task)["queue"].name == queue
+
+
+def test_publishing_outranks_background_work() -> None:
+    assert _route("app.worker.tasks.post_gbp_post")["priority"] < celery_app.conf.task_default_priority
+    assert "priority" not in _route("app.worker.tasks.scrape_hotpepper_blog")
+
+
+def test_every_scheduled_task_lands_on_a_served_queue() -> None:
+    served = {"publish", "media", "scrape", "maintenance"}
+    for entry in celery_app.conf.beat_schedule.values():
+        assert _route(entry["task"])["queue"].name in served
+
+
+def test_results_are_not_stored_by_default() -> None:
+    assert celery_app.conf.task_ignore_result is True
+    assert celery_app.conf.result_expires
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        ("", "redis://redis:6379/0"),
+        ("database", "db+postgresql+psycopg://u:p@db:5432/app"),
+        ("redis://cache:6379/1", "redis://cache:6379/1"),
+    ],
+)
+def test_result_backend_url(value: str, expected: str) -> None:
+    s = SimpleNamespace(
+        celery_result_backend=value,
+        redis_url="redis://redis:6379/0",
+        database_url="postgresql+psycopg://u:p@db:5432/app",
+    )
+    assert result_backend_url(s) == expected
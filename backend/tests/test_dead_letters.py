@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import uuid
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import httpx
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.db.base import Base
+from app.models.dead_letter import DeadLetter
+from app.models.gbp_post import GbpPost
+from app.models.task_outbox import TaskOutbox
+from app.schemas.dead_letters import DeadLetterReplayRequest
+from app.services.dead_letters import dead_letter_query, record_dead_letter, replay_dead_letters
+from app.services.outbox import GBP_POST_TASK
+
+from conftest import register_sqlite_functions, setup_sqlite_compat
+
+DOWNLOAD_TASK = "app.worker.tasks.download_media_asset"
+
+
+@pytest.fixture
+def db_session() -> Session:
+    setup_sqlite_compat()
+    engine = create_engine("sqlite:///:memory:")
+    register_sqlite_functions(engine)
+    Base.metadata.create_all(engine)
+    Session_ = sessionmaker(bind=engine)
+    session = Session_()
+    yield session
+    session.close()
+
+
+@pytest.fixture(autouse=True)
+def _settings():
+    schedule = SimpleNamespace(
+        gbp_schedule_timezone="Asia/Tokyo",
+        gbp_schedule_quiet_start_hour=0,
+        gbp_schedule_quiet_end_hour=0,
+        gbp_schedule_posts_per_hour=0,
+        gbp_schedule_posts_per_day=0,
+    )
+    with (
+        patch("app.services.publish_schedule.get_settings", return_value=schedule),
+        patch("app.services.dead_letters.get_settings", return_value=SimpleNamespace(dead_letter_replay_per_sec=2.0)),
+    ):
+        yield
+
+
+def _letter(db: Session, task_name: str, *args, exc: BaseException | None = None) -> DeadLetter:
+    return record_dead_letter(
+        db, task_name=task_name, task_id=str(uuid.uuid4()), args=args, kwargs={},
+        exc=exc or httpx.ConnectTimeout("timed out"), attempts=4,
+    )
+
+
+def test_record_keeps_exception_class_and_attempts(db_session: Session) -> None:
+    letter = _letter(db_session, DOWNLOAD_TASK, "asset-1")
+
+    db_session.expire_all()
+    stored = db_session.get(DeadLetter, letter.id)
+    assert stored.exception_type == "httpx.ConnectTimeout"
+    assert (stored.args, stored.attempts, stored.error_message) == (["asset-1"], 4, "timed out")
+
+
+def test_query_filters_by_task_and_exception(db_session: Session) -> None:
+    _letter(db_session, DOWNLOAD_TASK, "a")
+    _letter(db_session, DOWNLOAD_TASK, "b", exc=ValueError("bad"))
+    _letter(db_session, "app.worker.tasks.scrape_hotpepper_blog")
+
+    q = dead_letter_query(task_name=DOWNLOAD_TASK, exception_type="httpx.ConnectTimeout")
+    assert [x.args for x in db_session.execute(q).scalars()] == [["a"]]
+
+
+def test_replay_sends_a_paced_group_and_marks_letters(db_session: Session) -> None:
+    letters = [_letter(db_session, DOWNLOAD_TASK, f"asset-{i}") for i in range(3)]
+
+    with patch("app.services.dead_letters.group") as grp:
+        result = replay_dead_letters(db_session, letters)
+
+    sigs = list(grp.call_args.args[0])
+    assert [s.args[0] for s in sigs] == ["asset-0", "asset-1", "asset-2"]
+    assert [s.options["countdown"] for s in sigs] == [0.0, 0.5, 1.0]
+    grp.return_value.apply_async.assert_called_once()
+    assert (result.sent, result.rescheduled, result.skipped) == (3, 0, 0)
+
+    db_session.expire_all()
+    assert db_session.execute(dead_letter_query()).scalars().all() == []
+    assert {x.replay_count for x in db_session.query(DeadLetter)} == {1}
+
+
+def test_replay_moves_failed_publish_rows_through_the_retry_path(db_session: Session) -> None:
+    post = GbpPost(
+        id=uuid.uuid4(), salon_id=uuid.uuid4(), source_content_id=uuid.uuid4(), gbp_location_id=uuid.uuid4(),
+        post_type="STANDARD", summary_generated="s", summary_final="s", status="failed",
+        error_message="GBP API rate limited (429) - max retries exceeded", reap_count=2,
+    )
+    posted = GbpPost(
+        id=uuid.uuid4(), salon_id=uuid.uuid4(), source_content_id=uuid.uuid4(), gbp_location_id=uuid.uuid4(),
+        post_type="STANDARD", summary_generated="s", summary_final="s", status="posted",
+    )
+    db_session.add_all([post, posted])
+    db_session.commit()
+    letters = [_letter(db_session, GBP_POST_TASK, str(post.id)), _letter(db_session, GBP_POST_TASK, str(posted.id))]
+
+    with patch("app.services.dead_letters.group") as grp:
+        result = replay_dead_letters(db_session, letters)
+
+    grp.assert_not_called()
+    assert (result.sent, result.rescheduled, result.skipped) == (0, 1, 1)
+    db_session.expire_all()
+    row = db_session.get(GbpPost, post.id)
+    assert (row.status, row.error_message, row.reap_count) == ("queued", None, 0)
+    assert [r.args[0] for r in db_session.query(TaskOutbox)] == [str(post.id)]
+
+
+def test_replay_request_needs_ids_or_a_filter() -> None:
+    with pytest.raises(ValueError):
+        DeadLetterReplayRequest()
+    with pytest.raises(ValueError):
+        DeadLetterReplayRequest(ids=[uuid.uuid4()], task_name=DOWNLOAD_TASK)
+    assert DeadLetterReplayRequest(task_name=DOWNLOAD_TASK).ids == []
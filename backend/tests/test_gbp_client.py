@@ -13,11 +13,17 @@ from app.services.gbp_client import (
     GBP_ACCOUNT_MGMT,
     GBP_BASE_V4,
     GBP_BUSINESS_INFO,
+    GBP_UPLOAD_V1,
+    GbpApiClient,
     GbpLocationInfo,
+    get_client,
+    set_client,
     list_accounts,
     list_locations,
     create_local_post,
+    list_local_posts,
     upload_media,
+    upload_media_bytes,
 )
 
 
@@ -92,6 +98,16 @@ def test_create_local_post_uses_v4():
     assert result == {"name": "post/1"}
 
 
+@respx.mock
+def test_list_local_posts_fetches_one_page():
+    route = respx.get(f"{GBP_BASE_V4}/accounts/a1/locations/l1/localPosts").mock(
+        return_value=Response(200, json={"localPosts": [{"name": "p1"}], "nextPageToken": "more"})
+    )
+    assert list_local_posts(access_token="tok", account_id="a1", location_id="l1") == [{"name": "p1"}]
+    assert route.call_count == 1
+    assert route.calls[0].request.url.params["pageSize"] == "100"
+
+
 @respx.mock
 def test_upload_media_uses_v4():
     route = respx.post(f"{GBP_BASE_V4}/accounts/a1/locations/l1/media").mock(
@@ -108,6 +124,51 @@ def test_upload_media_uses_v4():
     assert result == {"name": "media/1"}
 
 
+def test_upload_media_requires_exactly_one_source():
+    with pytest.raises(ValueError):
+        upload_media(access_token="tok", account_id="a1", location_id="l1", category="ADDITIONAL")
+    with pytest.raises(ValueError):
+        upload_media(
+            access_token="tok",
+            account_id="a1",
+            location_id="l1",
+            category="ADDITIONAL",
+            source_url="https://example.com/img.jpg",
+            data_ref="ref/1",
+        )
+
+
+@respx.mock
+def test_upload_media_bytes_streams_then_creates_with_data_ref():
+    start = respx.post(f"{GBP_BASE_V4}/accounts/a1/locations/l1/media:startUpload").mock(
+        return_value=Response(200, json={"resourceName": "accounts/a1/locations/l1/media/ref1"})
+    )
+    upload = respx.post(f"{GBP_UPLOAD_V1}/accounts/a1/locations/l1/media/ref1").mock(
+        return_value=Response(200, json={})
+    )
+    create = respx.post(f"{GBP_BASE_V4}/accounts/a1/locations/l1/media").mock(
+        return_value=Response(200, json={"name": "media/1"})
+    )
+    result = upload_media_bytes(
+        access_token="tok",
+        account_id="a1",
+        location_id="l1",
+        chunks=iter([b"abc", b"def"]),
+        size=6,
+        content_type="image/jpeg",
+        category="ADDITIONAL",
+    )
+    assert result == {"name": "media/1"}
+    assert start.called
+    sent = upload.calls[0].request
+    assert sent.url.params["upload_type"] == "media"
+    assert sent.headers["Content-Type"] == "image/jpeg"
+    assert sent.read() == b"abcdef"
+    body = json.loads(create.calls[0].request.content)
+    assert body["dataRef"] == {"resourceName": "accounts/a1/locations/l1/media/ref1"}
+    assert "sourceUrl" not in body
+
+
 # --- Pagination tests ---
 
 
@@ -314,3 +375,57 @@ def test_create_local_post_offer_sanitizes_event_title():
     title = body["event"]["title"]
     assert "\n" not in title
     assert len(title) <= 58
+
+
+# --- Pooled client ---
+
+
+def test_client_reuses_pool_and_reports_latency():
+    seen: list[str] = []
+
+    def handler(request: httpx.Request) -> Response:
+        seen.append(request.url.path)
+        if request.url.path.endswith("/media"):
+            return Response(429, json={})
+        return Response(200, json={"name": "post/1"})
+
+    calls: list[tuple[str, int | None]] = []
+    client = GbpApiClient(
+        httpx.Client(transport=httpx.MockTransport(handler)),
+        on_request=lambda op, status, elapsed: calls.append((op, status)),
+    )
+    set_client(client)
+    try:
+        assert get_client() is client
+        create_local_post(
+            access_token="tok",
+            account_id="a1",
+            location_id="l1",
+            summary="hi",
+            image_url=None,
+            cta_type=None,
+            cta_url=None,
+            topic_type="STANDARD",
+        )
+        with pytest.raises(httpx.HTTPStatusError):
+            upload_media(
+                access_token="tok",
+                account_id="a1",
+                location_id="l1",
+                source_url="https://example.com/img.jpg",
+                category="ADDITIONAL",
+            )
+    finally:
+        set_client(None)
+
+    assert seen == ["/v4/accounts/a1/locations/l1/localPosts", "/v4/accounts/a1/locations/l1/media"]
+    assert calls == [("create_local_post", 200), ("upload_media", 429)]
+    assert client.http.is_closed
+
+
+def test_get_client_is_process_wide():
+    set_client(None)
+    try:
+        assert get_client() is get_client()
+    finally:
+        set_client(None)
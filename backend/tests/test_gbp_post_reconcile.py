@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import fakeredis
+import httpx
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.db.base import Base
+from app.models.dead_letter import DeadLetter
+from app.models.gbp_post import GbpPost
+from app.services.gbp_post_reconcile import find_published_post, forget_recent_posts, post_fingerprint
+
+from conftest import register_sqlite_functions, setup_sqlite_compat
+
+# Route tests stub the worker module; these run the real publish task.
+if not hasattr(sys.modules.get("app.worker.tasks"), "__file__"):
+    sys.modules.pop("app.worker.tasks", None)
+from app.worker import tasks  # noqa: E402
+
+ATTEMPTED_AT = datetime(2026, 10, 18, 9, 0, tzinfo=timezone.utc)
+KEY = post_fingerprint(topic_type="STANDARD", summary="新メニュー\nはじめました", cta_type="BOOK", cta_url="https://x")
+
+
+@pytest.fixture(autouse=True)
+def _redis():
+    r = fakeredis.FakeRedis()
+    with (
+        patch("app.services.gbp_post_reconcile.get_redis", return_value=r),
+        patch("app.services.gbp_post_reconcile.get_settings", return_value=SimpleNamespace(gbp_reconcile_cache_sec=30)),
+    ):
+        yield r
+
+
+def _remote(name: str, created: datetime, summary: str = "新メニュー  はじめました ", **extra) -> dict:
+    return {
+        "name": name,
+        "topicType": "STANDARD",
+        "summary": summary,
+        "callToAction": {"actionType": "BOOK", "url": "https://x"},
+        "createTime": created.isoformat().replace("+00:00", "Z"),
+        "state": "LIVE",
+        **extra,
+    }
+
+
+def _find(client) -> dict | None:
+    return find_published_post(
+        client, access_token="t", account_id="a", location_id="l", attempt_key=KEY, attempted_at=ATTEMPTED_AT
+    )
+
+
+def test_adopts_post_created_by_the_timed_out_attempt():
+    client = MagicMock()
+    client.list_local_posts.return_value = [
+        _remote("other", ATTEMPTED_AT + timedelta(seconds=3), summary="別の投稿"),
+        _remote("mine", ATTEMPTED_AT + timedelta(seconds=2)),
+    ]
+
+    # Whitespace normalised by Google still matches.
+    assert _find(client)["name"] == "mine"
+
+
+def test_ignores_older_and_rejected_posts():
+    client = MagicMock()
+    client.list_local_posts.return_value = [
+        _remote("last-week", ATTEMPTED_AT - timedelta(days=7)),
+        _remote("rejected", ATTEMPTED_AT + timedelta(seconds=2), state="REJECTED"),
+    ]
+
+    assert _find(client) is None
+
+
+def test_list_is_cached_per_location_until_forgotten():
+    client = MagicMock()
+    client.list_local_posts.return_value = []
+
+    assert _find(client) is None
+    assert _find(client) is None
+    assert client.list_local_posts.call_count == 1
+
+    forget_recent_posts("a", "l")
+    client.list_local_posts.return_value = [_remote("mine", ATTEMPTED_AT)]
+    assert _find(client)["name"] == "mine"
+    assert client.list_local_posts.call_count == 2
+
+
+def test_list_cached_before_the_attempt_is_not_used_for_it():
+    client = MagicMock()
+    client.list_local_posts.return_value = []
+    assert _find(client) is None
+
+    # A later attempt on the same location: its post cannot be in the earlier list.
+    later = datetime.now(tz=timezone.utc) + timedelta(seconds=1)
+    client.list_local_posts.return_value = [_remote("mine", later)]
+    found = find_published_post(
+        client, access_token="t", account_id="a", location_id="l", attempt_key=KEY, attempted_at=later
+    )
+
+    assert found["name"] == "mine"
+    assert client.list_local_posts.call_count == 2
+
+
+def test_fingerprint_ignores_cta_without_url():
+    with_type_only = post_fingerprint(topic_type="STANDARD", summary="s", cta_type="BOOK", cta_url=None)
+    assert with_type_only == post_fingerprint(topic_type="STANDARD", summary="s", cta_type=None, cta_url=None)
+
+
+# --- post_gbp_post task flow ----------------------------------------------------------------
+
+
+@pytest.fixture
+def db_factory():
+    setup_sqlite_compat()
+    engine = create_engine("sqlite:///:memory:")
+    register_sqlite_functions(engine)
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)
+
+
+def _queued_post(factory) -> uuid.UUID:
+    with factory() as db:
+        post = GbpPost(
+            id=uuid.uuid4(), salon_id=uuid.uuid4(), source_content_id=uuid.uuid4(), gbp_location_id=uuid.uuid4(),
+            post_type="STANDARD", summary_generated="s", summary_final="新メニュー はじめました",
+            cta_type="BOOK", cta_url="https://x", status="queued",
+        )
+        db.add(post)
+        db.commit()
+        return post.id
+
+
+def _publish(factory, post_id: uuid.UUID, client: MagicMock) -> GbpPost:
+    """Run post_gbp_post once against ``client`` and return the row afterwards."""
+    loc = SimpleNamespace(account_id="a", location_id="l")
+    conn = SimpleNamespace(id=uuid.uuid4(), status="active")
+
+    def claim(db: Session, model, row_id, **_kw):
+        row = db.get(model, uuid.UUID(row_id))
+        if row.status not in ("queued", "pending"):
+            return None
+        row.status = "posting"
+        db.commit()
+        return row, loc, conn, None
+
+    with (
+        patch.object(tasks, "SessionLocal", factory),
+        patch.object(tasks, "claim_for_publish", side_effect=claim),
+        patch.object(tasks, "wait_for_permit", return_value=0),
+        patch.object(tasks, "get_access_token", return_value="token"),
+        patch.object(tasks.gbp_client, "get_client", return_value=client),
+        patch.object(tasks, "create_alert"),
+    ):
+        tasks.post_gbp_post(str(post_id))
+    with factory() as db:
+        return db.get(GbpPost, post_id)
+
+
+def _requeue(factory, post_id: uuid.UUID) -> None:
+    with factory() as db:
+        db.get(GbpPost, post_id).status = "queued"
+        db.commit()
+
+
+def _http_error(status: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("GET", "https://mybusiness.googleapis.com/")
+    return httpx.HTTPStatusError("error", request=request, response=httpx.Response(status, request=request))
+
+
+def _created_by_google(post: GbpPost) -> dict:
+    return {**_remote("mine", post.publish_attempted_at), "summary": post.summary_final}
+
+
+def test_retry_after_create_timeout_adopts_the_created_post(db_factory):
+    post_id = _queued_post(db_factory)
+    client = MagicMock()
+    client.create_local_post.side_effect = httpx.ReadTimeout("timed out")
+
+    post = _publish(db_factory, post_id, client)
+    assert post.status == "failed"
+    assert post.publish_attempted_at is not None
+
+    client.list_local_posts.return_value = [_created_by_google(post)]
+    _requeue(db_factory, post_id)
+    post = _publish(db_factory, post_id, client)
+
+    assert (post.status, post.gbp_post_id) == ("posted", "mine")
+    assert client.create_local_post.call_count == 1
+
+
+def test_rate_limited_reconcile_keeps_the_marker(db_factory):
+    post_id = _queued_post(db_factory)
+    client = MagicMock()
+    client.create_local_post.side_effect = httpx.ReadTimeout("timed out")
+    attempted_at = _publish(db_factory, post_id, client).publish_attempted_at
+
+    client.list_local_posts.side_effect = _http_error(429)
+    _requeue(db_factory, post_id)
+    post = _publish(db_factory, post_id, client)
+
+    assert post.status == "scheduled"
+    assert post.publish_attempted_at == attempted_at
+    # Back from the scheduler: the lookup works now and finds the post.
+    client.list_local_posts.side_effect = None
+    client.list_local_posts.return_value = [_created_by_google(post)]
+    _requeue(db_factory, post_id)
+    post = _publish(db_factory, post_id, client)
+
+    assert (post.status, post.gbp_post_id) == ("posted", "mine")
+    assert client.create_local_post.call_count == 1
+
+
+def test_refused_create_clears_the_marker(db_factory):
+    post_id = _queued_post(db_factory)
+    client = MagicMock()
+    client.create_local_post.side_effect = _http_error(400)
+
+    post = _publish(db_factory, post_id, client)
+
+    assert post.status == "failed"
+    assert post.publish_attempted_at is None
+
+
+def test_failed_publish_is_dead_lettered_for_replay(db_factory):
+    post_id = _queued_post(db_factory)
+    client = MagicMock()
+    client.create_local_post.side_effect = _http_error(503)
+
+    post = _publish(db_factory, post_id, client)
+
+    assert post.status == "failed"
+    with db_factory() as db:
+        letter = db.query(DeadLetter).one()
+    assert (letter.task_name, letter.args) == ("app.worker.tasks.post_gbp_post", [str(post_id)])
+    assert letter.exception_type == "httpx.HTTPStatusError"
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import threading
 from unittest.mock import patch
+from urllib.robotparser import RobotFileParser
 
 import httpx
 import pytest
@@ -113,3 +115,55 @@ class TestGetRetry:
             r = get(TEST_URL, max_retries=3)
         assert r.status_code == 200
         assert route.call_count == 2
+
+
+class TestPacing:
+    def test_concurrent_requests_to_one_origin_are_spaced(self):
+        from app.scrapers.http_client import _pace
+
+        with patch("app.scrapers.http_client.time.monotonic", return_value=100.0), \
+             patch("app.scrapers.http_client.time.sleep") as mock_sleep:
+            for _ in range(3):
+                _pace("https://beauty.hotpepper.jp")
+            _pace("https://graph.facebook.com")
+        # Default 2s interval: first call immediate, the next two queue behind it.
+        assert [c.args[0] for c in mock_sleep.call_args_list] == [2.0, 4.0]
+
+    def test_disabled_with_zero_interval(self, mock_settings):
+        from app.scrapers.http_client import _pace
+
+        mock_settings.scraper_min_interval_sec = 0
+        with patch("app.scrapers.http_client.time.sleep") as mock_sleep:
+            _pace("https://beauty.hotpepper.jp")
+            _pace("https://beauty.hotpepper.jp")
+        mock_sleep.assert_not_called()
+
+
+class TestRobots:
+    def test_slow_origin_does_not_block_others_and_is_fetched_once(self):
+        from app.scrapers.http_client import can_fetch
+
+        slow = "https://slow.example"
+        loading, release = threading.Event(), threading.Event()
+        loads: list[str] = []
+
+        def fake_load(origin: str) -> RobotFileParser:
+            loads.append(origin)
+            if origin == slow:
+                loading.set()
+                assert release.wait(5)
+            rp = RobotFileParser()
+            rp.parse([])
+            return rp
+
+        with patch("app.scrapers.http_client._load_robots", side_effect=fake_load):
+            waiters = [threading.Thread(target=can_fetch, args=(f"{slow}/page",)) for _ in range(2)]
+            for t in waiters:
+                t.start()
+            # Another origin answers while slow.example's robots.txt is still loading.
+            assert loading.wait(5)
+            assert can_fetch(TEST_URL)
+            release.set()
+            for t in waiters:
+                t.join(5)
+        assert sorted(loads) == ["https://beauty.hotpepper.jp", slow]
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+from PIL import Image, ImageDraw
+
+from app.services import image_processing
+from app.services.image_processing import (
+    GBP_MIN_DIMENSION,
+    ImageProcessingError,
+    dhash,
+    hamming_distance,
+    to_gbp_image,
+    to_thumbnail,
+)
+
+
+def _save(tmp_path: Path, img: Image.Image, fmt: str, **kwargs) -> Path:
+    path = tmp_path / f"src.{fmt.lower()}"
+    img.save(path, format=fmt, **kwargs)
+    return path
+
+
+def _decode(data: bytes, tmp_path: Path) -> Image.Image:
+    out = tmp_path / "out"
+    out.write_bytes(data)
+    return Image.open(out)
+
+
+def test_large_image_is_downscaled_to_jpeg(tmp_path):
+    src = _save(tmp_path, Image.new("RGB", (4000, 1000), "red"), "WEBP")
+
+    result = to_gbp_image(src, max_dimension=2048, quality=85)
+
+    assert result.content_type == "image/jpeg"
+    assert (result.width, result.height) == (2048, 512)
+    assert _decode(result.data, tmp_path).format == "JPEG"
+
+
+def test_small_image_is_upscaled_to_gbp_minimum(tmp_path):
+    src = _save(tmp_path, Image.new("RGB", (100, 200), "red"), "JPEG")
+
+    result = to_gbp_image(src, max_dimension=2048, quality=85)
+
+    assert (result.width, result.height) == (GBP_MIN_DIMENSION, 2 * GBP_MIN_DIMENSION)
+
+
+def test_transparency_is_kept_as_png(tmp_path):
+    src = _save(tmp_path, Image.new("RGBA", (300, 300), (255, 0, 0, 128)), "PNG")
+
+    result = to_gbp_image(src, max_dimension=2048, quality=85)
+
+    assert result.content_type == "image/png"
+
+
+def test_exif_orientation_applied_and_metadata_stripped(tmp_path):
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Orientation: rotate 90 CW
+    exif[0x010F] = "CameraMaker"
+    src = _save(tmp_path, Image.new("RGB", (400, 300), "red"), "JPEG", exif=exif)
+
+    result = to_gbp_image(src, max_dimension=2048, quality=85)
+
+    assert (result.width, result.height) == (300, 400)
+    img = _decode(result.data, tmp_path)
+    assert not img.getexif()
+    assert "icc_profile" not in img.info
+
+
+def test_thumbnail_fits_requested_size(tmp_path):
+    src = _save(tmp_path, Image.new("RGB", (1200, 600), "red"), "PNG")
+
+    thumb = to_thumbnail(src, size=320)
+
+    assert (thumb.width, thumb.height) == (320, 160)
+    assert thumb.content_type == "image/jpeg"
+
+
+def test_dhash_survives_rescale_but_separates_different_images(tmp_path):
+    img = Image.new("RGB", (800, 600), "white")
+    draw = ImageDraw.Draw(img)
+    for i, x in enumerate(range(0, 800, 90)):
+        draw.ellipse((x, (i * 137) % 400, x + 120, (i * 137) % 400 + 200), fill=(i * 25, 80, 255 - i * 25))
+    big = _save(tmp_path, img, "PNG")
+    small = tmp_path / "small.jpg"
+    img.resize((200, 150)).save(small, format="JPEG", quality=70)
+    other = tmp_path / "other.png"
+    img.transpose(Image.Transpose.ROTATE_90).save(other, format="PNG")
+
+    assert hamming_distance(dhash(big), dhash(small)) <= 3
+    assert hamming_distance(dhash(big), dhash(other)) > 10
+    assert -(1 << 63) <= dhash(big) < (1 << 63)
+
+
+def test_undecodable_file_raises(tmp_path):
+    src = tmp_path / "broken.jpg"
+    src.write_bytes(b"\xff\xd8not really a jpeg")
+
+    with pytest.raises(ImageProcessingError):
+        to_gbp_image(src, max_dimension=2048, quality=85)
+
+
+def test_image_over_pixel_limit_is_refused_before_decoding(tmp_path, monkeypatch):
+    monkeypatch.setattr(image_processing, "_MAX_PIXELS", 100 * 100)
+    src = _save(tmp_path, Image.new("RGB", (101, 100), "red"), "PNG")
+
+    with pytest.raises(ImageProcessingError, match="too large"):
+        to_gbp_image(src, max_dimension=2048, quality=85)
+
+
+def test_shrinking_to_fit_stops_at_gbp_minimum(tmp_path, monkeypatch):
+    monkeypatch.setattr(image_processing, "GBP_MAX_BYTES", 1024)
+    noise = Image.frombytes("RGBA", (600, 300), os.urandom(600 * 300 * 4))
+    src = _save(tmp_path, noise, "PNG")
+
+    with pytest.raises(ImageProcessingError, match="Cannot fit"):
+        to_gbp_image(src, max_dimension=2048, quality=85)
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.db.base import Base
+from app.models.task_outbox import TaskOutbox
+from app.services.outbox import enqueue_task, purge_sent, relay_outbox
+
+from conftest import register_sqlite_functions, setup_sqlite_compat
+
+
+@pytest.fixture
+def db_session() -> Session:
+    setup_sqlite_compat()
+    engine = create_engine("sqlite:///:memory:")
+    register_sqlite_functions(engine)
+    Base.metadata.create_all(engine)
+    Session_ = sessionmaker(bind=engine)
+    session = Session_()
+    yield session
+    session.close()
+
+
+def _stage(db: Session, n: int) -> list[TaskOutbox]:
+    rows = [enqueue_task(db, "app.worker.tasks.post_gbp_post", f"id-{i}") for i in range(n)]
+    db.commit()
+    return rows
+
+
+def test_enqueue_is_part_of_the_callers_transaction(db_session):
+    enqueue_task(db_session, "app.worker.tasks.post_gbp_post", "x")
+    db_session.rollback()
+    assert db_session.query(TaskOutbox).count() == 0
+
+
+def test_relay_publishes_in_batches_and_marks_sent(db_session):
+    rows = _stage(db_session, 5)
+    app = MagicMock()
+    with patch("app.services.outbox.celery_app", app):
+        assert relay_outbox(db_session, batch_size=2) == 5
+        assert relay_outbox(db_session, batch_size=2) == 0
+
+    # One producer connection per batch, outbox id reused as the task id.
+    assert app.producer_or_acquire.call_count == 3
+    sent = [c.kwargs["task_id"] for c in app.send_task.call_args_list]
+    assert sorted(sent) == sorted(str(r.id) for r in rows)
+    assert sorted(c.kwargs["args"][0] for c in app.send_task.call_args_list) == [f"id-{i}" for i in range(5)]
+    assert all(r.sent_at is not None for r in db_session.query(TaskOutbox))
+
+
+def test_relay_keeps_unsent_rows_when_broker_fails(db_session):
+    _stage(db_session, 3)
+    app = MagicMock()
+    app.send_task.side_effect = [None, ConnectionError("broker down")]
+    with patch("app.services.outbox.celery_app", app):
+        assert relay_outbox(db_session, batch_size=10) == 1
+
+    unsent = db_session.query(TaskOutbox).filter(TaskOutbox.sent_at.is_(None)).all()
+    assert len(unsent) == 2
+    assert sum(r.attempts for r in unsent) == 1
+    assert any(r.last_error == "broker down" for r in unsent)
+
+
+def test_purge_sent_keeps_recent_and_unsent(db_session):
+    old, recent, unsent = _stage(db_session, 3)
+    now = datetime.now(tz=timezone.utc)
+    old.sent_at = now - timedelta(days=2)
+    recent.sent_at = now - timedelta(minutes=5)
+    db_session.commit()
+
+    assert purge_sent(db_session, older_than=timedelta(hours=24)) == 1
+    assert {r.id for r in db_session.query(TaskOutbox)} == {recent.id, unsent.id}
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import httpx
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.api.routes.admin import job_resource_aggregates
+from app.db.base import Base
+from app.models.job_resource_usage import JobResourceUsage
+from app.worker import profiling
+from app.worker.profiling import TaskProfile, purge_usage, record_usage, switch_salon
+
+from conftest import register_sqlite_functions, setup_sqlite_compat
+
+
+@pytest.fixture
+def engine():
+    setup_sqlite_compat()
+    engine = create_engine("sqlite:///:memory:")
+    register_sqlite_functions(engine)
+    Base.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture
+def db_session(engine) -> Session:
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def test_usage_is_charged_to_the_salon_in_effect() -> None:
+    salon = uuid.uuid4()
+    profile = TaskProfile("app.worker.tasks.scrape_hotpepper_blog", "t1")
+    profile.add_db_query(0.002)
+    profile.switch_salon(salon)
+    profile.add_http(requests=1, nbytes=500)
+    profile.add_db_query(0.003)
+
+    usage = profile.finish()
+    assert set(usage) == {None, salon}
+    assert (usage[None].db_queries, usage[None].http_requests) == (1, 0)
+    assert (usage[salon].db_queries, usage[salon].http_requests, usage[salon].http_bytes) == (1, 1, 500)
+    assert usage[salon].db_time_ms == pytest.approx(3)
+    assert usage[salon].wall_ms >= 0 and usage[salon].cpu_ms >= 0
+
+
+def test_instrumentation_counts_http_and_db_of_the_running_task(engine, monkeypatch) -> None:
+    def fake_send(self, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, stream=httpx.ByteStream(b"x" * 1000))
+
+    monkeypatch.setattr(profiling, "_installed", False)
+    with patch.object(httpx.HTTPTransport, "handle_request", fake_send):
+        profiling.install(engine)
+        # Not profiled: nothing running.
+        with httpx.Client() as client:
+            client.get("http://example.test/")
+
+        profiling._start_profile(sender=SimpleNamespace(name="app.worker.tasks.post_gbp_post"), task_id="t2")
+        salon = uuid.uuid4()
+        switch_salon(salon)
+        with httpx.Client() as client:
+            client.post("http://example.test/", content=b"y" * 10)
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        profile = profiling.current_profile()
+        profiling._current.set(None)
+
+    usage = profile.finish()[salon]
+    assert (usage.http_requests, usage.http_bytes, usage.db_queries) == (1, 1010, 1)
+
+
+def test_beat_ticks_are_not_profiled(monkeypatch) -> None:
+    monkeypatch.setattr(profiling, "_installed", True)
+    profiling._start_profile(sender=SimpleNamespace(name="app.worker.tasks.relay_task_outbox"), task_id="t3")
+    assert profiling.current_profile() is None
+
+
+def test_prefork_workers_count_process_cpu(monkeypatch) -> None:
+    monkeypatch.setattr(profiling, "_cpu_clock", profiling._cpu_clock)
+    settings = SimpleNamespace(task_profiling_enabled=True)
+    with (
+        patch.object(profiling, "get_settings", return_value=settings),
+        patch.object(profiling, "install"),
+    ):
+        profiling._install_on_worker_init(sender=SimpleNamespace(pool_cls="celery.concurrency.threads:TaskPool"))
+        assert profiling._cpu_clock is time.thread_time
+        profiling._install_on_worker_init(sender=SimpleNamespace(pool_cls="celery.concurrency.prefork:TaskPool"))
+        assert profiling._cpu_clock is time.process_time
+
+
+def test_record_aggregate_and_purge(db_session: Session) -> None:
+    salon = uuid.uuid4()
+    for task in ("app.worker.tasks.scrape_hotpepper_blog", "app.worker.tasks.scrape_hotpepper_blog", "x"):
+        profile = TaskProfile(task, str(uuid.uuid4()))
+        profile.switch_salon(salon)
+        profile.add_http(requests=2, nbytes=100)
+        assert record_usage(db_session, profile, status="SUCCESS") == 2
+
+    by_task = {a.key: a for a in job_resource_aggregates(group_by="task", hours=24, db=db_session, _=None)}
+    blog = by_task["app.worker.tasks.scrape_hotpepper_blog"]
+    assert (blog.runs, blog.http_requests, blog.http_bytes) == (4, 4, 200)
+    by_salon = {a.key: a for a in job_resource_aggregates(group_by="salon", hours=24, db=db_session, _=None)}
+    assert by_salon[str(salon)].http_requests == 6
+    assert by_salon[""].http_requests == 0
+
+    db_session.query(JobResourceUsage).filter(JobResourceUsage.task_name == "x").update(
+        {"created_at": datetime.now(tz=timezone.utc) - timedelta(days=30)}
+    )
+    db_session.commit()
+    assert purge_usage(db_session, older_than=timedelta(days=14)) == 2
+    assert db_session.query(JobResourceUsage).count() == 4
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.db.base import Base
+from app.models.gbp_connection import GbpConnection
+from app.models.gbp_location import GbpLocation
+from app.models.gbp_media_upload import GbpMediaUpload
+from app.models.gbp_post import GbpPost
+from app.models.salon import Salon
+from app.models.source_content import SourceContent
+from app.models.task_outbox import TaskOutbox
+from app.services.outbox import GBP_MEDIA_TASK, GBP_POST_TASK
+from app.services.publish_leases import claim_for_publish, reap_expired_leases
+
+from conftest import register_sqlite_functions, setup_sqlite_compat
+
+
+@pytest.fixture
+def db_session() -> Session:
+    setup_sqlite_compat()
+    engine = create_engine("sqlite:///:memory:")
+    register_sqlite_functions(engine)
+    Base.metadata.create_all(engine)
+    Session_ = sessionmaker(bind=engine)
+    session = Session_()
+    yield session
+    session.close()
+
+
+@pytest.fixture(autouse=True)
+def _settings():
+    settings = SimpleNamespace(gbp_publish_lease_sec=600, gbp_publish_max_reaps=2)
+    with patch("app.services.publish_leases.get_settings", return_value=settings):
+        yield
+
+
+def _now() -> datetime:
+    return datetime.now(tz=timezone.utc)
+
+
+def _post(db: Session, status: str, lease_expires_at: datetime | None, reap_count: int = 0) -> GbpPost:
+    post = GbpPost(
+        id=uuid.uuid4(), salon_id=uuid.uuid4(), source_content_id=uuid.uuid4(), gbp_location_id=uuid.uuid4(),
+        post_type="STANDARD", summary_generated="s", summary_final="s", status=status,
+        lease_owner="worker-1:42:task", lease_expires_at=lease_expires_at, reap_count=reap_count,
+    )
+    db.add(post)
+    db.commit()
+    return post
+
+
+def _upload(db: Session, status: str, lease_expires_at: datetime | None) -> GbpMediaUpload:
+    up = GbpMediaUpload(
+        id=uuid.uuid4(), salon_id=uuid.uuid4(), source_content_id=uuid.uuid4(), gbp_location_id=uuid.uuid4(),
+        media_asset_id=uuid.uuid4(), media_format="PHOTO", category="ADDITIONAL",
+        source_image_url="https://example.com/a.jpg", status=status, lease_expires_at=lease_expires_at,
+    )
+    db.add(up)
+    db.commit()
+    return up
+
+
+def test_reaper_requeues_expired_claims_and_stages_tasks(db_session: Session) -> None:
+    expired_post = _post(db_session, "posting", _now() - timedelta(seconds=5))
+    live_post = _post(db_session, "posting", _now() + timedelta(minutes=5))
+    expired_upload = _upload(db_session, "uploading", _now() - timedelta(minutes=1))
+    # A finished row keeps its (stale) lease but is not touched.
+    posted = _post(db_session, "posted", _now() - timedelta(hours=1))
+
+    with patch("app.services.publish_leases.create_alert") as alert:
+        assert reap_expired_leases(db_session) == {"requeued": 2, "failed": 0}
+    alert.assert_not_called()
+
+    db_session.expire_all()
+    post = db_session.get(GbpPost, expired_post.id)
+    assert (post.status, post.lease_owner, post.lease_expires_at, post.reap_count) == ("queued", None, None, 1)
+    assert db_session.get(GbpMediaUpload, expired_upload.id).status == "queued"
+    assert db_session.get(GbpPost, live_post.id).status == "posting"
+    assert db_session.get(GbpPost, posted.id).status == "posted"
+
+    staged = sorted((r.task_name, r.args[0]) for r in db_session.query(TaskOutbox))
+    assert staged == sorted([(GBP_POST_TASK, str(expired_post.id)), (GBP_MEDIA_TASK, str(expired_upload.id))])
+
+
+def test_reaper_fails_rows_past_the_reap_limit(db_session: Session) -> None:
+    looping = _post(db_session, "posting", _now() - timedelta(seconds=5), reap_count=2)
+
+    with patch("app.services.publish_leases.create_alert") as alert:
+        assert reap_expired_leases(db_session) == {"requeued": 0, "failed": 1}
+
+    db_session.expire_all()
+    post = db_session.get(GbpPost, looping.id)
+    assert post.status == "failed"
+    assert post.lease_expires_at is None
+    assert "3 times" in post.error_message
+    assert db_session.query(TaskOutbox).count() == 0
+    assert alert.call_args.kwargs["entity_id"] == looping.id
+    assert alert.call_args.kwargs["alert_type"] == "gbp_post_failed"
+
+
+# The claim is an UPDATE ... RETURNING inside a CTE, which SQLite cannot run.
+PG_URL = os.environ.get("TEST_POSTGRES_URL")
+
+
+@pytest.fixture
+def pg_session() -> Session:
+    if not PG_URL:
+        pytest.skip("TEST_POSTGRES_URL not set")
+    engine = create_engine(PG_URL)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+def _queued_post(db: Session) -> GbpPost:
+    salon = Salon(id=uuid.uuid4(), name="s", slug=uuid.uuid4().hex[:12])
+    conn = GbpConnection(
+        id=uuid.uuid4(), google_account_email=f"{uuid.uuid4().hex}@example.com",
+        access_token_enc="a", refresh_token_enc="r", token_expires_at=_now(),
+    )
+    db.add_all([salon, conn])
+    db.flush()
+    loc = GbpLocation(id=uuid.uuid4(), salon_id=salon.id, gbp_connection_id=conn.id, account_id="a1", location_id="l1")
+    sc = SourceContent(id=uuid.uuid4(), salon_id=salon.id, source_type="hotpepper_blog", source_id="b1")
+    db.add_all([loc, sc])
+    db.flush()
+    post = GbpPost(
+        id=uuid.uuid4(), salon_id=salon.id, source_content_id=sc.id, gbp_location_id=loc.id,
+        post_type="STANDARD", summary_generated="s", summary_final="s", status="queued",
+    )
+    db.add(post)
+    db.commit()
+    return post
+
+
+def _claim(db: Session, post: GbpPost, owner: str):
+    return claim_for_publish(
+        db, GbpPost, str(post.id), claimed_status="posting", asset_column="image_asset_id", owner=owner
+    )
+
+
+def test_claim_for_publish_loads_row_with_its_location(pg_session: Session) -> None:
+    post = _queued_post(pg_session)
+
+    claimed = _claim(pg_session, post, "w1")
+
+    assert claimed is not None
+    row, loc, conn, asset = claimed
+    assert (row.id, row.status, row.lease_owner) == (post.id, "posting", "w1")
+    assert row.lease_expires_at is not None
+    assert loc.id == post.gbp_location_id and conn.id == loc.gbp_connection_id
+    assert asset is None
+
+
+def test_claim_for_publish_second_claimer_loses(pg_session: Session) -> None:
+    post = _queued_post(pg_session)
+
+    assert _claim(pg_session, post, "w1") is not None
+    assert _claim(pg_session, post, "w2") is None
+    pg_session.expire_all()
+    assert (post.status, post.lease_owner) == ("posting", "w1")
+
+
+def test_claim_for_publish_fails_row_without_location(pg_session: Session) -> None:
+    post = _queued_post(pg_session)
+    # Leave the post behind its location, as a concurrent delete could.
+    pg_session.execute(text("ALTER TABLE gbp_posts DROP CONSTRAINT gbp_posts_gbp_location_id_fkey"))
+    pg_session.execute(text("DELETE FROM gbp_locations WHERE id = :id"), {"id": post.gbp_location_id})
+    pg_session.commit()
+
+    assert _claim(pg_session, post, "w1") is None
+    pg_session.expire_all()
+    assert (post.status, post.lease_owner, post.lease_expires_at) == ("failed", None, None)
+    assert post.error_message == "GBP location or connection not found"
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+from zoneinfo import ZoneInfo
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.db.base import Base
+from app.models.gbp_post import GbpPost
+from app.models.task_outbox import TaskOutbox
+from app.services.outbox import GBP_POST_TASK
+from app.services.publish_schedule import (
+    SlotPolicy,
+    back_off_rate_limited,
+    dispatch_due,
+    next_slots,
+    reschedule_claimed,
+    schedule_publish,
+)
+
+from conftest import register_sqlite_functions, setup_sqlite_compat
+
+JST = ZoneInfo("Asia/Tokyo")
+
+
+@pytest.fixture
+def db_session() -> Session:
+    setup_sqlite_compat()
+    engine = create_engine("sqlite:///:memory:")
+    register_sqlite_functions(engine)
+    Base.metadata.create_all(engine)
+    Session_ = sessionmaker(bind=engine)
+    session = Session_()
+    yield session
+    session.close()
+
+
+def _policy(**overrides) -> SlotPolicy:
+    values = {"per_hour": 2, "per_day": 3, "tz": JST, "quiet_start": 22, "quiet_end": 8}
+    values.update(overrides)
+    return SlotPolicy(**values)
+
+
+def test_slots_are_spaced_and_capped_per_local_day():
+    now = datetime(2026, 10, 18, 10, 0, tzinfo=JST)
+    slots = next_slots([now - timedelta(minutes=10)], 3, now=now, policy=_policy())
+
+    assert [s.astimezone(JST) for s in slots] == [
+        datetime(2026, 10, 18, 10, 20, tzinfo=JST),
+        datetime(2026, 10, 18, 10, 50, tzinfo=JST),
+        # Third of the day already used; the next day starts in quiet hours.
+        datetime(2026, 10, 19, 8, 0, tzinfo=JST),
+    ]
+
+
+def test_slots_skip_quiet_hours_across_midnight():
+    now = datetime(2026, 10, 18, 23, 30, tzinfo=JST)
+    assert next_slots([], 1, now=now, policy=_policy())[0] == datetime(2026, 10, 19, 8, 0, tzinfo=JST)
+    early = datetime(2026, 10, 19, 6, 0, tzinfo=JST)
+    assert next_slots([], 1, now=early, policy=_policy())[0] == datetime(2026, 10, 19, 8, 0, tzinfo=JST)
+
+
+def test_no_limits_means_now():
+    now = datetime(2026, 10, 18, 23, 30, tzinfo=JST)
+    policy = _policy(per_hour=0, per_day=0, quiet_start=0, quiet_end=0)
+    assert next_slots([now], 2, now=now, policy=policy) == [now, now]
+
+
+def _post(db: Session, location_id: uuid.UUID, created_at: datetime) -> GbpPost:
+    post = GbpPost(
+        id=uuid.uuid4(), salon_id=uuid.uuid4(), source_content_id=uuid.uuid4(), gbp_location_id=location_id,
+        post_type="STANDARD", summary_generated="s", summary_final="s", status="pending", created_at=created_at,
+    )
+    db.add(post)
+    db.commit()
+    return post
+
+
+def test_schedule_then_dispatch(db_session: Session):
+    settings = SimpleNamespace(
+        gbp_schedule_timezone="Asia/Tokyo",
+        gbp_schedule_quiet_start_hour=0,
+        gbp_schedule_quiet_end_hour=0,
+        gbp_schedule_posts_per_hour=2,
+        gbp_schedule_posts_per_day=0,
+        gbp_schedule_dispatch_batch=100,
+    )
+    location_id = uuid.uuid4()
+    now = datetime.now(tz=timezone.utc)
+    # Older approvals get the earlier slot.
+    first = _post(db_session, location_id, now - timedelta(hours=2))
+    second = _post(db_session, location_id, now - timedelta(hours=1))
+
+    with (
+        patch("app.services.publish_schedule.get_settings", return_value=settings),
+        patch("app.services.publish_schedule._now", return_value=now),
+    ):
+        statuses = schedule_publish(db_session, [second, first])
+        db_session.commit()
+        assert statuses == {first.id: "queued", second.id: "scheduled"}
+        assert dispatch_due(db_session) == 0
+
+    staged = [(r.task_name, r.args[0]) for r in db_session.query(TaskOutbox)]
+    assert staged == [(GBP_POST_TASK, str(first.id))]
+
+    with (
+        patch("app.services.publish_schedule.get_settings", return_value=settings),
+        patch("app.services.publish_schedule._now", return_value=now + timedelta(minutes=31)),
+    ):
+        assert dispatch_due(db_session) == 1
+
+    db_session.expire_all()
+    assert db_session.get(GbpPost, second.id).status == "queued"
+    assert db_session.query(TaskOutbox).count() == 2
+
+
+def test_reschedule_claimed_releases_lease_until_dispatch(db_session: Session):
+    settings = SimpleNamespace(gbp_schedule_dispatch_batch=100)
+    now = datetime.now(tz=timezone.utc)
+    post = _post(db_session, uuid.uuid4(), now)
+    post.status, post.lease_owner, post.lease_expires_at = "posting", "w1", now + timedelta(minutes=5)
+    db_session.commit()
+
+    with patch("app.services.publish_schedule._now", return_value=now):
+        assert reschedule_claimed(db_session, GbpPost, post.id, claimed_status="posting", delay=120)
+        # The claim is gone now, so a second hand-back is a no-op.
+        assert not reschedule_claimed(db_session, GbpPost, post.id, claimed_status="posting", delay=120)
+    db_session.commit()
+    db_session.expire_all()
+    assert (post.status, post.lease_owner, post.lease_expires_at) == ("scheduled", None, None)
+
+    with (
+        patch("app.services.publish_schedule.get_settings", return_value=settings),
+        patch("app.services.publish_schedule._now", return_value=now + timedelta(seconds=60)),
+    ):
+        assert dispatch_due(db_session) == 0
+    with (
+        patch("app.services.publish_schedule.get_settings", return_value=settings),
+        patch("app.services.publish_schedule._now", return_value=now + timedelta(seconds=121)),
+    ):
+        assert dispatch_due(db_session) == 1
+    assert [r.args[0] for r in db_session.query(TaskOutbox)] == [str(post.id)]
+
+
+def test_rate_limited_claim_backs_off_then_gives_up(db_session: Session):
+    now = datetime.now(tz=timezone.utc)
+    post = _post(db_session, uuid.uuid4(), now)
+
+    delays = []
+    for _ in range(3):
+        post.status, post.lease_owner, post.lease_expires_at = "posting", "w1", now + timedelta(minutes=5)
+        db_session.commit()
+        with patch("app.services.publish_schedule._now", return_value=now):
+            delays.append(back_off_rate_limited(db_session, post, claimed_status="posting", limit=2))
+        db_session.commit()
+        db_session.expire_all()
+
+    assert delays == [30, 60, None]
+    assert post.rate_limit_count == 2
+    # Given up: still claimed, for the caller to fail.
+    assert post.status == "posting"
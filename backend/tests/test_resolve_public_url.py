@@ -57,6 +57,7 @@ _resolve_public_url = _import_resolve_public_url()
 def _make_asset(public_url: str, source_url: str | None = None) -> SimpleNamespace:
     return SimpleNamespace(
         id=uuid.uuid4(),
+        local_path="/data/media/cas/ab/cd/abc.jpg",
         public_url=public_url,
         source_url=source_url,
     )
@@ -122,7 +122,7 @@ class TestFetchBlogLinks:
         respx.get(f"{blog_url}PN2.html").mock(
             return_value=httpx.Response(200, text=_read_fixture("blog_list_page2.html"))
         )
-        with patch("app.scrapers.hotpepper_blog.time.sleep"):
+        with patch("app.scrapers.http_client.time.sleep"):
             links = fetch_blog_links(blog_url=blog_url, max_pages=2)
         assert len(links) == 5
 
@@ -137,7 +137,7 @@ class TestFetchBlogLinks:
         respx.get(pn2).mock(
             return_value=httpx.Response(404, text="Not Found", request=httpx.Request("GET", pn2))
         )
-        with patch("app.scrapers.hotpepper_blog.time.sleep"):
+        with patch("app.scrapers.http_client.time.sleep"):
             links = fetch_blog_links(blog_url=blog_url, max_pages=2)
         assert len(links) == 3
 
@@ -153,7 +153,7 @@ class TestFetchBlogLinks:
         respx.get(f"{blog_url}PN2.html").mock(
             return_value=httpx.Response(200, text=_read_fixture("blog_list.html"))
         )
-        with patch("app.scrapers.hotpepper_blog.time.sleep"):
+        with patch("app.scrapers.http_client.time.sleep"):
             links = fetch_blog_links(blog_url=blog_url, max_pages=2)
         assert len(links) == 3
 
@@ -275,7 +275,7 @@ class TestFetchStyleImages:
         respx.get(f"{style_url}PN2.html").mock(
             return_value=httpx.Response(200, text=_read_fixture("style_list_page2.html"))
         )
-        with patch("app.scrapers.hotpepper_style.time.sleep"):
+        with patch("app.scrapers.http_client.time.sleep"):
             images = fetch_style_images(style_url=style_url)
         # Page 1 has 3, page 2 has 2
         assert len(images) == 5
@@ -294,7 +294,7 @@ class TestFetchStyleImages:
         respx.get(pn2).mock(
             return_value=httpx.Response(404, text="Not Found", request=httpx.Request("GET", pn2))
         )
-        with patch("app.scrapers.hotpepper_style.time.sleep"):
+        with patch("app.scrapers.http_client.time.sleep"):
             images = fetch_style_images(style_url=style_url)
         # Only page 1 results
         assert len(images) == 3
@@ -311,7 +311,7 @@ class TestFetchStyleImages:
         respx.get(f"{style_url}PN2.html").mock(
             return_value=httpx.Response(200, text=_read_fixture("style_list.html"))
         )
-        with patch("app.scrapers.hotpepper_style.time.sleep"):
+        with patch("app.scrapers.http_client.time.sleep"):
             images = fetch_style_images(style_url=style_url)
         assert len(images) == 3
 
@@ -397,7 +397,7 @@ class TestFetchCoupons:
         respx.get(f"{coupon_url}PN2.html").mock(
             return_value=httpx.Response(200, text=_read_fixture("coupon_list_page2_with_items.html"))
         )
-        with patch("app.scrapers.hotpepper_coupon.time.sleep"):
+        with patch("app.scrapers.http_client.time.sleep"):
             coupons = fetch_coupons(coupon_url=coupon_url)
         # Page 1 has 3, page 2 has 1
         assert len(coupons) == 4
@@ -414,7 +414,7 @@ class TestFetchCoupons:
         respx.get(f"{coupon_url}PN2.html").mock(
             return_value=httpx.Response(200, text=_read_fixture("coupon_list_page2.html"))
         )
-        with patch("app.scrapers.hotpepper_coupon.time.sleep"):
+        with patch("app.scrapers.http_client.time.sleep"):
             coupons = fetch_coupons(coupon_url=coupon_url)
         # Page 1 has 3, page 2 is empty → stops
         assert len(coupons) == 3
@@ -430,7 +430,7 @@ class TestFetchCoupons:
         respx.get(pn2).mock(
             return_value=httpx.Response(404, text="Not Found", request=httpx.Request("GET", pn2))
         )
-        with patch("app.scrapers.hotpepper_coupon.time.sleep"):
+        with patch("app.scrapers.http_client.time.sleep"):
             coupons = fetch_coupons(coupon_url=coupon_url)
         assert len(coupons) == 3
 
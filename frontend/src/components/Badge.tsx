@@ -45,6 +45,7 @@ export function statusVariant(status: string): BadgeVariant {
     case "error":
     case "expired":
       return "error";
+    case "scheduled":
     case "posting":
     case "processing":
     case "running":
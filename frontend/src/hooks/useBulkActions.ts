@@ -3,23 +3,19 @@ import { useAuth } from "../lib/auth";
 import { useToast } from "../lib/toast";
 import { apiFetch } from "../lib/api";
 import { translateError } from "../lib/labels";
+import type { BulkAction, BulkActionResponse } from "../types/api";
 
-const CONCURRENCY = 5;
-
-async function runBatched(
+async function runBulk(
+  apiPrefix: string,
+  action: BulkAction,
   ids: string[],
-  buildUrl: (id: string) => string,
   token: string,
-): Promise<PromiseSettledResult<unknown>[]> {
-  const results: PromiseSettledResult<unknown>[] = [];
-  for (let i = 0; i < ids.length; i += CONCURRENCY) {
-    const batch = ids.slice(i, i + CONCURRENCY);
-    const batchResults = await Promise.allSettled(
-      batch.map((id) => apiFetch(buildUrl(id), { method: "POST", token })),
-    );
-    results.push(...batchResults);
-  }
-  return results;
+): Promise<BulkActionResponse> {
+  return apiFetch<BulkActionResponse>(`${apiPrefix}/bulk`, {
+    method: "POST",
+    token,
+    body: JSON.stringify({ action, ids }),
+  });
 }
 
 interface BulkActionsOptions {
@@ -109,29 +105,18 @@ export function useBulkActions({
     setBulkApproving(true);
     setErr(null);
     try {
-      const results = await runBatched(
-        targetIds,
-        (id) => `${apiPrefix}/${id}/approve`,
-        token,
-      );
-      const successCount = results.filter((r) => r.status === "fulfilled").length;
-      const failedResults = results.filter(
-        (r): r is PromiseRejectedResult => r.status === "rejected",
-      );
-      const failedCount = failedResults.length;
-
-      if (failedCount === 0) {
-        toast("success", `${successCount}${labels.approveSuccess}`);
+      const result = await runBulk(apiPrefix, "approve", targetIds, token);
+      if (result.failed === 0) {
+        toast("success", `${result.succeeded}${labels.approveSuccess}`);
       } else {
-        const firstError = failedResults[0]?.reason;
-        const message = translateError(
-          firstError instanceof Error ? firstError.message : String(firstError),
-        );
-        setErr(message);
-        toast("warning", `${successCount}件成功 / ${failedCount}件失敗`);
+        const firstError = result.results.find((r) => !r.ok)?.error ?? "";
+        setErr(translateError(firstError));
+        toast("warning", `${result.succeeded}件成功 / ${result.failed}件失敗`);
       }
       setSelectedIds(new Set());
       refetch();
+    } catch (e) {
+      setErr(translateError(e instanceof Error ? e.message : String(e)));
     } finally {
       setBulkApproving(false);
     }
@@ -144,29 +129,18 @@ export function useBulkActions({
     setBulkSkipping(true);
     setErr(null);
     try {
-      const results = await runBatched(
-        targetIds,
-        (id) => `${apiPrefix}/${id}/skip`,
-        token,
-      );
-      const successCount = results.filter((r) => r.status === "fulfilled").length;
-      const failedResults = results.filter(
-        (r): r is PromiseRejectedResult => r.status === "rejected",
-      );
-      const failedCount = failedResults.length;
-
-      if (failedCount === 0) {
-        toast("success", `${successCount}${labels.skipSuccess}`);
+      const result = await runBulk(apiPrefix, "skip", targetIds, token);
+      if (result.failed === 0) {
+        toast("success", `${result.succeeded}${labels.skipSuccess}`);
       } else {
-        const firstError = failedResults[0]?.reason;
-        const message = translateError(
-          firstError instanceof Error ? firstError.message : String(firstError),
-        );
-        setErr(message);
-        toast("warning", `${successCount}件成功 / ${failedCount}件失敗`);
+        const firstError = result.results.find((r) => !r.ok)?.error ?? "";
+        setErr(translateError(firstError));
+        toast("warning", `${result.succeeded}件成功 / ${result.failed}件失敗`);
       }
       setSelectedIds(new Set());
       refetch();
+    } catch (e) {
+      setErr(translateError(e instanceof Error ? e.message : String(e)));
     } finally {
       setBulkSkipping(false);
     }
@@ -10,6 +10,7 @@ import {
   connectionStatusLabel,
   jobStatusLabel,
   jobTypeLabel,
+  pipelineStateLabel,
   roleLabel,
   translateError,
   ctaTypeLabel,
@@ -19,6 +20,7 @@ describe("statusLabel", () => {
   it("translates known status", () => {
     expect(statusLabel("pending")).toBe("承認待ち");
     expect(statusLabel("posted")).toBe("投稿済み");
+    expect(statusLabel("scheduled")).toBe("予約済み");
   });
 
   it("returns original value for unknown status", () => {
@@ -121,6 +123,16 @@ describe("jobTypeLabel", () => {
   });
 });
 
+describe("pipelineStateLabel", () => {
+  it("translates known state", () => {
+    expect(pipelineStateLabel("stop")).toBe("取り込み停止中");
+  });
+
+  it("returns original value for unknown state", () => {
+    expect(pipelineStateLabel("draining")).toBe("draining");
+  });
+});
+
 describe("roleLabel", () => {
   it("translates known role", () => {
     expect(roleLabel("super_admin")).toBe("管理者");
@@ -3,6 +3,7 @@
 
 const STATUS_LABELS: Record<string, string> = {
   pending: "承認待ち",
+  scheduled: "予約済み",
   queued: "キュー待ち",
   posting: "投稿中",
   posted: "投稿済み",
@@ -16,6 +17,7 @@ export function statusLabel(status: string): string {
 
 const MEDIA_STATUS_LABELS: Record<string, string> = {
   pending: "承認待ち",
+  scheduled: "予約済み",
   uploading: "アップロード中",
   uploaded: "アップロード済み",
   failed: "失敗",
@@ -178,12 +180,32 @@ const JOB_TYPE_LABELS: Record<string, string> = {
   post_gbp_post: "GBP投稿",
   upload_gbp_media: "GBPメディアアップロード",
   cleanup_media: "メディアクリーンアップ",
+  sweep_media_orphans: "孤立メディア整理",
 };
 
 export function jobTypeLabel(type: string): string {
   return JOB_TYPE_LABELS[type] ?? type;
 }
 
+const PIPELINE_STAGE_LABELS: Record<string, string> = {
+  media: "メディア取得",
+  publish: "GBP公開",
+};
+
+export function pipelineStageLabel(stage: string): string {
+  return PIPELINE_STAGE_LABELS[stage] ?? stage;
+}
+
+const PIPELINE_STATE_LABELS: Record<string, string> = {
+  ok: "正常",
+  slow: "減速中",
+  stop: "取り込み停止中",
+};
+
+export function pipelineStateLabel(state: string): string {
+  return PIPELINE_STATE_LABELS[state] ?? state;
+}
+
 const ROLE_LABELS: Record<string, string> = {
   staff: "スタッフ",
   super_admin: "管理者",
@@ -56,6 +56,19 @@ export default function AdminJobLogsPage() {
       header: "処理",
       render: (l) => <span className="text-stone-600">{l.items_processed}</span>,
     },
+    {
+      key: "resources",
+      header: "リソース",
+      render: (l) =>
+        l.resources ? (
+          <span className="text-xs text-stone-500">
+            CPU {(l.resources.cpu_ms / 1000).toFixed(1)}秒 / HTTP {l.resources.http_requests}件 / DB{" "}
+            {l.resources.db_queries}件
+          </span>
+        ) : (
+          <span className="text-xs text-stone-400">-</span>
+        ),
+    },
     {
       key: "started",
       header: "開始",
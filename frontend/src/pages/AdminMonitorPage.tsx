@@ -7,23 +7,36 @@ import Badge, { statusVariant } from "../components/Badge";
 import Button from "../components/Button";
 import Alert from "../components/Alert";
 import { IconRefresh } from "../components/icons";
-import { connectionStatusLabel } from "../lib/labels";
-import type { MeResponse, SalonMonitorItem } from "../types/api";
+import { connectionStatusLabel, pipelineStageLabel, pipelineStateLabel } from "../lib/labels";
+import type { MeResponse, PipelineStageStatus, SalonMonitorItem } from "../types/api";
+
+function pipelineStateVariant(state: string) {
+  if (state === "stop") return "error";
+  if (state === "slow") return "warning";
+  return "success";
+}
+
+function formatLag(sec: number): string {
+  if (sec < 60) return `${sec}秒`;
+  if (sec < 3600) return `${Math.floor(sec / 60)}分`;
+  return `${Math.floor(sec / 3600)}時間${Math.floor((sec % 3600) / 60)}分`;
+}
 
 export default function AdminMonitorPage() {
   useEffect(() => {
     document.title = "モニター | サロンGBP管理";
   }, []);
 
-  const { data, loading, error, refetch } = useApiFetch<[MeResponse, SalonMonitorItem[]]>(
+  const { data, loading, error, refetch } = useApiFetch<[MeResponse, SalonMonitorItem[], PipelineStageStatus[]]>(
     (token, signal) =>
       Promise.all([
         apiFetch<MeResponse>("/me", { token, signal }),
         apiFetch<SalonMonitorItem[]>("/admin/monitor", { token, signal }),
+        apiFetch<PipelineStageStatus[]>("/admin/monitor/pipeline", { token, signal }),
       ]),
   );
 
-  const [me, items] = data ?? [null, []];
+  const [me, items, stages] = data ?? [null, [], []];
 
   if (me && me.role !== "super_admin") {
     return <div className="py-12 text-center text-stone-500">アクセス権限がありません</div>;
@@ -61,11 +74,39 @@ export default function AdminMonitorPage() {
     },
   ];
 
+  const stageColumns: Column<PipelineStageStatus>[] = [
+    {
+      key: "stage",
+      header: "パイプライン",
+      render: (s) => <span className="text-stone-600">{pipelineStageLabel(s.stage)}</span>,
+    },
+    {
+      key: "state",
+      header: "状態",
+      render: (s) => <Badge variant={pipelineStateVariant(s.state)}>{pipelineStateLabel(s.state)}</Badge>,
+    },
+    {
+      key: "backlog",
+      header: "待機件数",
+      render: (s) => <span className="text-stone-600">{s.backlog}</span>,
+    },
+    {
+      key: "lag",
+      header: "最古の待機",
+      render: (s) => <span className="text-stone-600">{formatLag(s.lag_sec)}</span>,
+    },
+    {
+      key: "queue",
+      header: "キュー滞留",
+      render: (s) => <span className="text-stone-600">{s.queue_depth ?? "-"}</span>,
+    },
+  ];
+
   return (
     <div className="space-y-4">
       <PageHeader
         title="モニター"
-        description="サロンごとの接続・アラート概況"
+        description="取り込み・公開パイプラインの負荷と、サロンごとの接続・アラート概況"
         action={
           <Button variant="secondary" onClick={refetch} aria-label="再読込">
             <IconRefresh className="h-4 w-4" />
@@ -73,6 +114,13 @@ export default function AdminMonitorPage() {
         }
       />
       {error && <Alert variant="error" message={error} />}
+      <DataTable
+        columns={stageColumns}
+        data={stages}
+        rowKey={(s) => s.stage}
+        loading={loading}
+        emptyMessage="データがありません"
+      />
       <DataTable
         columns={columns}
         data={items}
@@ -172,7 +172,7 @@ export default function MediaUploadsPage({ kind = "pending" }: { kind?: "pending
     {
       key: "source",
       header: "画像",
-      render: (u) => <MediaThumbnail url={u.source_image_url} />,
+      render: (u) => <MediaThumbnail url={u.thumbnail_url ?? u.source_image_url} />,
     },
   ];
 
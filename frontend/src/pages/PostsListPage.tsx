@@ -30,7 +30,7 @@ export default function PostsListPage({ kind }: { kind: "pending" | "history" })
 
   const path = isPending
     ? "/posts?status=pending&limit=200"
-    : "/posts?exclude_status=pending,queued,posting&limit=200";
+    : "/posts?exclude_status=pending,scheduled,queued,posting&limit=200";
   const { data: posts, loading, error, refetch } = useApiFetch<PostListItem[]>(
     (token, signal) => apiFetch(path, { token, signal }),
     [kind],
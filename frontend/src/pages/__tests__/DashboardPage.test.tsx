@@ -93,6 +93,7 @@ const posts: PostListItem[] = [
     image_asset_id: null,
     error_message: null,
     created_at: new Date().toISOString(),
+    scheduled_at: null,
     posted_at: null,
   },
 ];
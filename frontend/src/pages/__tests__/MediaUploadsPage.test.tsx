@@ -43,6 +43,7 @@ const uploads: MediaUploadListItem[] = [
     source_image_url: "https://example.com/1.jpg",
     error_message: null,
     created_at: new Date().toISOString(),
+    scheduled_at: null,
     uploaded_at: null,
   },
   {
@@ -57,6 +58,7 @@ const uploads: MediaUploadListItem[] = [
     source_image_url: "https://example.com/2.jpg",
     error_message: null,
     created_at: new Date().toISOString(),
+    scheduled_at: null,
     uploaded_at: null,
   },
 ];
@@ -46,6 +46,7 @@ const post: PostDetail = {
   edited_by: null,
   edited_at: null,
   created_at: new Date().toISOString(),
+  scheduled_at: null,
   posted_at: null,
 };
 
@@ -30,6 +30,7 @@ export interface PostListItem {
   image_asset_id: string | null;
   error_message: string | null;
   created_at: string;
+  scheduled_at: string | null;
   posted_at: string | null;
 }
 
@@ -56,8 +57,10 @@ export interface MediaUploadListItem {
   category: string;
   status: string;
   source_image_url: string;
+  thumbnail_url?: string | null;
   error_message: string | null;
   created_at: string;
+  scheduled_at: string | null;
   uploaded_at: string | null;
 }
 
@@ -159,7 +162,39 @@ export interface AppUserResponse {
   is_active: boolean;
 }
 
+// --- Bulk actions ---
+export type BulkAction = "approve" | "retry" | "skip";
+
+export interface BulkActionItemResult {
+  id: string;
+  ok: boolean;
+  status: string | null;
+  error: string | null;
+}
+
+export interface BulkActionResponse {
+  succeeded: number;
+  failed: number;
+  results: BulkActionItemResult[];
+}
+
 // --- Job Logs ---
+export interface JobResourceTotals {
+  runs: number;
+  wall_ms: number;
+  cpu_ms: number;
+  peak_rss_delta_kb: number;
+  http_requests: number;
+  http_bytes: number;
+  db_queries: number;
+  db_time_ms: number;
+}
+
+export interface JobResourceAggregate extends JobResourceTotals {
+  key: string;
+  wall_ms_avg: number;
+}
+
 export interface JobLogResponse {
   id: string;
   salon_id: string | null;
@@ -170,6 +205,7 @@ export interface JobLogResponse {
   error_message: string | null;
   started_at: string;
   completed_at: string | null;
+  resources: JobResourceTotals | null;
 }
 
 // --- Monitor ---
@@ -182,3 +218,11 @@ export interface SalonMonitorItem {
   gbp_connection_status: string;
   active_locations: number;
 }
+
+export interface PipelineStageStatus {
+  stage: string;
+  state: string;
+  backlog: number;
+  lag_sec: number;
+  queue_depth: number | null;
+}